@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Runtime microbenchmarks.
+
+Each benchmark is a module in this package comparing the current code
+path with the implementation it replaced, and is run from the repository
+root, e.g.:
+
+    python3 -m benchmarks.bench_framing
+
+Benchmarks that need a runtime use an in-memory configuration database,
+so deploy/empower.db is never touched. This package must therefore be
+imported before any empower.persistence import. Logging is disabled, the
+cost of the log calls is not part of what is measured.
+"""
+
+import gc
+import time
+import logging
+
+import empower.settings
+
+# keep the benchmarks away from the deployment database
+empower.settings.CONFIGDB_ENGINE = "sqlite://"
+
+logging.disable(logging.CRITICAL)
+
+
+def setup_runtime():
+    """Create the runtime and publish it as empower.main.RUNTIME.
+
+    Modules binding RUNTIME at import time (from empower.main import
+    RUNTIME) must be imported after this call.
+    """
+
+    import empower.main
+
+    from empower.core.core import EmpowerRuntime
+
+    if not empower.main.RUNTIME:
+        empower.main.RUNTIME = EmpowerRuntime(empower.main.EmpowerOptions())
+
+    return empower.main.RUNTIME
+
+
+def measure(func, number, repeat=5):
+    """Return the best time (in s) of repeat runs of number calls."""
+
+    best = None
+
+    for _ in range(repeat):
+
+        gc.collect()
+        gc.disable()
+
+        try:
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+
+def report(title, rows, unit="us/call"):
+    """Print a before/after table.
+
+    Args:
+        title: the benchmark title
+        rows: a list of (label, before, after) tuples, before and after
+          being values in unit (lower is better)
+        unit: the unit of the values
+    """
+
+    print(title)
+    print("%-28s %14s %14s %9s" % ("", "before", "after", "speedup"))
+
+    for label, before, after in rows:
+        speedup = before / after if after else float('inf')
+        print("%-28s %14.3f %14.3f %8.1fx" % (label, before, after, speedup))
+
+    print("(%s)" % unit)
+    print()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Auth request BSSID resolution, tenant scan vs runtime indexes.
+
+The runtime is populated with unique and shared tenants (each shared
+tenant with one VAP on a WTP). The BSSID of an auth request is resolved
+by the two passes over all the tenants the auth request handler used
+before and by RUNTIME.load_tenant_by_bssid. Both use the same (memoized)
+Tenant.generate_bssid, so only the lookup strategy is compared.
+"""
+
+import argparse
+import random
+import uuid
+
+from benchmarks import measure
+from benchmarks import report
+from benchmarks import setup_runtime
+
+from empower.core.resourcepool import BT_L20
+from empower.core.resourcepool import ResourceBlock
+from empower.core.tenant import T_TYPE_SHARED
+from empower.core.tenant import T_TYPE_UNIQUE
+from empower.core.vap import VAP
+from empower.core.wtp import WTP
+from empower.datatypes.etheraddress import EtherAddress
+from empower.datatypes.ssid import SSID
+
+# every SHARED_EVERY-th tenant is a shared tenant
+SHARED_EVERY = 10
+
+
+def random_addr(rng):
+    """Return a random unicast address."""
+
+    raw = bytes([rng.randrange(256) & 0xFC]) + \
+        bytes(rng.randrange(256) for _ in range(5))
+
+    return EtherAddress(raw)
+
+
+def setup(count, seed=0):
+    """Return the runtime with count tenants."""
+
+    runtime = setup_runtime()
+    rng = random.Random(seed)
+
+    wtp = WTP(random_addr(rng), "bench")
+    runtime.wtps[wtp.addr] = wtp
+
+    for i in range(count):
+
+        bssid_type = T_TYPE_UNIQUE if i % SHARED_EVERY else T_TYPE_SHARED
+        tenant_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+
+        runtime.add_tenant("root", "bench", SSID("tenant%u" % i), bssid_type,
+                           tenant_id=tenant_id)
+
+        tenant = runtime.tenants[tenant_id]
+
+        if bssid_type == T_TYPE_SHARED:
+            block = ResourceBlock(wtp, random_addr(rng), 1, BT_L20)
+            tenant.add_vap(VAP(random_addr(rng), block, tenant))
+
+    return runtime
+
+
+def legacy_lookup(runtime, bssid, sta):
+    """The auth request scan replaced by load_tenant_by_bssid."""
+
+    for tenant in runtime.tenants.values():
+
+        if tenant.bssid_type == T_TYPE_SHARED:
+            continue
+
+        if tenant.generate_bssid(sta) == bssid:
+            return tenant
+
+    for tenant in runtime.tenants.values():
+
+        if tenant.bssid_type == T_TYPE_UNIQUE:
+            continue
+
+        if bssid in tenant.vaps:
+            return tenant
+
+    return None
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--tenants", type=int, default=300,
+                        help="tenants in the runtime (default: 300)")
+    parser.add_argument("--number", type=int, default=2000,
+                        help="lookups per run (default: 2000)")
+    args = parser.parse_args()
+
+    runtime = setup(args.tenants)
+    rng = random.Random(1)
+
+    sta = random_addr(rng)
+    unique = [t for t in runtime.tenants.values()
+              if t.bssid_type == T_TYPE_UNIQUE]
+    shared = [t for t in runtime.tenants.values()
+              if t.bssid_type == T_TYPE_SHARED]
+
+    # the last unique tenant is the worst case for the scan
+    requests = [("unique bssid, last tenant",
+                 unique[-1].generate_bssid(sta), unique[-1]),
+                ("shared bssid, last tenant",
+                 next(iter(shared[-1].vaps)), shared[-1]),
+                ("unknown bssid", random_addr(rng), None)]
+
+    rows = []
+
+    for label, bssid, expected in requests:
+
+        assert legacy_lookup(runtime, bssid, sta) is expected
+        assert runtime.load_tenant_by_bssid(bssid, sta) is expected
+
+        before = measure(lambda: legacy_lookup(runtime, bssid, sta),
+                         args.number)
+        after = measure(lambda: runtime.load_tenant_by_bssid(bssid, sta),
+                        args.number)
+
+        rows.append((label,
+                     before * 1e6 / args.number,
+                     after * 1e6 / args.number))
+
+    report("BSSID resolution, %u tenants (%u shared)" %
+           (len(runtime.tenants), len(shared)), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Module callback cost, eager vs lazy serialization of the response.
+
+A wifi_stats module holding a 300 samples response, subscribed by
+in-process callbacks only, hands the response to its callbacks through
+the handle_callback used before (response serialized to JSON on every
+call) and through the current Module.handle_callback (response serialized
+only for remote callbacks).
+"""
+
+import argparse
+import json
+import random
+import types
+import uuid
+
+from benchmarks import measure
+from benchmarks import report
+from benchmarks import setup_runtime
+
+from empower.core.jsonserializer import EmpowerEncoder
+from empower.core.resourcepool import BT_L20
+from empower.core.resourcepool import ResourceBlock
+from empower.core.wtp import WTP
+from empower.datatypes.etheraddress import EtherAddress
+
+
+def setup(seed=0):
+    """Return a wifi_stats module holding a 300 samples response."""
+
+    setup_runtime()
+
+    from empower.lvapp.wifi_stats.wifi_stats import WiFiStats
+
+    rng = random.Random(seed)
+
+    wtp = WTP(EtherAddress("00:0D:B9:2F:56:64"), "bench")
+
+    module = WiFiStats()
+    module.module_id = 1
+    module.tenant_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+    module.block = ResourceBlock(wtp, EtherAddress("00:0D:B9:2F:56:65"), 1,
+                                 BT_L20)
+
+    for stats_type in ['tx', 'rx', 'ed']:
+        module.wifi_stats[stats_type] = \
+            [{'type': 0,
+              'timestamp': 1000 * i,
+              'sample': rng.randrange(180) / 180.0} for i in range(100)]
+
+    return module
+
+
+def legacy_handle_callback(module, serializable):
+    """The handle_callback replaced by the lazy serialization."""
+
+    if not module.callbacks:
+        return
+
+    try:
+
+        as_dict = serializable.to_dict()
+        json.dumps(as_dict, cls=EmpowerEncoder)
+
+    except Exception as ex:
+
+        module.log.exception(ex)
+        return
+
+    for callback in list(module.callbacks):
+
+        try:
+
+            if isinstance(callback, (types.FunctionType, types.MethodType)):
+
+                callback(serializable)
+
+            else:
+
+                raise TypeError("Invalid callback type")
+
+        except Exception as ex:
+
+            module.log.exception(ex)
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--number", type=int, default=1000,
+                        help="responses per run (default: 1000)")
+    args = parser.parse_args()
+
+    module = setup()
+    rows = []
+
+    for count in [1, 3]:
+
+        for _ in range(count - len(module.callbacks)):
+            module.subscribe(lambda response: None)
+
+        before = measure(lambda: legacy_handle_callback(module, module),
+                         args.number)
+        after = measure(lambda: module.handle_callback(module), args.number)
+
+        rows.append(("%u local callback(s)" % count,
+                     before * 1e6 / args.number,
+                     after * 1e6 / args.number))
+
+    report("wifi_stats callback, 300 samples", rows, unit="us/response")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""LVAPP message dispatch overhead, getattr lookup vs dispatch table.
+
+For every message type with a default handler, a message is dispatched
+by the _trigger_message LVAPPConnection used before (handler name built
+with string formatting, hasattr/getattr, WTP address decoded and the valid
+lists rebuilt for every message) and by the current one (one lookup in
+the server dispatch table). Parsers return a prebuilt message and handlers
+do nothing, so only the dispatch overhead is measured.
+"""
+
+import argparse
+import socket
+
+from tornado.iostream import IOStream
+
+from benchmarks import measure
+from benchmarks import report
+from benchmarks import setup_runtime
+
+from empower.datatypes.etheraddress import EtherAddress
+from empower.lvapp import PT_HELLO
+from empower.lvapp import PT_CAPS_RESPONSE
+
+WTP_ADDR = b'\x00\x0d\xb9\x2f\x56\x64'
+
+
+class Message:
+    """A parsed message."""
+
+    def __init__(self, seq):
+        self.wtp = WTP_ADDR
+        self.seq = seq
+
+
+class Parser:
+    """A parser returning a prebuilt message."""
+
+    def __init__(self, name):
+        self.name = name
+        self.msg = Message(1)
+
+    def parse(self, _):
+        return self.msg
+
+
+def noop(*_):
+    """A handler doing nothing."""
+
+
+def setup():
+    """Return the runtime, the connection and the parsers."""
+
+    runtime = setup_runtime()
+
+    from empower.core.pnfpserver import PNFPServer
+    from empower.core.sendqueue import DEFAULT_MAX_BYTES
+    from empower.core.sendqueue import DEFAULT_MAX_DELAY
+    from empower.core.sendqueue import DEFAULT_BUDGET
+    from empower.core.wtp import WTP
+    from empower.lvapp import PT_TYPES
+    from empower.lvapp.lvappconnection import LVAPPConnection
+    from empower.lvapp.lvappserver import LVAPPServer
+    from empower.persistence.persistence import TblWTP
+
+    # every message type with a default handler, handlers do nothing
+    parsers = {pt_type: Parser(parser.name)
+               for pt_type, parser in PT_TYPES.items()
+               if parser and hasattr(LVAPPConnection,
+                                     "_handle_%s" % parser.name)}
+
+    handlers = {"_handle_%s" % parser.name: noop
+                for parser in parsers.values()}
+    handlers['send_register_message_to_self'] = noop
+
+    connection_class = type("Connection", (LVAPPConnection,), handlers)
+
+    class Server(PNFPServer):
+        """An LVAPP server without listening socket."""
+
+        PNFDEV = WTP
+        TBL_PNFDEV = TblWTP
+        CONNECTION = connection_class
+        PT_BEFORE_CONNECTED = LVAPPServer.PT_BEFORE_CONNECTED
+        PT_BEFORE_ONLINE = LVAPPServer.PT_BEFORE_ONLINE
+
+        send_max_bytes = DEFAULT_MAX_BYTES
+        send_max_delay = DEFAULT_MAX_DELAY
+        send_budget = DEFAULT_BUDGET
+
+    server = Server(0, dict(parsers), {pt_type: [] for pt_type in parsers})
+
+    _, right = socket.socketpair()
+    connection = connection_class(IOStream(right), ("127.0.0.1", 0), server)
+
+    wtp = WTP(EtherAddress(WTP_ADDR), "bench")
+    runtime.wtps[wtp.addr] = wtp
+    wtp.connection = connection
+    wtp.set_connected()
+    wtp.set_online()
+
+    return runtime, connection, parsers
+
+
+def legacy_dispatch(runtime, connection, msg_type):
+    """The _trigger_message replaced by the dispatch table."""
+
+    self = connection
+
+    if msg_type not in self.server.pt_types:
+        self.log.error("Unknown message type %u", msg_type)
+        return
+
+    if self.server.pt_types[msg_type]:
+
+        msg_name = self.server.pt_types[msg_type].name
+
+        msg = self.server.pt_types[msg_type].parse(None)
+        addr = EtherAddress(msg.wtp)
+
+        try:
+            wtp = runtime.wtps[addr]
+        except KeyError:
+            self.log.error("Unknown WTP (%s), closing connection", addr)
+            self.stream.close()
+            return
+
+        valid = [PT_HELLO]
+        if not wtp.connection and msg_type not in valid:
+            self.log.info("Got %s message from disconnected %s seq %u",
+                          msg_name,
+                          EtherAddress(addr),
+                          msg.seq)
+            return
+
+        self.log.info("Got %s message from %s seq %u",
+                      msg_name,
+                      EtherAddress(addr),
+                      msg.seq)
+
+        valid = [PT_HELLO, PT_CAPS_RESPONSE]
+        if not wtp.is_online() and msg_type not in valid:
+            self.log.info("WTP %s not ready", wtp.addr)
+            return
+
+        handler_name = "_handle_%s" % self.server.pt_types[msg_type].name
+
+        if hasattr(self, handler_name):
+            handler = getattr(self, handler_name)
+            handler(wtp, msg)
+
+        if msg_type in self.server.pt_types_handlers:
+            for handler in self.server.pt_types_handlers[msg_type]:
+                handler(wtp, msg)
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--number", type=int, default=100000,
+                        help="messages per run (default: 100000)")
+    args = parser.parse_args()
+
+    runtime, connection, parsers = setup()
+
+    rows = []
+
+    for pt_type, msg_parser in sorted(parsers.items()):
+
+        before = measure(lambda: legacy_dispatch(runtime, connection,
+                                                 pt_type), args.number)
+        after = measure(lambda: connection._trigger_message(pt_type, None),
+                        args.number)
+
+        rows.append((msg_parser.name,
+                     before * 1e6 / args.number,
+                     after * 1e6 / args.number))
+
+    report("LVAPP dispatch overhead per message", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Event loop overhead per LVAPP message, for each --event-loop setting.
+
+Two workloads run on a socket pair, on a fresh loop of each kind:
+
+  stream: a burst of frames read by the LVAPPConnection framed reader,
+    several frames per loop iteration (us per frame)
+  ping-pong: one frame in flight, echoed back through the connection send
+    queue, so every message costs a full loop round trip (us per round
+    trip)
+
+With tornado 5 and later the tornado IOLoop always runs on asyncio, so the
+tornado and asyncio settings are the same loop. uvloop is skipped if it
+is not installed.
+"""
+
+import argparse
+import asyncio
+import socket
+import struct
+import time
+
+import tornado
+import tornado.ioloop
+
+from tornado.iostream import IOStream
+
+from benchmarks import setup_runtime
+from benchmarks.bench_framing import Server
+from benchmarks.bench_framing import framed_reader
+from benchmarks.bench_framing import run as run_stream
+from benchmarks.bench_framing import stream_of
+
+from empower.main import EVENT_LOOPS
+from empower.main import EVENT_LOOP_UVLOOP
+
+# a probe request sized frame
+FRAME = struct.pack("!BBI", 0, 0x05, 60) + bytes(54)
+
+
+def new_loop(event_loop):
+    """Install a new event loop of the specified kind, as the controller
+    does on startup.
+
+    Returns False if the loop is not available.
+    """
+
+    if event_loop == EVENT_LOOP_UVLOOP:
+        try:
+            import uvloop
+        except ImportError:
+            return False
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    else:
+        asyncio.set_event_loop_policy(asyncio.DefaultEventLoopPolicy())
+
+    asyncio.set_event_loop(asyncio.new_event_loop())
+
+    return True
+
+
+def echo_reader(stream, _):
+    """Return an LVAPPConnection echoing every frame."""
+
+    from empower.lvapp.lvappconnection import LVAPPConnection
+
+    class Connection(LVAPPConnection):
+        """LVAPPConnection writing every frame back."""
+
+        def _trigger_message(self, msg_type, frame):
+            self.send_queue.write(bytes(frame))
+
+    return Connection(stream, ("127.0.0.1", 0), Server())
+
+
+def run_ping_pong(count):
+    """Return the time (in s) needed for count round trips."""
+
+    left, right = socket.socketpair()
+
+    async def main():
+
+        client = IOStream(left)
+        conn = echo_reader(IOStream(right), None)
+
+        start = time.perf_counter()
+
+        for _ in range(count):
+            await client.write(FRAME)
+            await client.read_bytes(len(FRAME))
+
+        elapsed = time.perf_counter() - start
+
+        conn.stream.close()
+        client.close()
+
+        return elapsed
+
+    return tornado.ioloop.IOLoop.current().run_sync(main)
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--frames", type=int, default=200000,
+                        help="frames of the stream workload (default: "
+                             "200000)")
+    parser.add_argument("--round-trips", type=int, default=20000,
+                        help="round trips of the ping-pong workload "
+                             "(default: 20000)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per loop, the best is kept (default: 3)")
+    args = parser.parse_args()
+
+    setup_runtime()
+
+    data = stream_of(args.frames)
+
+    print("Event loop overhead per message")
+    print("%-10s %16s %18s" % ("", "stream us/frame", "ping-pong us/rtt"))
+
+    for event_loop in EVENT_LOOPS:
+
+        if not new_loop(event_loop):
+            print("%-10s %16s %18s" % (event_loop, "n/a", "n/a"))
+            continue
+
+        stream = min(run_stream(framed_reader, data, args.frames)
+                     for _ in range(args.repeat))
+        ping_pong = min(run_ping_pong(args.round_trips)
+                        for _ in range(args.repeat))
+
+        print("%-10s %16.3f %18.3f" % (event_loop,
+                                       stream * 1e6 / args.frames,
+                                       ping_pong * 1e6 / args.round_trips))
+
+    print()
+    print("tornado %s" % tornado.version)
+
+
+if __name__ == "__main__":
+    main()
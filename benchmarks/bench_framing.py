@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""LVAPP framing throughput, per-frame reads vs the framed reader.
+
+A stream of LVAPP frames (mostly probe/auth requests and hellos, with some
+large stats responses) is written on one end of a socket pair and read on
+the other end, either by the reader LVAPPConnection used before (one read
+for the header, one for the rest of the frame, buffer rebuilt by
+concatenation) or by the current LVAPPConnection framed reader. Frames are
+counted and dropped, so only framing is measured.
+"""
+
+import argparse
+import random
+import socket
+import struct
+import time
+
+import tornado.ioloop
+
+from tornado.concurrent import Future
+from tornado.iostream import IOStream
+from tornado.iostream import StreamClosedError
+
+from benchmarks import report
+from benchmarks import setup_runtime
+
+# (size, weight) of the frames in the stream
+FRAMES = [(20, 3),     # hello
+          (60, 10),    # probe request
+          (38, 4),     # auth request
+          (115, 2),    # status lvap
+          (2734, 1)]   # wifi stats response, 300 samples
+
+
+def stream_of(count, seed=0):
+    """Return count frames as a single buffer."""
+
+    rng = random.Random(seed)
+    sizes = [size for size, weight in FRAMES for _ in range(weight)]
+    out = bytearray()
+
+    for _ in range(count):
+        size = rng.choice(sizes)
+        out += struct.pack("!BBI", 0, 0x05, size)
+        out += bytes(size - 6)
+
+    return bytes(out)
+
+
+class Server:
+    """The server attributes used by LVAPPConnection."""
+
+    def __init__(self):
+
+        from empower.core.sendqueue import DEFAULT_MAX_BYTES
+        from empower.core.sendqueue import DEFAULT_MAX_DELAY
+        from empower.core.sendqueue import DEFAULT_BUDGET
+
+        self.send_max_bytes = DEFAULT_MAX_BYTES
+        self.send_max_delay = DEFAULT_MAX_DELAY
+        self.send_budget = DEFAULT_BUDGET
+
+
+class LegacyReader:
+    """The LVAPPConnection reader replaced by the framed reader."""
+
+    def __init__(self, stream, on_frame):
+
+        from empower.lvapp import HEADER
+
+        self.header = HEADER
+        self.stream = stream
+        self.on_frame = on_frame
+        self.__buffer = b''
+        self._wait()
+
+    def _on_read(self, future):
+
+        try:
+            line = future.result()
+            self.__buffer = self.__buffer + line
+        except StreamClosedError:
+            return
+
+        hdr = self.header.parse(self.__buffer)
+
+        if len(self.__buffer) < hdr.length:
+            remaining = hdr.length - len(self.__buffer)
+            future = self.stream.read_bytes(remaining)
+            future.add_done_callback(self._on_read)
+            return
+
+        self.on_frame(hdr.type, self.__buffer)
+
+        if not self.stream.closed():
+            self._wait()
+
+    def _wait(self):
+        self.__buffer = b''
+        future = self.stream.read_bytes(6)
+        future.add_done_callback(self._on_read)
+
+
+def framed_reader(stream, on_frame):
+    """Return an LVAPPConnection reading from stream."""
+
+    from empower.lvapp.lvappconnection import LVAPPConnection
+
+    class Connection(LVAPPConnection):
+        """LVAPPConnection handing the frames to on_frame."""
+
+        def _trigger_message(self, msg_type, frame):
+            on_frame(msg_type, frame)
+
+    return Connection(stream, ("127.0.0.1", 0), Server())
+
+
+def run(reader, data, count):
+    """Return the time (in s) needed to read count frames from data."""
+
+    left, right = socket.socketpair()
+    state = {'frames': 0, 'done': None}
+
+    def on_frame(*_):
+        state['frames'] += 1
+        if state['frames'] == count:
+            state['done'].set_result(None)
+
+    async def main():
+
+        state['done'] = Future()
+        writer = IOStream(left)
+
+        start = time.perf_counter()
+        conn = reader(IOStream(right), on_frame)
+        await writer.write(data)
+        await state['done']
+        elapsed = time.perf_counter() - start
+
+        conn.stream.close()
+        writer.close()
+
+        return elapsed
+
+    return tornado.ioloop.IOLoop.current().run_sync(main)
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--frames", type=int, default=200000,
+                        help="frames per run (default: 200000)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per reader, the best is kept (default: 3)")
+    args = parser.parse_args()
+
+    setup_runtime()
+
+    data = stream_of(args.frames)
+
+    before = min(run(LegacyReader, data, args.frames)
+                 for _ in range(args.repeat))
+    after = min(run(framed_reader, data, args.frames)
+                for _ in range(args.repeat))
+
+    report("LVAPP framing, %u frames, %u bytes" % (args.frames, len(data)),
+           [("us/frame", before * 1e6 / args.frames,
+             after * 1e6 / args.frames)],
+           unit="us per frame")
+
+    print("frames/s before %.0f, after %.0f" %
+          (args.frames / before, args.frames / after))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tenant prefix and BSSID generation, string parsing vs raw bytes.
+
+The tenant prefix and the station BSSIDs are computed by the Tenant code
+used before (prefix parsed from the tenant id hex string on every call,
+BSSID built by splitting and joining address strings, memo cleared when
+full) and by the current Tenant. BSSIDs are generated for more station
+addresses than the memo holds, so that every call is a miss, and for one
+address, so that every call is a hit.
+"""
+
+import argparse
+import random
+import uuid
+
+from benchmarks import measure
+from benchmarks import report
+
+from empower.core.tenant import BSSID_CACHE_SIZE
+from empower.core.tenant import T_TYPE_UNIQUE
+from empower.core.tenant import Tenant
+from empower.datatypes.etheraddress import EtherAddress
+
+
+class LegacyTenant:
+    """The Tenant prefix and BSSID code replaced by the raw bytes one."""
+
+    def __init__(self, tenant_id):
+        self.tenant_id = tenant_id
+        self.__bssids = {}
+
+    def get_prefix(self):
+        """Return tenant prefix."""
+
+        tokens = [self.tenant_id.hex[0:12][i:i + 2] for i in range(0, 12, 2)]
+        return EtherAddress(':'.join(tokens))
+
+    def generate_bssid(self, mac):
+        """ Generate a new BSSID address. """
+
+        try:
+            return self.__bssids[mac]
+        except KeyError:
+            pass
+
+        if len(self.__bssids) >= BSSID_CACHE_SIZE:
+            self.__bssids = {}
+
+        bssid = self.__generate_bssid(mac)
+        self.__bssids[mac] = bssid
+
+        return bssid
+
+    def __generate_bssid(self, mac):
+        """ Compute the BSSID address. """
+
+        base_mac = self.get_prefix()
+
+        base = str(base_mac).split(":")[0:3]
+        unicast_addr_mask = int(base[0], 16) & 0xFE
+        base[0] = str(format(unicast_addr_mask, 'X'))
+        suffix = str(mac).split(":")[3:6]
+
+        return EtherAddress(":".join(base + suffix))
+
+
+def cycle(values):
+    """Return a function returning the values in turn, forever."""
+
+    state = {'i': 0}
+
+    def next_value():
+        value = values[state['i']]
+        state['i'] = (state['i'] + 1) % len(values)
+        return value
+
+    return next_value
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--number", type=int, default=20000,
+                        help="calls per run (default: 20000)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+
+    tenant_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+    legacy = LegacyTenant(tenant_id)
+    tenant = Tenant(tenant_id, "bench", "root", "bench", T_TYPE_UNIQUE)
+
+    # twice the memo size, so every call is a miss
+    addrs = [EtherAddress(bytes(rng.randrange(256) for _ in range(6)))
+             for _ in range(2 * BSSID_CACHE_SIZE)]
+
+    assert legacy.get_prefix() == tenant.get_prefix()
+    for addr in addrs:
+        assert legacy.generate_bssid(addr) == tenant.generate_bssid(addr)
+
+    legacy_addr = cycle(addrs)
+    tenant_addr = cycle(addrs)
+    hit = addrs[0]
+
+    rows = [("get_prefix",
+             measure(legacy.get_prefix, args.number),
+             measure(tenant.get_prefix, args.number)),
+            ("generate_bssid, memo miss",
+             measure(lambda: legacy.generate_bssid(legacy_addr()),
+                     args.number),
+             measure(lambda: tenant.generate_bssid(tenant_addr()),
+                     args.number)),
+            ("generate_bssid, memo hit",
+             measure(lambda: legacy.generate_bssid(hit), args.number),
+             measure(lambda: tenant.generate_bssid(hit), args.number))]
+
+    report("Tenant prefix and BSSID generation",
+           [(label, before * 1e6 / args.number, after * 1e6 / args.number)
+            for label, before, after in rows])
+
+
+if __name__ == "__main__":
+    main()
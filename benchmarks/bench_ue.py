@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""UE lookup by (rnti, pci, vbs), scan over the UEs vs runtime index.
+
+The runtime is populated with UEs spread over the cells of several VBSes
+(every cell uses the RNTIs from 1 up). A UE is looked up by the scan over
+all the UEs RUNTIME.find_ue_by_rnti used before and by the current
+RUNTIME.find_ue_by_rnti.
+"""
+
+import argparse
+import random
+import uuid
+
+from benchmarks import measure
+from benchmarks import report
+from benchmarks import setup_runtime
+
+from empower.core.cellpool import Cell
+from empower.core.ue import UE
+from empower.core.vbs import VBS
+from empower.datatypes.etheraddress import EtherAddress
+
+# cells per VBS
+CELLS = 10
+
+
+def setup(ues, cells, seed=0):
+    """Return the runtime with ues UEs spread over cells cells."""
+
+    runtime = setup_runtime()
+    rng = random.Random(seed)
+
+    vbses = []
+
+    for i in range((cells + CELLS - 1) // CELLS):
+
+        vbs = VBS(EtherAddress(bytes([2, 0, 0, 0, i >> 8, i & 0xFF])),
+                  "vbs%u" % i)
+
+        for pci in range(CELLS):
+            vbs.cells[pci] = Cell(vbs, pci)
+
+        runtime.vbses[vbs.addr] = vbs
+        vbses.append(vbs)
+
+    all_cells = [cell for vbs in vbses for cell in vbs.cells.values()]
+    all_cells = all_cells[0:cells]
+
+    for i in range(ues):
+
+        cell = all_cells[i % cells]
+        rnti = i // cells + 1
+
+        ue_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+        runtime.ues[ue_id] = UE(ue_id, rnti, i, i, cell, None)
+
+    return runtime
+
+
+def legacy_find(runtime, rnti, pci, vbs):
+    """The find_ue_by_rnti replaced by the (rnti, pci, vbs) index."""
+
+    for ue in runtime.ues.values():
+
+        if ue.rnti == rnti and \
+           ue.cell.pci == pci and \
+           ue.cell.vbs == vbs:
+
+            return ue
+
+    return None
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--ues", type=int, default=50000,
+                        help="UEs in the runtime (default: 50000)")
+    parser.add_argument("--cells", type=int, default=500,
+                        help="cells the UEs are spread over (default: 500)")
+    parser.add_argument("--number", type=int, default=100,
+                        help="lookups per run (default: 100)")
+    args = parser.parse_args()
+
+    runtime = setup(args.ues, args.cells)
+
+    ues = list(runtime.ues.values())
+    middle = ues[len(ues) // 2]
+    last = ues[-1]
+
+    requests = [("middle UE", (middle.rnti, middle.cell.pci,
+                               middle.cell.vbs), middle),
+                ("last UE", (last.rnti, last.cell.pci, last.cell.vbs), last),
+                ("unknown UE", (0, 0, last.cell.vbs), None)]
+
+    rows = []
+
+    for label, key, expected in requests:
+
+        assert legacy_find(runtime, *key) is expected
+        assert runtime.find_ue_by_rnti(*key) is expected
+
+        before = measure(lambda: legacy_find(runtime, *key), args.number)
+        after = measure(lambda: runtime.find_ue_by_rnti(*key), args.number)
+
+        rows.append((label,
+                     before * 1e6 / args.number,
+                     after * 1e6 / args.number))
+
+    report("UE lookup by RNTI, %u UEs, %u cells" % (args.ues, args.cells),
+           rows)
+
+
+if __name__ == "__main__":
+    main()
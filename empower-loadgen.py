@@ -0,0 +1,947 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Fake WTP fleet for LVAPP load testing.
+
+Starts a number of simulated WTPs in this process. Each WTP opens a TCP
+connection to the LVAPP server and speaks the LVAPP wire format: it sends
+hellos, answers caps, status and stats requests, acknowledges LVAP
+add/del requests and generates probe/auth/assoc storms for its stations.
+
+Every interval the tool reports the number of connected WTPs and
+associated stations, the message throughput in both directions, the
+p50/p99 response latency for each message type and, if the controller pid
+is given, the controller RSS memory.
+
+The WTPs and the stations must be known to the controller. Use --register
+to add them (and to allow the stations) through the REST API before the
+test starts. A tenant must already be defined with the SSID used by the
+stations (--ssid), otherwise probe requests are ignored.
+
+Example:
+
+    ./empower-loadgen.py --wtps 100 --stations 20 --rate 2 --ramp 10 \\
+        --ssid EmPOWER --register --pid $(pgrep -f empower-runtime.py)
+"""
+
+import sys
+import time
+import json
+import struct
+import random
+import argparse
+
+from collections import defaultdict
+
+import tornado.ioloop
+import tornado.httpclient
+
+from tornado.gen import convert_yielded
+from tornado.tcpclient import TCPClient
+from tornado.iostream import StreamClosedError
+
+from construct import Container
+
+import empower.lvapp
+
+from empower.datatypes.etheraddress import EtherAddress
+from empower.core.resourcepool import BT_L20
+from empower.lvapp import PT_VERSION
+from empower.lvapp import PT_HELLO
+from empower.lvapp import PT_PROBE_REQUEST
+from empower.lvapp import PT_PROBE_RESPONSE
+from empower.lvapp import PT_AUTH_REQUEST
+from empower.lvapp import PT_AUTH_RESPONSE
+from empower.lvapp import PT_ASSOC_REQUEST
+from empower.lvapp import PT_ASSOC_RESPONSE
+from empower.lvapp import PT_ADD_LVAP
+from empower.lvapp import PT_DEL_LVAP
+from empower.lvapp import PT_STATUS_LVAP
+from empower.lvapp import PT_CAPS_REQUEST
+from empower.lvapp import PT_CAPS_RESPONSE
+from empower.lvapp import PT_ADD_VAP
+from empower.lvapp import PT_DEL_VAP
+from empower.lvapp import PT_STATUS_VAP
+from empower.lvapp import PT_ADD_LVAP_RESPONSE
+from empower.lvapp import PT_DEL_LVAP_RESPONSE
+from empower.lvapp import PT_LVAP_STATUS_REQUEST
+from empower.lvapp import PT_VAP_STATUS_REQUEST
+from empower.lvapp import PT_SET_SLICE
+from empower.lvapp import PT_DEL_SLICE
+from empower.lvapp import PT_STATUS_SLICE
+from empower.lvapp import PT_SLICE_STATUS_REQUEST
+from empower.lvapp import CAPS_RESPONSE
+from empower.lvapp import ADD_VAP
+from empower.lvapp import STATUS_VAP
+from empower.lvapp import SET_SLICE
+from empower.lvapp import DEL_SLICE
+from empower.lvapp import STATUS_SLICE
+from empower.lvapp.codec import Codec
+from empower.lvapp.codec import SSID_FMT
+from empower.lvapp.codec import LVAP_FLAGS
+from empower.lvapp.codec import NETWORKS
+from empower.lvapp.codec import HELLO
+from empower.lvapp.codec import PROBE_REQUEST
+from empower.lvapp.codec import AUTH_REQUEST
+from empower.lvapp.codec import ASSOC_REQUEST
+from empower.lvapp.codec import STATUS_LVAP
+from empower.lvapp.codec import ADD_LVAP_RESPONSE
+from empower.lvapp.codec import DEL_LVAP_RESPONSE
+
+# stats modules message types (see the modules in empower/lvapp)
+PT_STATS_REQUEST = 0x18
+PT_STATS_RESPONSE = 0x19
+PT_UCQM_REQUEST = 0x26
+PT_UCQM_RESPONSE = 0x27
+PT_NCQM_REQUEST = 0x28
+PT_NCQM_RESPONSE = 0x29
+PT_RATES_REQUEST = 0x30
+PT_RATES_RESPONSE = 0x31
+PT_TXP_BIN_COUNTER_REQUEST = 0x35
+PT_TXP_BIN_COUNTER_RESPONSE = 0x36
+PT_WIFI_STATS_REQUEST = 0x37
+PT_WIFI_STATS_RESPONSE = 0x38
+PT_SLICE_STATS_REQUEST = 0x59
+PT_SLICE_STATS_RESPONSE = 0x60
+
+# message names, used in the reports
+PT_NAMES = {value: name[3:].lower()
+            for name, value in vars(empower.lvapp).items()
+            if name.startswith("PT_") and isinstance(value, int)}
+
+PT_NAMES.update({value: name[3:].lower()
+                 for name, value in list(globals().items())
+                 if name.startswith("PT_") and isinstance(value, int) and
+                 value not in PT_NAMES})
+
+HEADER_STRUCT = struct.Struct("!BBI")
+MODULE_ID_STRUCT = struct.Struct("!I")
+
+ADD_LVAP = Codec("add_lvap", "BBIIIHH6sBBB6s6s6s" + SSID_FMT,
+                 ("version", "type", "length", "seq", "module_id",
+                  LVAP_FLAGS, "assoc_id", "hwaddr", "channel", "band",
+                  "supported_band", "sta", "encap", "bssid", "ssid"),
+                 NETWORKS)
+
+DEL_LVAP = Codec("del_lvap", "BBIII6sBBB",
+                 ("version", "type", "length", "seq", "module_id", "sta",
+                  "csa_switch_mode", "csa_switch_count",
+                  "csa_switch_channel"))
+
+# stats responses, fixed part and entries
+STATS_RESPONSE = struct.Struct("!BBIII6s6sHH")
+POLLER_RESPONSE = struct.Struct("!BBIII6sH")
+SLICE_STATS_RESPONSE = struct.Struct("!BBIII6sIIII")
+STATS_ENTRY = struct.Struct("!HI")
+RATES_ENTRY = struct.Struct("!BHII")
+WIFI_STATS_ENTRY = struct.Struct("!BII")
+POLLER_ENTRY = struct.Struct("!6sBbIIb")
+
+# station states
+S_IDLE = "idle"
+S_PROBE = "probe"
+S_AUTH = "auth"
+S_ASSOC = "assoc"
+S_ASSOCIATED = "associated"
+S_REPROBE = "reprobe"
+
+# the states in which a station is waiting for a response
+S_WAITING = [S_PROBE, S_AUTH, S_ASSOC, S_REPROBE]
+
+# how often the stations storm scheduler runs (in ms)
+TICK = 100
+
+
+def fake_addr(prefix, index):
+    """Return a locally administered address for the fake device."""
+
+    return EtherAddress(bytes([0x02, prefix]) + struct.pack("!I", index))
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile of the sorted samples."""
+
+    if not samples:
+        return 0
+
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def controller_rss(pid):
+    """Return the resident memory of the controller process in MB."""
+
+    try:
+        with open("/proc/%u/status" % pid) as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+
+    return None
+
+
+class Metrics:
+    """Counters and latency samples shared by all the fake WTPs."""
+
+    def __init__(self):
+
+        self.started = time.time()
+        self.tx_msgs = defaultdict(int)
+        self.rx_msgs = defaultdict(int)
+        self.latencies = defaultdict(list)
+        self.totals = defaultdict(list)
+        self.timeouts = 0
+        self.errors = 0
+
+    def sent(self, msg_type):
+        """Count an outgoing message."""
+
+        self.tx_msgs[msg_type] += 1
+
+    def received(self, msg_type):
+        """Count an incoming message."""
+
+        self.rx_msgs[msg_type] += 1
+
+    def latency(self, name, value):
+        """Add a latency sample (in seconds)."""
+
+        self.latencies[name].append(value)
+        self.totals[name].append(value)
+
+    def reset(self):
+        """Reset the per-interval counters."""
+
+        self.tx_msgs.clear()
+        self.rx_msgs.clear()
+        self.latencies.clear()
+
+
+class FakeStation:
+    """A station attached to a fake WTP."""
+
+    __slots__ = ('addr', 'raw', 'state', 'since', 'start', 'bssid', 'ssid')
+
+    def __init__(self, addr):
+
+        self.addr = addr
+        self.raw = addr.to_raw()
+        self.state = S_IDLE
+        self.since = 0
+        self.start = 0
+        self.bssid = None
+        self.ssid = None
+
+
+class FakeWTP:
+    """A fake WTP speaking LVAPP.
+
+    Attributes:
+        addr: the WTP address
+        hwaddr: the address of the only resource block of the WTP
+        stations: the stations served by this WTP
+        lvaps: the LVAPs hosted by this WTP (as received with ADD_LVAP)
+        vaps: the VAPs hosted by this WTP (as received with ADD_VAP)
+        slices: the slices configured on this WTP
+    """
+
+    def __init__(self, index, options, metrics):
+
+        self.index = index
+        self.options = options
+        self.metrics = metrics
+
+        self.addr = fake_addr(0xCA, index)
+        self.raw = self.addr.to_raw()
+        self.hwaddr = fake_addr(0xCB, index).to_raw()
+        self.channel = options.channel
+        self.band = BT_L20
+
+        self.stations = \
+            [FakeStation(fake_addr(0x5A, index * options.stations + x))
+             for x in range(options.stations)]
+        self.by_raw = {sta.raw: sta for sta in self.stations}
+
+        self.lvaps = {}
+        self.vaps = {}
+        self.slices = {}
+
+        self.stream = None
+        self.online = False
+        self.credit = 0.0
+
+        self.__seq = 0
+        self.__buffer = bytearray()
+        self.__hello = None
+
+        self.handlers = {
+            PT_CAPS_REQUEST: self._handle_caps_request,
+            PT_LVAP_STATUS_REQUEST: self._handle_lvap_status_request,
+            PT_VAP_STATUS_REQUEST: self._handle_vap_status_request,
+            PT_SLICE_STATUS_REQUEST: self._handle_slice_status_request,
+            PT_ADD_LVAP: self._handle_add_lvap,
+            PT_DEL_LVAP: self._handle_del_lvap,
+            PT_ADD_VAP: self._handle_add_vap,
+            PT_DEL_VAP: self._handle_del_vap,
+            PT_SET_SLICE: self._handle_set_slice,
+            PT_DEL_SLICE: self._handle_del_slice,
+            PT_PROBE_RESPONSE: self._handle_probe_response,
+            PT_AUTH_RESPONSE: self._handle_auth_response,
+            PT_ASSOC_RESPONSE: self._handle_assoc_response,
+            PT_STATS_REQUEST: self._handle_stats_request,
+            PT_RATES_REQUEST: self._handle_rates_request,
+            PT_WIFI_STATS_REQUEST: self._handle_wifi_stats_request,
+            PT_UCQM_REQUEST: self._handle_poller_request,
+            PT_NCQM_REQUEST: self._handle_poller_request,
+            PT_TXP_BIN_COUNTER_REQUEST: self._handle_txp_bin_counter_request,
+            PT_SLICE_STATS_REQUEST: self._handle_slice_stats_request,
+        }
+
+    @property
+    def seq(self):
+        """Return new sequence id."""
+
+        self.__seq += 1
+        return self.__seq
+
+    @property
+    def connected(self):
+        """Return True if the WTP is connected."""
+
+        return self.stream is not None and not self.stream.closed()
+
+    def connect(self):
+        """Connect to the LVAPP server."""
+
+        future = convert_yielded(TCPClient().connect(self.options.host,
+                                                     self.options.port))
+        future.add_done_callback(self._on_connect)
+
+    def _on_connect(self, future):
+
+        try:
+            self.stream = future.result()
+        except (OSError, StreamClosedError) as ex:
+            self.metrics.errors += 1
+            print("WTP %s unable to connect: %s" % (self.addr, ex))
+            return
+
+        self.stream.set_nodelay(True)
+        self.stream.set_close_callback(self._on_disconnect)
+
+        self.__hello = \
+            tornado.ioloop.PeriodicCallback(self.send_hello,
+                                            self.options.period)
+        self.__hello.start()
+
+        self.send_hello()
+        self._wait()
+
+    def _on_disconnect(self):
+
+        if self.__hello:
+            self.__hello.stop()
+
+        self.online = False
+        self.lvaps = {}
+
+        for sta in self.stations:
+            sta.state = S_IDLE
+
+    def _wait(self):
+
+        future = self.stream.read_bytes(65536, partial=True)
+        future.add_done_callback(self._on_read)
+
+    def _on_read(self, future):
+
+        try:
+            self.__buffer += future.result()
+        except StreamClosedError:
+            return
+
+        buffer = self.__buffer
+        offset = 0
+
+        while len(buffer) - offset >= HEADER_STRUCT.size:
+
+            _, msg_type, length = HEADER_STRUCT.unpack_from(buffer, offset)
+
+            if len(buffer) - offset < length:
+                break
+
+            frame = bytes(buffer[offset:offset + length])
+            offset += length
+
+            self.metrics.received(msg_type)
+
+            if msg_type in self.handlers:
+                self.handlers[msg_type](frame)
+
+        del buffer[:offset]
+
+        if not self.stream.closed():
+            self._wait()
+
+    def send(self, msg_type, data):
+        """Send a frame."""
+
+        if not self.connected:
+            return
+
+        self.metrics.sent(msg_type)
+        self.stream.write(data)
+
+    def send_hello(self):
+        """Send a HELLO message."""
+
+        self.send(PT_HELLO,
+                  HELLO.struct.pack(PT_VERSION, PT_HELLO, HELLO.sizeof(),
+                                    self.seq, self.raw, self.options.period))
+
+    def send_probe_request(self, sta):
+        """Send a PROBE_REQUEST message."""
+
+        ssid = self.options.ssid.encode('UTF-8') if sta.state == S_IDLE \
+            else sta.ssid
+
+        sta.state = S_PROBE if sta.state == S_IDLE else S_REPROBE
+        sta.since = time.time()
+
+        if sta.state == S_PROBE:
+            sta.start = sta.since
+
+        self.send(PT_PROBE_REQUEST,
+                  PROBE_REQUEST.struct.pack(PT_VERSION, PT_PROBE_REQUEST,
+                                            PROBE_REQUEST.sizeof(), self.seq,
+                                            self.raw, sta.raw, self.hwaddr,
+                                            self.channel, self.band,
+                                            self.band, ssid))
+
+    def send_auth_request(self, sta):
+        """Send an AUTH_REQUEST message."""
+
+        sta.state = S_AUTH
+        sta.since = time.time()
+
+        self.send(PT_AUTH_REQUEST,
+                  AUTH_REQUEST.struct.pack(PT_VERSION, PT_AUTH_REQUEST,
+                                           AUTH_REQUEST.sizeof(), self.seq,
+                                           self.raw, sta.raw, sta.bssid))
+
+    def send_assoc_request(self, sta):
+        """Send an ASSOC_REQUEST message."""
+
+        sta.state = S_ASSOC
+        sta.since = time.time()
+
+        self.send(PT_ASSOC_REQUEST,
+                  ASSOC_REQUEST.struct.pack(PT_VERSION, PT_ASSOC_REQUEST,
+                                            ASSOC_REQUEST.sizeof(), self.seq,
+                                            self.raw, sta.raw, sta.bssid,
+                                            self.hwaddr, self.channel,
+                                            self.band, self.band, sta.ssid))
+
+    def storm(self, now):
+        """Generate the probe/auth/assoc requests for this tick."""
+
+        self.credit += self.options.rate * TICK / 1000
+
+        while self.credit >= 1:
+
+            self.credit -= 1
+
+            sta = random.choice(self.stations)
+
+            if sta.state in S_WAITING:
+                if now - sta.since < self.options.timeout:
+                    continue
+                self.metrics.timeouts += 1
+                sta.state = S_IDLE
+
+            if sta.state == S_IDLE or self.options.reprobe:
+                self.send_probe_request(sta)
+
+    def _handle_caps_request(self, _):
+
+        msg = Container(version=PT_VERSION,
+                        type=PT_CAPS_RESPONSE,
+                        length=0,
+                        seq=self.seq,
+                        wtp=self.raw,
+                        dpid=b'\x00\x00' + self.raw,
+                        nb_resources_elements=1,
+                        nb_ports_elements=1,
+                        blocks=[[self.hwaddr, self.channel, self.band]],
+                        ports=[[self.hwaddr, 1, b'empower0\0\0']])
+
+        msg.length = len(CAPS_RESPONSE.build(msg))
+
+        self.send(PT_CAPS_RESPONSE, CAPS_RESPONSE.build(msg))
+
+    def _handle_lvap_status_request(self, _):
+
+        self.online = True
+
+        for lvap in self.lvaps.values():
+            self.send_status_lvap(lvap)
+
+    def send_status_lvap(self, lvap):
+        """Send a STATUS_LVAP message."""
+
+        length = STATUS_LVAP.sizeof() + \
+            NETWORKS.struct.size * len(lvap.networks)
+
+        msg = STATUS_LVAP.record(PT_VERSION, PT_STATUS_LVAP, length, self.seq,
+                                 lvap.flags, lvap.assoc_id, self.raw,
+                                 lvap.sta, lvap.encap, lvap.hwaddr,
+                                 lvap.channel, lvap.band,
+                                 lvap.supported_band, lvap.bssid, lvap.ssid,
+                                 lvap.networks)
+
+        self.send(PT_STATUS_LVAP, STATUS_LVAP.build(msg))
+
+    def _handle_vap_status_request(self, _):
+
+        for vap in self.vaps.values():
+
+            msg = Container(version=PT_VERSION,
+                            type=PT_STATUS_VAP,
+                            length=STATUS_VAP.sizeof(),
+                            seq=self.seq,
+                            wtp=self.raw,
+                            hwaddr=vap.hwaddr,
+                            channel=vap.channel,
+                            band=vap.band,
+                            bssid=vap.bssid,
+                            ssid=vap.ssid)
+
+            self.send(PT_STATUS_VAP, STATUS_VAP.build(msg))
+
+    def _handle_slice_status_request(self, _):
+
+        for slc in self.slices.values():
+
+            msg = Container(version=PT_VERSION,
+                            type=PT_STATUS_SLICE,
+                            length=STATUS_SLICE.sizeof(),
+                            seq=self.seq,
+                            wtp=self.raw,
+                            flags=slc.flags,
+                            hwaddr=slc.hwaddr,
+                            channel=slc.channel,
+                            band=slc.band,
+                            quantum=slc.quantum,
+                            scheduler=slc.scheduler,
+                            dscp=slc.dscp,
+                            ssid=slc.ssid)
+
+            self.send(PT_STATUS_SLICE, STATUS_SLICE.build(msg))
+
+    def _handle_add_lvap(self, frame):
+
+        lvap = ADD_LVAP.parse(frame)
+        self.lvaps[lvap.sta] = lvap
+
+        self.send(PT_ADD_LVAP_RESPONSE,
+                  ADD_LVAP_RESPONSE.struct.pack(PT_VERSION,
+                                                PT_ADD_LVAP_RESPONSE,
+                                                ADD_LVAP_RESPONSE.sizeof(),
+                                                self.seq, self.raw, lvap.sta,
+                                                lvap.module_id, 0))
+
+    def _handle_del_lvap(self, frame):
+
+        msg = DEL_LVAP.parse(frame)
+        self.lvaps.pop(msg.sta, None)
+
+        self.send(PT_DEL_LVAP_RESPONSE,
+                  DEL_LVAP_RESPONSE.struct.pack(PT_VERSION,
+                                                PT_DEL_LVAP_RESPONSE,
+                                                DEL_LVAP_RESPONSE.sizeof(),
+                                                self.seq, self.raw, msg.sta,
+                                                msg.module_id, 0))
+
+    def _handle_add_vap(self, frame):
+
+        vap = ADD_VAP.parse(frame)
+        self.vaps[vap.bssid] = vap
+
+    def _handle_del_vap(self, frame):
+
+        self.vaps.pop(frame[10:16], None)
+
+    def _handle_set_slice(self, frame):
+
+        slc = SET_SLICE.parse(frame)
+        self.slices[(slc.hwaddr, slc.ssid, slc.dscp)] = slc
+
+    def _handle_del_slice(self, frame):
+
+        slc = DEL_SLICE.parse(frame)
+        self.slices.pop((slc.hwaddr, slc.ssid, slc.dscp), None)
+
+    def _handle_probe_response(self, frame):
+
+        sta = self.by_raw.get(frame[10:16])
+
+        if not sta or sta.state not in (S_PROBE, S_REPROBE):
+            return
+
+        now = time.time()
+        self.metrics.latency("probe", now - sta.since)
+
+        if sta.state == S_REPROBE:
+            sta.state = S_ASSOCIATED
+            return
+
+        lvap = self.lvaps.get(sta.raw)
+
+        if not lvap or not lvap.networks:
+            sta.state = S_IDLE
+            return
+
+        ssid = self.options.ssid.encode('UTF-8')
+
+        match = [net for net in lvap.networks
+                 if net.ssid.rstrip(b'\0') == ssid]
+
+        network = match[0] if match else lvap.networks[0]
+
+        sta.bssid = network.bssid
+        sta.ssid = network.ssid
+
+        self.send_auth_request(sta)
+
+    def _handle_auth_response(self, frame):
+
+        sta = self.by_raw.get(frame[10:16])
+
+        if not sta or sta.state != S_AUTH:
+            return
+
+        self.metrics.latency("auth", time.time() - sta.since)
+        self.send_assoc_request(sta)
+
+    def _handle_assoc_response(self, frame):
+
+        sta = self.by_raw.get(frame[10:16])
+
+        if not sta or sta.state != S_ASSOC:
+            return
+
+        now = time.time()
+
+        self.metrics.latency("assoc", now - sta.since)
+        self.metrics.latency("handshake", now - sta.start)
+
+        sta.state = S_ASSOCIATED
+
+    def _handle_stats_request(self, frame):
+
+        module_id, = MODULE_ID_STRUCT.unpack_from(frame, 10)
+        sta = frame[14:20]
+
+        entries = [(64, 10), (1500, 100), (64, 20), (1500, 200)]
+
+        data = STATS_RESPONSE.pack(PT_VERSION, PT_STATS_RESPONSE,
+                                   STATS_RESPONSE.size +
+                                   STATS_ENTRY.size * len(entries),
+                                   self.seq, module_id, self.raw, sta, 2, 2)
+
+        data += b''.join(STATS_ENTRY.pack(*entry) for entry in entries)
+
+        self.send(PT_STATS_RESPONSE, data)
+
+    def _handle_rates_request(self, frame):
+
+        module_id, = MODULE_ID_STRUCT.unpack_from(frame, 10)
+
+        entries = [(rate, 0, 9000, 9000) for rate in (12, 24, 48, 108)]
+
+        self.send_poller_response(PT_RATES_RESPONSE, module_id, RATES_ENTRY,
+                                  entries)
+
+    def _handle_wifi_stats_request(self, frame):
+
+        module_id, = MODULE_ID_STRUCT.unpack_from(frame, 10)
+
+        # tx, rx and ed samples, 100 each
+        now = int(time.time() * 1000) & 0xFFFFFFFF
+        entries = [(0, (now + x) & 0xFFFFFFFF, 90) for x in range(300)]
+
+        self.send_poller_response(PT_WIFI_STATS_RESPONSE, module_id,
+                                  WIFI_STATS_ENTRY, entries)
+
+    def _handle_poller_request(self, frame):
+
+        _, msg_type, _ = HEADER_STRUCT.unpack_from(frame, 0)
+        module_id, = MODULE_ID_STRUCT.unpack_from(frame, 10)
+
+        entries = [(sta.raw, 1, -60, 10, 100, -60)
+                   for sta in self.stations[:16]]
+
+        self.send_poller_response(msg_type + 1, module_id, POLLER_ENTRY,
+                                  entries)
+
+    def _handle_txp_bin_counter_request(self, frame):
+
+        module_id, = MODULE_ID_STRUCT.unpack_from(frame, 10)
+
+        entries = [(64, 10), (1500, 100)]
+
+        self.send_poller_response(PT_TXP_BIN_COUNTER_RESPONSE, module_id,
+                                  STATS_ENTRY, entries)
+
+    def _handle_slice_stats_request(self, frame):
+
+        module_id, = MODULE_ID_STRUCT.unpack_from(frame, 10)
+
+        data = SLICE_STATS_RESPONSE.pack(PT_VERSION, PT_SLICE_STATS_RESPONSE,
+                                         SLICE_STATS_RESPONSE.size, self.seq,
+                                         module_id, self.raw, 0, 0, 100,
+                                         150000)
+
+        self.send(PT_SLICE_STATS_RESPONSE, data)
+
+    def send_poller_response(self, msg_type, module_id, entry, entries):
+        """Send a response made of a fixed part and a list of entries."""
+
+        data = POLLER_RESPONSE.pack(PT_VERSION, msg_type,
+                                    POLLER_RESPONSE.size +
+                                    entry.size * len(entries),
+                                    self.seq, module_id, self.raw,
+                                    len(entries))
+
+        data += b''.join(entry.pack(*x) for x in entries)
+
+        self.send(msg_type, data)
+
+
+class LoadGenerator:
+    """Starts the fake WTPs, drives the storms and prints the reports."""
+
+    def __init__(self, options):
+
+        self.options = options
+        self.metrics = Metrics()
+        self.wtps = [FakeWTP(x, options, self.metrics)
+                     for x in range(options.wtps)]
+        self.started = 0
+        self.last = 0
+        self.ioloop = tornado.ioloop.IOLoop.instance()
+
+    def register(self):
+        """Register WTPs and stations through the REST API."""
+
+        client = tornado.httpclient.AsyncHTTPClient()
+
+        requests = []
+
+        for wtp in self.wtps:
+
+            requests.append(("/api/v1/wtps",
+                             {"version": 1.0,
+                              "addr": str(wtp.addr),
+                              "label": "fake-%u" % wtp.index}))
+
+            for sta in wtp.stations:
+                requests.append(("/api/v1/allow",
+                                 {"version": 1.0,
+                                  "sta": str(sta.addr)}))
+
+        pending = [len(requests)]
+
+        def done(future):
+            try:
+                future.result()
+            except tornado.httpclient.HTTPError:
+                # most likely the device has already been registered
+                self.metrics.errors += 1
+            pending[0] -= 1
+            if not pending[0]:
+                print("Registered %u WTPs (%u errors)" %
+                      (len(self.wtps), self.metrics.errors))
+                self.metrics.errors = 0
+                self.start()
+
+        for uri, body in requests:
+            future = client.fetch(self.options.rest + uri,
+                                  method="POST",
+                                  body=json.dumps(body),
+                                  auth_username=self.options.user,
+                                  auth_password=self.options.password)
+            future.add_done_callback(done)
+
+    def start(self):
+        """Connect the WTPs and start the storms."""
+
+        self.started = time.time()
+        self.last = self.started
+        self.metrics.reset()
+
+        tornado.ioloop.PeriodicCallback(self.tick, TICK).start()
+        tornado.ioloop.PeriodicCallback(self.report,
+                                        self.options.interval * 1000).start()
+
+        if self.options.duration:
+            self.ioloop.call_later(self.options.duration, self.stop)
+
+        self.connect(0)
+
+    def connect(self, index):
+        """Connect the WTPs, ramping up if requested."""
+
+        if not self.options.ramp:
+            for wtp in self.wtps:
+                wtp.connect()
+            return
+
+        for wtp in self.wtps[index:index + self.options.ramp]:
+            wtp.connect()
+
+        if index + self.options.ramp < len(self.wtps):
+            self.ioloop.call_later(1, self.connect, index + self.options.ramp)
+
+    def tick(self):
+        """Run the storms."""
+
+        now = time.time()
+
+        for wtp in self.wtps:
+            if wtp.online and wtp.connected:
+                wtp.storm(now)
+
+    def report(self):
+        """Print a report line."""
+
+        now = time.time()
+        delta = now - self.last
+        self.last = now
+
+        online = len([wtp for wtp in self.wtps if wtp.online])
+        associated = len([sta for wtp in self.wtps for sta in wtp.stations
+                          if sta.state in (S_ASSOCIATED, S_REPROBE)])
+
+        tx_rate = sum(self.metrics.tx_msgs.values()) / delta
+        rx_rate = sum(self.metrics.rx_msgs.values()) / delta
+
+        rss = controller_rss(self.options.pid) if self.options.pid else None
+
+        line = "%6.1fs wtps %u stas %u tx %.0f/s rx %.0f/s" % \
+            (now - self.started, online, associated, tx_rate, rx_rate)
+
+        if rss is not None:
+            line += " rss %.1fMB" % rss
+
+        for name in sorted(self.metrics.latencies):
+            samples = sorted(self.metrics.latencies[name])
+            line += " | %s p50 %.1fms p99 %.1fms" % \
+                (name, percentile(samples, 50) * 1000,
+                 percentile(samples, 99) * 1000)
+
+        print(line)
+
+        if self.options.verbose:
+            for msg_type, count in sorted(self.metrics.rx_msgs.items()):
+                print("    rx %-36s %.1f/s" %
+                      (PT_NAMES.get(msg_type, hex(msg_type)), count / delta))
+            for msg_type, count in sorted(self.metrics.tx_msgs.items()):
+                print("    tx %-36s %.1f/s" %
+                      (PT_NAMES.get(msg_type, hex(msg_type)), count / delta))
+
+        sys.stdout.flush()
+        self.metrics.reset()
+
+    def stop(self):
+        """Print the summary and stop."""
+
+        self.report()
+
+        print("Summary after %.1fs (%u timeouts, %u errors)" %
+              (time.time() - self.started, self.metrics.timeouts,
+               self.metrics.errors))
+
+        for name in sorted(self.metrics.totals):
+            samples = sorted(self.metrics.totals[name])
+            print("    %-10s n %7u p50 %7.1fms p99 %7.1fms max %7.1fms" %
+                  (name, len(samples), percentile(samples, 50) * 1000,
+                   percentile(samples, 99) * 1000, samples[-1] * 1000))
+
+        self.ioloop.stop()
+
+    def run(self):
+        """Start the IOLoop."""
+
+        if self.options.register:
+            self.ioloop.add_callback(self.register)
+        else:
+            self.ioloop.add_callback(self.start)
+
+        self.ioloop.start()
+
+
+def main():
+    """Parse the command line and start the load generator."""
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="LVAPP server address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=4433,
+                        help="LVAPP server port (default: 4433)")
+    parser.add_argument("--wtps", type=int, default=10,
+                        help="number of fake WTPs (default: 10)")
+    parser.add_argument("--stations", type=int, default=10,
+                        help="number of stations per WTP (default: 10)")
+    parser.add_argument("--ssid", default="EmPOWER",
+                        help="SSID requested by the stations")
+    parser.add_argument("--channel", type=int, default=36,
+                        help="channel of the fake WTPs (default: 36)")
+    parser.add_argument("--period", type=int, default=2000,
+                        help="hello period in ms (default: 2000)")
+    parser.add_argument("--rate", type=float, default=1.0,
+                        help="probe requests per second per WTP")
+    parser.add_argument("--reprobe", action="store_true",
+                        help="associated stations keep sending probes")
+    parser.add_argument("--timeout", type=float, default=5.0,
+                        help="handshake timeout in seconds (default: 5)")
+    parser.add_argument("--ramp", type=int, default=0,
+                        help="WTPs connected per second (default: all)")
+    parser.add_argument("--duration", type=float, default=0,
+                        help="test duration in seconds (default: forever)")
+    parser.add_argument("--interval", type=float, default=5.0,
+                        help="report interval in seconds (default: 5)")
+    parser.add_argument("--pid", type=int, default=0,
+                        help="controller pid, used to report its RSS")
+    parser.add_argument("--register", action="store_true",
+                        help="register WTPs and stations using REST")
+    parser.add_argument("--rest", default="http://127.0.0.1:8888",
+                        help="REST server URL")
+    parser.add_argument("--user", default="root", help="REST username")
+    parser.add_argument("--password", default="root", help="REST password")
+    parser.add_argument("--verbose", action="store_true",
+                        help="report the rate of every message type")
+
+    options = parser.parse_args()
+
+    LoadGenerator(options).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -17,9 +17,9 @@
 
 """EmPOWER base app class."""
 
-import tornado.ioloop
 import empower.logger
 
+from empower.core.module import SCHEDULER
 from empower.core.resourcepool import ResourcePool
 from empower.core.cellpool import CellPool
 from empower.lvapp.lvappserver import LVAPPServer
@@ -155,14 +155,12 @@ class EmpowerApp:
     def start(self):
         """Start control loop."""
 
-        self.worker = \
-            tornado.ioloop.PeriodicCallback(self.loop, self.every)
-        self.worker.start()
+        self.worker = SCHEDULER.add(self.loop, self.every)
 
     def stop(self):
         """Stop control loop."""
 
-        self.worker.stop()
+        SCHEDULER.cancel(self.worker)
 
     def loop(self):
         """Control loop."""
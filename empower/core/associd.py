@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Association id allocator."""
+
+from collections import deque
+
+import empower.logger
+
+# valid association ids (802.11-2012, 8.4.1.8)
+MIN_ASSOC_ID = 1
+MAX_ASSOC_ID = 2007
+
+
+class AssocIdPool:
+    """A pool of association ids.
+
+    Free ids are kept in a FIFO, so that a released id is reused as late as
+    possible. Ids can also be marked as used without being allocated, e.g.
+    when a WTP reports an LVAP after a controller restart. The FIFO is not
+    updated in this case, the stale entry is skipped when it reaches the
+    head of the queue. Several LVAPs may report the same id, so used ids are
+    reference counted and an id is only freed when its last user releases
+    it. Ids outside of the pool range are logged and ignored.
+
+    The runtime uses a single pool. An LVAP keeps its association id when it
+    is moved to another WTP, so per-WTP pools would hand out the id of an
+    LVAP that is later moved in. When the pool is exhausted the runtime does
+    not spawn new LVAPs until an id is released.
+
+    Attributes:
+        first: the first association id of the pool
+        last: the last association id of the pool
+        free: the free association ids (may contain ids in used)
+        used: the association ids currently in use and their users
+    """
+
+    def __init__(self, first=MIN_ASSOC_ID, last=MAX_ASSOC_ID):
+
+        self.first = first
+        self.last = last
+        self.free = deque(range(first, last + 1))
+        self.used = {}
+        self.log = empower.logger.get_logger()
+
+    def __valid(self, assoc_id):
+        """Return True if assoc_id is within the pool range."""
+
+        if self.first <= assoc_id <= self.last:
+            return True
+
+        self.log.warning("Invalid association id %s", assoc_id)
+
+        return False
+
+    def allocate(self):
+        """Return an unused association id."""
+
+        while self.free:
+
+            assoc_id = self.free.popleft()
+
+            if assoc_id not in self.used:
+                self.used[assoc_id] = 1
+                return assoc_id
+
+        raise ValueError("No association ids available")
+
+    def reserve(self, assoc_id):
+        """Mark an association id as used."""
+
+        if not self.__valid(assoc_id):
+            return
+
+        self.used[assoc_id] = self.used.get(assoc_id, 0) + 1
+
+    def release(self, assoc_id):
+        """Return an association id to the pool after its last user."""
+
+        if not self.__valid(assoc_id) or assoc_id not in self.used:
+            return
+
+        self.used[assoc_id] -= 1
+
+        if self.used[assoc_id]:
+            return
+
+        del self.used[assoc_id]
+        self.free.append(assoc_id)
+
+    def to_dict(self):
+        """Return a JSON-serializable dictionary."""
+
+        return {'used': len(self.used)}
@@ -17,8 +17,6 @@
 
 """EmPOWER Runtime."""
 
-from random import randint
-
 import pkgutil
 import socket
 import fcntl
@@ -42,8 +40,16 @@ from empower.core.account import ROLE_ADMIN
 from empower.core.account import ROLE_USER
 from empower.core.tenant import Tenant
 from empower.core.acl import ACL
+from empower.core.associd import AssocIdPool
+from empower.core.journal import Journal
+from empower.core.journal import J_LVAP
+from empower.core.journal import J_UE
+from empower.core.journal import J_REMOVED
+from empower.core.journal import J_LEFT
+from empower.core.eventbus import EventBus
 from empower.persistence.persistence import TblAllow
 from empower.core.tenant import T_TYPES
+from empower.core.tenant import T_TYPE_SHARED
 
 import empower.logger
 import empower.apps
@@ -96,13 +102,24 @@ class EmpowerRuntime:
         self.components = {}
         self.accounts = {}
         self.tenants = {}
+        self.tenants_by_ssid = {}
+        self.tenants_by_plmn_id = {}
+        self.tenants_by_bssid = {}
+        self.tenants_by_prefix = {}
+        self.tenants_version = 0
+        self.__wtp_tenants = {}
+        self.__wtp_tenants_version = 0
         self.lvaps = {}
+        self.assoc_ids = AssocIdPool()
         self.ues = {}
+        self.ues_by_rnti = {}
         self.wtps = {}
         self.cpps = {}
         self.vbses = {}
         self.datapaths = {}
         self.allowed = {}
+        self.events = EventBus()
+        self.journal = Journal()
         self.log = empower.logger.get_logger()
 
         self.log.info("Starting EmPOWER Runtime")
@@ -182,6 +199,58 @@ class EmpowerRuntime:
                        tenant.bssid_type,
                        tenant.plmn_id)
 
+            self.__index_tenant(self.tenants[tenant.tenant_id])
+
+    def __index_tenant(self, tenant):
+        """Add tenant to the SSID and PLMN ID indexes.
+
+        If several tenants share an SSID (or a PLMN ID) the index keeps the
+        first one, like the linear scan over the tenants did.
+        """
+
+        self.tenants_by_ssid.setdefault(tenant.tenant_name, tenant)
+
+        if tenant.plmn_id:
+            self.tenants_by_plmn_id.setdefault(tenant.plmn_id, tenant)
+
+        if tenant.bssid_type != T_TYPE_SHARED:
+            tenants = self.tenants_by_prefix.setdefault(tenant.bssid_prefix,
+                                                        [])
+            tenants.append(tenant)
+
+        self.tenants_version += 1
+
+    def __unindex_tenant(self, tenant):
+        """Remove tenant from the SSID and PLMN ID indexes."""
+
+        if self.tenants_by_ssid.get(tenant.tenant_name) is tenant:
+            del self.tenants_by_ssid[tenant.tenant_name]
+            # fall back to the next tenant with the same SSID, if any
+            for other in self.tenants.values():
+                if other.tenant_name == tenant.tenant_name:
+                    self.tenants_by_ssid[other.tenant_name] = other
+                    break
+
+        if self.tenants_by_plmn_id.get(tenant.plmn_id) is tenant:
+            del self.tenants_by_plmn_id[tenant.plmn_id]
+            for other in self.tenants.values():
+                if other.plmn_id == tenant.plmn_id:
+                    self.tenants_by_plmn_id[other.plmn_id] = other
+                    break
+
+        tenants = self.tenants_by_prefix.get(tenant.bssid_prefix, [])
+
+        if tenant in tenants:
+            tenants.remove(tenant)
+            if not tenants:
+                del self.tenants_by_prefix[tenant.bssid_prefix]
+
+        for bssid in list(tenant.vaps):
+            if self.tenants_by_bssid.get(bssid) is tenant:
+                del self.tenants_by_bssid[bssid]
+
+        self.tenants_version += 1
+
     def __load_acl(self):
         """ Load ACL list. """
 
@@ -394,6 +463,7 @@ class EmpowerRuntime:
         self.log.info("Registering '%s'", name)
 
         self.tenants[tenant_id].components[name] = init_method(**params)
+        self.events.add_app(self.tenants[tenant_id].components[name])
 
         if hasattr(self.tenants[tenant_id].components[name], "start"):
             self.tenants[tenant_id].components[name].start()
@@ -432,6 +502,18 @@ class EmpowerRuntime:
 
         app.stop()
 
+        self.events.remove_app(app)
+
+        # drop the module callbacks of the app
+        for component in list(self.components.values()):
+
+            if not hasattr(component, 'modules'):
+                continue
+
+            for module in list(component.modules.values()):
+                if module.tenant_id == tenant_id:
+                    module.unsubscribe_app(app)
+
         del tenant.components[app_id]
 
     def unregister(self, name):
@@ -478,9 +560,7 @@ class EmpowerRuntime:
         if tenant_id in self.tenants:
             raise ValueError("Tenant %s exists" % tenant_id)
 
-        plmn_ids = [tenant.plmn_id for tenant in self.tenants.values()]
-
-        if plmn_id and plmn_id in plmn_ids:
+        if plmn_id and plmn_id in self.tenants_by_plmn_id:
             raise ValueError("PLMN ID %s exists" % plmn_id)
 
         if bssid_type not in T_TYPES:
@@ -513,6 +593,8 @@ class EmpowerRuntime:
                    request.bssid_type,
                    request.plmn_id)
 
+        self.__index_tenant(self.tenants[request.tenant_id])
+
         # create default queue
         dscp = DSCP()
         descriptor = {}
@@ -537,8 +619,14 @@ class EmpowerRuntime:
         for lvap_addr in list(tenant.lvaps):
             self.remove_lvap(lvap_addr)
 
+        # remove vaps in this tenant
+        for bssid in list(tenant.vaps):
+            tenant.remove_vap(bssid)
+
         # remove tenant
         del self.tenants[tenant_id]
+        self.__unindex_tenant(tenant)
+        self.events.remove_tenant(tenant_id)
 
         tenant = Session().query(TblTenant) \
                           .filter(TblTenant.tenant_id == tenant_id) \
@@ -566,21 +654,68 @@ class EmpowerRuntime:
     def load_tenant(self, tenant_name):
         """Load tenant from network name (SSID)."""
 
-        for tenant in self.tenants.values():
-            if tenant.tenant_name == tenant_name:
-                return tenant
+        return self.tenants_by_ssid.get(tenant_name)
 
-        return None
+    def load_tenant_by_bssid(self, bssid, sta, ssid=None):
+        """Load tenant from a BSSID requested by a station.
 
-    def load_tenant_by_plmn_id(self, plmn_id):
-        """Load tenant from network name."""
+        Unique BSSIDs are looked up by prefix (the first three bytes are
+        derived from the tenant id, the last three from the station address),
+        shared BSSIDs are looked up in the VAPs index. Tenants with the same
+        prefix generate the same BSSIDs, if ssid is specified only a tenant
+        offering that SSID on the BSSID is returned.
+        """
 
-        for tenant in self.tenants.values():
-            if tenant.plmn_id == plmn_id:
+        for tenant in self.tenants_by_prefix.get(bssid.to_raw()[0:3], []):
+
+            if tenant.generate_bssid(sta) != bssid:
+                continue
+
+            if ssid is None or tenant.tenant_name == ssid:
                 return tenant
 
+        tenant = self.tenants_by_bssid.get(bssid)
+
+        if tenant and (ssid is None or tenant.vaps[bssid].ssid == ssid):
+            return tenant
+
         return None
 
+    def unique_tenants(self, wtp_addr):
+        """Return the unique BSSID tenants available at the WTP.
+
+        The list is computed once per WTP and reused until a tenant is added
+        or removed (see tenants_version) or the WTP is added or removed (see
+        invalidate_unique_tenants).
+        """
+
+        if self.__wtp_tenants_version != self.tenants_version:
+            self.__wtp_tenants = {}
+            self.__wtp_tenants_version = self.tenants_version
+
+        try:
+            return self.__wtp_tenants[wtp_addr]
+        except KeyError:
+            pass
+
+        tenants = [tenant for tenant in self.tenants.values()
+                   if tenant.bssid_type != T_TYPE_SHARED and
+                   wtp_addr in tenant.wtps]
+
+        self.__wtp_tenants[wtp_addr] = tenants
+
+        return tenants
+
+    def invalidate_unique_tenants(self, wtp_addr):
+        """Drop the unique BSSID tenants cached for the WTP."""
+
+        self.__wtp_tenants.pop(wtp_addr, None)
+
+    def load_tenant_by_plmn_id(self, plmn_id):
+        """Load tenant from PLMN ID."""
+
+        return self.tenants_by_plmn_id.get(plmn_id)
+
     def remove_lvap(self, lvap_addr):
         """Remove LVAP from the network"""
 
@@ -607,6 +742,8 @@ class EmpowerRuntime:
         lvap.clear_blocks()
 
         del self.lvaps[lvap.addr]
+        self.assoc_ids.release(lvap.assoc_id)
+        self.journal.record(J_LVAP, lvap.addr, J_REMOVED)
 
     def remove_ue(self, ue_id):
         """Remove UE from the network"""
@@ -629,24 +766,25 @@ class EmpowerRuntime:
             vbsp_server = self.components[VBSPServer.__module__]
             vbsp_server.send_ue_leave_message_to_self(ue)
 
+        ue._set_cell(None)
+
         del self.ues[ue.ue_id]
+        self.journal.record(J_UE, ue.ue_id, J_LEFT)
 
     def find_ue_by_rnti(self, rnti, pci, vbs):
         """Find a UE using the tuple rnti, pci, vbs."""
 
-        for ue in self.ues.values():
-
-            if ue.rnti == rnti and \
-               ue.cell.pci == pci and \
-               ue.cell.vbs == vbs:
-
-                return ue
-
-        return None
+        return self.ues_by_rnti.get((rnti, pci, vbs))
 
     def assoc_id(self):
-        """Generate new assoc id."""
+        """Generate new assoc id.
 
-        assoc_id = randint(1, 2007)
+        Returns None if all the association ids are in use.
+        """
 
-        return assoc_id
+        try:
+            return self.assoc_ids.allocate()
+        except ValueError:
+            self.log.warning("No association ids available (%u in use)",
+                             len(self.assoc_ids.used))
+            return None
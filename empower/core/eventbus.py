@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Runtime events delivery to the tenant apps.
+
+Events are named after the EmpowerApp hooks (e.g. lvap_join). An app
+receives an event only if its class overrides the hook or if it subscribed
+a handler for the event. The handlers are grouped by tenant, so that
+events concerning an LVAP, a UE or an LVNF are delivered only to the apps
+of the tenant it belongs to, while device events (e.g. wtp_up) are
+delivered to the apps of every tenant.
+"""
+
+import empower.logger
+
+EVENTS = ["ue_leave", "ue_join", "lvnf_leave", "lvnf_join", "lvap_leave",
+          "lvap_join", "lvap_handover", "vbs_down", "vbs_up", "cpp_down",
+          "cpp_up", "wtp_down", "wtp_up"]
+
+
+class EventBus:
+    """Deliver runtime events to the tenant apps.
+
+    Attributes:
+        handlers: the handlers of every event as
+          {event: {tenant_id: [(app, handler), ...]}}
+        dispatched: the number of events dispatched, by event
+        delivered: the number of handlers called, by event
+    """
+
+    def __init__(self):
+
+        self.handlers = {event: {} for event in EVENTS}
+        self.dispatched = {event: 0 for event in EVENTS}
+        self.delivered = {event: 0 for event in EVENTS}
+        self.log = empower.logger.get_logger()
+
+    def add_app(self, app):
+        """Subscribe the hooks overridden by the app."""
+
+        from empower.core.app import EmpowerApp
+
+        for event in EVENTS:
+
+            hook = getattr(type(app), event, None)
+
+            if not hook or hook is getattr(EmpowerApp, event):
+                continue
+
+            self.subscribe(event, app, getattr(app, event))
+
+    def remove_app(self, app):
+        """Remove all the handlers of the app."""
+
+        for event in EVENTS:
+
+            handlers = self.handlers[event].get(app.tenant_id)
+
+            if not handlers:
+                continue
+
+            handlers[:] = [x for x in handlers if x[0] is not app]
+
+            if not handlers:
+                del self.handlers[event][app.tenant_id]
+
+    def remove_tenant(self, tenant_id):
+        """Remove the handlers of all the apps of the tenant."""
+
+        for event in EVENTS:
+            self.handlers[event].pop(tenant_id, None)
+
+    def subscribe(self, event, app, handler):
+        """Call handler when event is dispatched to the app tenant."""
+
+        if event not in self.handlers:
+            raise KeyError("Invalid event %s" % event)
+
+        handlers = self.handlers[event].setdefault(app.tenant_id, [])
+        handlers.append((app, handler))
+
+    def unsubscribe(self, event, app, handler):
+        """Remove a handler."""
+
+        handlers = self.handlers[event].get(app.tenant_id, [])
+
+        if (app, handler) in handlers:
+            handlers.remove((app, handler))
+
+        if not handlers:
+            self.handlers[event].pop(app.tenant_id, None)
+
+    def dispatch(self, event, *args):
+        """Dispatch an event to the apps of every tenant."""
+
+        self.dispatched[event] += 1
+
+        for handlers in list(self.handlers[event].values()):
+            self.__deliver(event, handlers, args)
+
+    def dispatch_to_tenant(self, tenant, event, *args):
+        """Dispatch an event to the apps of a tenant.
+
+        Nothing is delivered if tenant is None (e.g. an LVAP that is not
+        associated to any tenant).
+        """
+
+        self.dispatched[event] += 1
+
+        if not tenant:
+            return
+
+        handlers = self.handlers[event].get(tenant.tenant_id)
+
+        if handlers:
+            self.__deliver(event, handlers, args)
+
+    def __deliver(self, event, handlers, args):
+
+        for _, handler in list(handlers):
+            self.delivered[event] += 1
+            handler(*args)
+
+    def to_dict(self):
+        """Return a JSON-serializable dictionary."""
+
+        return {event: {'dispatched': self.dispatched[event],
+                        'delivered': self.delivered[event],
+                        'handlers': sum(len(x) for x in
+                                        self.handlers[event].values())}
+                for event in EVENTS}
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Heartbeat supervisor."""
+
+import time
+import heapq
+import itertools
+
+import tornado.ioloop
+
+import empower.logger
+
+# a connection is closed after this many hello periods without hellos
+DEFAULT_FACTOR = 3
+
+
+class HeartbeatSupervisor:
+    """Heartbeat supervisor.
+
+    Checks the liveness of all the connections of a server using a single
+    timer. A connection is closed if no hello messages have been received
+    from its device for factor times the hello period.
+
+    Deadlines are kept in a heap ordered by expiry time and the timer only
+    fires when the earliest deadline expires. Deadlines are not updated when
+    a hello is received, instead when an entry expires the actual deadline
+    is computed from the device last_seen_ts and the entry is pushed back
+    in the heap if the device is still alive.
+
+    Attributes:
+        factor: the number of hello periods after which a device is dead
+        connections: the number of supervised connections
+    """
+
+    def __init__(self, factor=DEFAULT_FACTOR):
+
+        self.factor = factor
+
+        self.__heap = []
+        self.__watched = {}
+        self.__tokens = itertools.count()
+        self.__timeout = None
+        self.__timeout_deadline = None
+
+        self.log = empower.logger.get_logger()
+
+    @property
+    def connections(self):
+        """Return the number of supervised connections."""
+
+        return len(self.__watched)
+
+    def __contains__(self, connection):
+        return connection in self.__watched
+
+    def to_dict(self):
+        """Return a JSON-serializable dictionary representing the object."""
+
+        return {'factor': self.factor,
+                'connections': self.connections,
+                'deadlines': len(self.__heap)}
+
+    def deadline(self, pnfdev):
+        """Return the time after which the device is considered dead."""
+
+        return pnfdev.last_seen_ts + (pnfdev.period / 1000) * self.factor
+
+    def watch(self, connection, pnfdev):
+        """Start supervising a connection."""
+
+        token = next(self.__tokens)
+        self.__watched[connection] = (pnfdev, token)
+        self.__push(self.deadline(pnfdev), token, connection)
+
+    def unwatch(self, connection):
+        """Stop supervising a connection.
+
+        The heap entry is not removed, it will be discarded when expired.
+        """
+
+        self.__watched.pop(connection, None)
+
+        if not self.__watched and self.__timeout:
+            tornado.ioloop.IOLoop.instance().remove_timeout(self.__timeout)
+            self.__timeout = None
+            self.__timeout_deadline = None
+            self.__heap = []
+
+    def __push(self, deadline, token, connection):
+        """Add a deadline and reschedule the timer if needed."""
+
+        heapq.heappush(self.__heap, (deadline, token, connection))
+
+        if self.__timeout_deadline is None or \
+           deadline < self.__timeout_deadline:
+            self.__schedule(deadline)
+
+    def __schedule(self, deadline):
+        """Schedule the timer at the specified deadline."""
+
+        ioloop = tornado.ioloop.IOLoop.instance()
+
+        if self.__timeout:
+            ioloop.remove_timeout(self.__timeout)
+
+        delay = max(0, deadline - time.time())
+
+        self.__timeout = ioloop.call_later(delay, self.__expire)
+        self.__timeout_deadline = deadline
+
+    def __expire(self):
+        """Check the connections whose deadline has expired."""
+
+        self.__timeout = None
+        self.__timeout_deadline = None
+
+        now = time.time()
+
+        while self.__heap and self.__heap[0][0] <= now:
+
+            _, token, connection = heapq.heappop(self.__heap)
+
+            if connection not in self.__watched:
+                continue
+
+            pnfdev, current = self.__watched[connection]
+
+            # stale entry, the connection has been watched again
+            if token != current:
+                continue
+
+            if connection.stream.closed():
+                self.unwatch(connection)
+                continue
+
+            deadline = self.deadline(pnfdev)
+
+            if deadline <= now:
+                self.log.info('Client inactive %s at %r', pnfdev.addr,
+                              connection.addr)
+                self.unwatch(connection)
+                connection.stream.close()
+                continue
+
+            heapq.heappush(self.__heap, (deadline, token, connection))
+
+        if self.__heap:
+            self.__schedule(self.__heap[0][0])
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Runtime state changes journal."""
+
+import time
+
+from collections import deque
+from itertools import islice
+
+# maximum number of changes kept in the journal
+DEFAULT_SIZE = 10000
+
+# entities
+J_LVAP = "lvap"
+J_UE = "ue"
+J_SLICE = "slice"
+
+# changes
+J_SPAWNED = "spawned"
+J_MOVED = "moved"
+J_REMOVED = "removed"
+J_JOINED = "joined"
+J_LEFT = "left"
+J_ADDED = "added"
+J_UPDATED = "updated"
+
+
+class Journal:
+    """The runtime state changes journal.
+
+    Every change gets the next version number, the last size changes are
+    kept in a ring buffer. Consumers remember the version they have seen
+    and ask for the changes after it. If some of those changes are not in
+    the ring buffer anymore the consumer must read the full state again.
+
+    Changes are (version, timestamp, entity, key, change) tuples, e.g.:
+
+        (12, 1500000000.0, "lvap", EtherAddress(...), "moved")
+        (13, 1500000001.0, "wtps", EtherAddress(...), "online")
+
+    Attributes:
+        version: the version of the last change (0 if no changes)
+        changes: the last changes
+    """
+
+    def __init__(self, size=DEFAULT_SIZE):
+
+        self.version = 0
+        self.changes = deque(maxlen=size)
+
+    def record(self, entity, key, change):
+        """Record a change and return its version."""
+
+        self.version += 1
+        self.changes.append((self.version, time.time(), entity, key, change))
+
+        return self.version
+
+    def changes_since(self, version):
+        """Return the changes after version.
+
+        Returns None if some of the changes have already been dropped.
+        """
+
+        if version >= self.version:
+            return []
+
+        first = self.version - len(self.changes)
+
+        if version < first:
+            return None
+
+        return list(islice(self.changes, version - first, None))
+
+    def to_dict(self):
+        """Return a JSON-serializable dictionary representing the journal."""
+
+        return {'version': self.version,
+                'size': self.changes.maxlen,
+                'changes': len(self.changes)}
@@ -25,6 +25,8 @@ from empower.core.resourcepool import BT_HT20
 from empower.core.tenant import T_TYPE_SHARED
 from empower.datatypes.etheraddress import EtherAddress
 from empower.datatypes.ssid import SSID
+from empower.core.journal import J_LVAP
+from empower.core.journal import J_MOVED
 
 import empower.logger
 
@@ -110,6 +112,10 @@ class LVAP:
         self._ssid = None
         self._bssid = None
         self.authentication_state = False
+
+        # the resolved tenant as (ssid, tenants version, tenant), the tenant
+        # is resolved again if the ssid or the runtime tenants change
+        self.__tenant = (None, None, None)
         self.association_state = False
 
         # list of networks available for this LVAP on the default block (0)
@@ -132,6 +138,10 @@ class LVAP:
         self._downlink = None
         self._uplink = []
 
+        # the wtps hosting the current blocks, each of them has this lvap in
+        # its lvaps index
+        self.__radios = set()
+
         # the lvap state
         self._state = state
 
@@ -297,8 +307,7 @@ class LVAP:
             self.pending.append(xid)
 
         # reset uplink and downlink
-        self._downlink = None
-        self._uplink = []
+        self._set_blocks(None, [])
 
     def _running_running(self):
 
@@ -365,7 +374,13 @@ class LVAP:
 
         from empower.main import RUNTIME
 
-        return RUNTIME.load_tenant(self.ssid)
+        ssid, version, tenant = self.__tenant
+
+        if ssid != self._ssid or version != RUNTIME.tenants_version:
+            tenant = RUNTIME.load_tenant(self._ssid)
+            self.__tenant = (self._ssid, RUNTIME.tenants_version, tenant)
+
+        return tenant
 
     @property
     def assoc_id(self):
@@ -495,7 +510,7 @@ class LVAP:
         dl_block.radio.connection.send_add_lvap(self, dl_block, True)
 
         # save block
-        self._downlink = dl_block
+        self._set_blocks(dl_block, self._uplink)
 
     def __assign_uplink(self, ul_blocks):
         """Set the downlink blocks."""
@@ -506,7 +521,7 @@ class LVAP:
             block.radio.connection.send_add_lvap(self, block, False)
 
             # save block into the list
-            self._uplink.append(block)
+            self._set_blocks(self._downlink, self._uplink + [block])
 
     @property
     def wtp(self):
@@ -534,8 +549,31 @@ class LVAP:
         for block in self.blocks:
             block.radio.connection.send_del_lvap(self.addr)
 
-        self._downlink = None
-        self._uplink = []
+        self._set_blocks(None, [])
+
+    def _set_blocks(self, downlink, uplink):
+        """Set the current blocks and update the WTPs lvaps index."""
+
+        from empower.main import RUNTIME
+
+        moved = downlink and downlink != self._downlink and \
+            self.addr in RUNTIME.lvaps
+
+        self._downlink = downlink
+        self._uplink = uplink
+
+        if moved:
+            RUNTIME.journal.record(J_LVAP, self.addr, J_MOVED)
+
+        radios = {block.radio for block in self.blocks if block}
+
+        for wtp in self.__radios - radios:
+            wtp.lvaps.pop(self.addr, None)
+
+        for wtp in radios - self.__radios:
+            wtp.lvaps[self.addr] = self
+
+        self.__radios = radios
 
     def to_dict(self):
         """ Return a JSON-serializable dictionary representing the LVAP """
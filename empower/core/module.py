@@ -18,46 +18,242 @@
 """EmPOWER Primitive Base Class."""
 
 import json
+import time
 import types
-import xmlrpc.client
 
-from multiprocessing.pool import ThreadPool
+from collections import deque
 
 import tornado.web
 import tornado.httpserver
-
-from tornado.ioloop import IOLoop
+import tornado.ioloop
 
 import empower.logger
 
 from empower.core.jsonserializer import EmpowerEncoder
+from empower.core.transport import TRANSPORT
 from empower.main import RUNTIME
 
+# scheduler resolution (in ms)
+TICK = 10
 
-_WORKERS = ThreadPool(10)
+# slots per wheel, the first wheel has 2^8 slots of TICK ms, the others 2^6
+# slots each one covering a full turn of the previous wheel
+WHEEL_BITS = [8, 6, 6, 6]
 
+# maximum number of timers fired in a single tick, the others are fired
+# during the following ticks
+MAX_PER_TICK = 500
 
-def exec_xmlrpc(callback, args=()):
-    """Execute XML-RPC call."""
+# golden ratio conjugate, used to spread the phases of timers with the same
+# period
+PHASE_STEP = 0.6180339887498949
 
-    proxy = xmlrpc.client.ServerProxy(callback[0])
-    func = getattr(proxy, callback[1])
-    run_background(func, on_complete, args)
 
+def freeze(value):
+    """Return a hashable version of a module parameter."""
 
-def run_background(func, callback, args=(), kwds=None):
-    """Run callback in background."""
+    if isinstance(value, dict):
+        return tuple(sorted(((key, freeze(val)) for key, val in value.items()),
+                            key=lambda item: str(item[0])))
 
-    def _callback(result):
-        IOLoop.instance().add_callback(lambda: callback(result))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(val) for val in value)
 
-    _WORKERS.apply_async(func, args, kwds, _callback)
+    if isinstance(value, set):
+        return frozenset(freeze(val) for val in value)
 
+    return value
 
-def on_complete(_):
-    """XML RPC Callback."""
 
-    pass
+class Timer:
+    """A periodic timer.
+
+    Attributes:
+        callback: the function to be called
+        period: the period (in ticks)
+        deadline: the tick at which the timer must fire next
+        cancelled: True if the timer has been cancelled
+    """
+
+    __slots__ = ('callback', 'period', 'deadline', 'cancelled')
+
+    def __init__(self, callback, period, deadline):
+        self.callback = callback
+        self.period = period
+        self.deadline = deadline
+        self.cancelled = False
+
+
+class Scheduler:
+    """Runs all the periodic tasks (modules and apps) using a single timer.
+
+    Timers are kept in a hierarchical timing wheel: the first wheel has a
+    slot for every tick in the next 2^8 ticks, every following wheel has a
+    slot for every turn of the previous wheel. When a wheel completes a
+    turn the next slot of the following wheel is moved to the lower wheels.
+    Adding and cancelling a timer is O(1), and every tick only touches the
+    timers expiring in that tick.
+
+    Timers with the same period are started with different phases, so that
+    they do not fire in the same tick. At most max_per_tick timers are fired
+    in every tick, the expired timers exceeding the cap are fired during the
+    following ticks.
+
+    Attributes:
+        tick: the scheduler resolution (in ms)
+        max_per_tick: the maximum number of timers fired in every tick
+        now: the current tick
+        timers: the number of active timers
+        ready: the expired timers waiting to be fired
+        fired: the number of timers fired
+        lateness: the average lateness of the fired timers (in ms)
+        max_lateness: the maximum lateness of the fired timers (in ms)
+    """
+
+    def __init__(self, tick=TICK, max_per_tick=MAX_PER_TICK):
+
+        self.tick = tick
+        self.max_per_tick = max_per_tick
+        self.now = 0
+        self.timers = 0
+        self.ready = deque()
+        self.fired = 0
+        self.lateness = 0.0
+        self.max_lateness = 0
+
+        self.__wheels = [[[] for _ in range(1 << bits)]
+                         for bits in WHEEL_BITS]
+        self.__shifts = [sum(WHEEL_BITS[:i]) for i in range(len(WHEEL_BITS))]
+        self.__phases = {}
+        self.__start = None
+        self.__periodic = None
+
+        self.log = empower.logger.get_logger()
+
+    def add(self, callback, every):
+        """Call callback every ms, return the timer."""
+
+        if not self.__periodic:
+            self.__start = time.monotonic()
+            self.__periodic = \
+                tornado.ioloop.PeriodicCallback(self.__run, self.tick)
+            self.__periodic.start()
+
+        period = max(1, int(every) // self.tick)
+
+        # spread the timers with the same period over the period
+        count = self.__phases.get(period, 0)
+        self.__phases[period] = count + 1
+        phase = int(((count * PHASE_STEP) % 1) * period)
+
+        timer = Timer(callback, period, self.now + 1 + phase)
+
+        self.timers += 1
+        self.__insert(timer)
+
+        return timer
+
+    def cancel(self, timer):
+        """Cancel a timer, the timer is dropped when it expires."""
+
+        if timer and not timer.cancelled:
+            timer.cancelled = True
+            self.timers -= 1
+
+    def __insert(self, timer):
+
+        delta = timer.deadline - self.now
+
+        for level, bits in enumerate(WHEEL_BITS):
+
+            shift = self.__shifts[level]
+
+            if delta < 1 << (shift + bits) or level == len(WHEEL_BITS) - 1:
+                slot = (timer.deadline >> shift) & ((1 << bits) - 1)
+                self.__wheels[level][slot].append(timer)
+                return
+
+    def __advance(self):
+
+        self.now += 1
+
+        # cascade the timers of the upper wheels which completed a turn
+        for level in range(1, len(WHEEL_BITS)):
+
+            shift = self.__shifts[level]
+
+            if self.now & ((1 << shift) - 1):
+                break
+
+            slot = (self.now >> shift) & ((1 << WHEEL_BITS[level]) - 1)
+            timers = self.__wheels[level][slot]
+            self.__wheels[level][slot] = []
+
+            for timer in timers:
+                if not timer.cancelled:
+                    self.__insert(timer)
+
+        slot = self.now & ((1 << WHEEL_BITS[0]) - 1)
+        timers = self.__wheels[0][slot]
+        self.__wheels[0][slot] = []
+
+        for timer in timers:
+            if timer.cancelled:
+                continue
+            # timers beyond the last wheel may need another turn
+            if timer.deadline > self.now:
+                self.__insert(timer)
+                continue
+            self.ready.append(timer)
+
+    def __run(self):
+
+        # monotonic, so that wall clock steps neither stall nor burst the
+        # timers
+        target = int((time.monotonic() - self.__start) * 1000) // self.tick
+
+        while self.now < target:
+            self.__advance()
+
+        count = 0
+
+        while self.ready and count < self.max_per_tick:
+
+            timer = self.ready.popleft()
+
+            if timer.cancelled:
+                continue
+
+            count += 1
+
+            lateness = (self.now - timer.deadline) * self.tick
+            self.fired += 1
+            self.lateness += (lateness - self.lateness) / self.fired
+            self.max_lateness = max(self.max_lateness, lateness)
+
+            # keep the phase, unless the timer is more than a period late
+            timer.deadline = \
+                max(timer.deadline + timer.period, self.now + 1)
+            self.__insert(timer)
+
+            try:
+                timer.callback()
+            except Exception as ex:
+                self.log.exception(ex)
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        return {'tick': self.tick,
+                'max_per_tick': self.max_per_tick,
+                'timers': self.timers,
+                'queue_depth': len(self.ready),
+                'fired': self.fired,
+                'lateness': round(self.lateness, 3),
+                'max_lateness': self.max_lateness}
+
+
+SCHEDULER = Scheduler()
 
 
 class Module:
@@ -69,26 +265,125 @@ class Module:
         worker: the module worker responsible for reating new module instances.
         tenant_id: The tenant's Id for convenience (UUID)
         callback: Module callback (FunctionType)
+        callbacks: the callbacks of all the subscribers
+        subscribers: the number of subscribers, the module is unloaded when
+          the last one unsubscribes
+        indexed_key: the identity key the module was added with
     """
 
     MODULE_NAME = None
     REQUIRED = ['module_type', 'worker', 'tenant_id']
 
+    # set by the modules whose events are snapshots of the module state, so
+    # that a queued remote event can be replaced by a newer one
+    COALESCE = False
+
     def __init__(self):
 
         self.__tenant_id = None
         self.module_id = 0
         self.module_type = None
         self.worker = None
-        self.__callback = None
+        self.__callbacks = []
+        self.__anonymous = 0
         self.__periodic = None
+        self.indexed_key = None
         self.log = empower.logger.get_logger()
 
     def unload(self):
-        """Remove this module."""
+        """Remove this module regardless of its subscribers."""
 
         self.worker.remove_module(self.module_id)
 
+    @property
+    def callbacks(self):
+        """Return the callbacks of the subscribers."""
+
+        return self.__callbacks
+
+    @property
+    def subscribers(self):
+        """Return the number of subscribers."""
+
+        return len(self.__callbacks) + self.__anonymous
+
+    @classmethod
+    def check_callback(cls, callback):
+        """Raise TypeError if callback is not a valid callback."""
+
+        if isinstance(callback, (types.FunctionType, types.MethodType)):
+            return
+
+        if isinstance(callback, list) and len(callback) == 2:
+            return
+
+        raise TypeError("Invalid callback type")
+
+    def subscribe(self, callback=None):
+        """Add a subscriber.
+
+        Subscribers without a callback (e.g. apps polling the module) are
+        only counted. Subscribing the same callback twice has no effect.
+        """
+
+        if not callback:
+            self.__anonymous += 1
+            return
+
+        self.check_callback(callback)
+
+        if callback not in self.__callbacks:
+            self.__callbacks.append(callback)
+
+    def unsubscribe(self, callback=None):
+        """Remove a subscriber, unload the module after the last one.
+
+        If callback is not specified a subscriber without callback is
+        removed. If there are no such subscribers the only callback is
+        removed, as a DELETE without body on a module created with a
+        callback always did.
+
+        Raises:
+            KeyError, if callback is not subscribed
+            ValueError, if callback is not specified and there are several
+              callbacks but no subscribers without callback
+        """
+
+        if callback is None:
+
+            if self.__anonymous:
+                self.__anonymous -= 1
+            elif len(self.__callbacks) > 1:
+                raise ValueError("Module %u has %u callbacks, specify one" %
+                                 (self.module_id, len(self.__callbacks)))
+            else:
+                self.__callbacks.clear()
+
+        else:
+
+            if callback not in self.__callbacks:
+                raise KeyError("Callback %s not subscribed" % (callback, ))
+
+            self.__callbacks.remove(callback)
+
+        if not self.subscribers:
+            self.unload()
+
+    def unsubscribe_app(self, app):
+        """Remove the callbacks bound to an app."""
+
+        callbacks = [x for x in self.__callbacks
+                     if getattr(x, '__self__', None) is app]
+
+        if not callbacks:
+            return
+
+        for callback in callbacks:
+            self.__callbacks.remove(callback)
+
+        if not self.subscribers:
+            self.unload()
+
     def handle_callback(self, serializable):
         """Handle an module callback.
 
@@ -99,32 +394,39 @@ class Module:
             None
         """
 
-        # call callback if defined
-        if not self.callback:
+        # call callbacks if defined
+        if not self.__callbacks:
             return
 
-        callback = self.callback
+        # serialized only if there are remote callbacks, and only once
+        as_json = None
 
-        try:
+        # a callback may unsubscribe itself
+        for callback in list(self.__callbacks):
 
-            as_dict = serializable.to_dict()
-            as_json = json.dumps(as_dict, cls=EmpowerEncoder)
+            try:
 
-            if isinstance(callback, (types.FunctionType, types.MethodType)):
+                if isinstance(callback,
+                              (types.FunctionType, types.MethodType)):
 
-                callback(serializable)
+                    callback(serializable)
 
-            elif isinstance(callback, list) and len(callback) == 2:
+                elif isinstance(callback, list) and len(callback) == 2:
 
-                exec_xmlrpc(callback, (as_json, ))
+                    if as_json is None:
+                        as_json = json.dumps(serializable.to_dict(),
+                                             cls=EmpowerEncoder)
 
-            else:
+                    TRANSPORT.send(callback, (self.tenant_id, self.module_id),
+                                   as_json, self.COALESCE)
 
-                raise TypeError("Invalid callback type")
+                else:
 
-        except Exception as ex:
+                    raise TypeError("Invalid callback type")
 
-            self.log.exception(ex)
+            except Exception as ex:
+
+                self.log.exception(ex)
 
     def as_json(self):
         """Return a JSON representation of the object."""
@@ -133,13 +435,13 @@ class Module:
 
     @property
     def callback(self):
-        """ Return this triger callback. """
+        """ Return this triger callback (the first one if many). """
 
-        return self.__callback
+        return self.__callbacks[0] if self.__callbacks else None
 
     @callback.setter
     def callback(self, callback=None):
-        """Register callback function.
+        """Register callback function, replacing the current callbacks.
 
         The callback is generated when the condition is verified. Callback can
         be either a reference to a fucntion or an tuple whose first entry is
@@ -148,20 +450,12 @@ class Module:
         """
 
         if not callback:
-            self.__callback = None
+            self.__callbacks = []
             return
 
-        if isinstance(callback, (types.FunctionType, types.MethodType)):
-
-            self.__callback = callback
-
-        elif isinstance(callback, list) and len(callback) == 2:
+        self.check_callback(callback)
 
-            self.__callback = callback
-
-        else:
-
-            raise TypeError("Invalid callback type")
+        self.__callbacks = [callback]
 
     def start(self):
         """Start worker."""
@@ -201,18 +495,31 @@ class Module:
         out = {'id': self.module_id,
                'module_type': self.module_type,
                'tenant_id': self.tenant_id,
-               'callback': self.callback}
+               'callback': self.callback,
+               'callbacks': self.callbacks,
+               'subscribers': self.subscribers}
 
         return out
 
+    @property
+    def key(self):
+        """Return the identity key.
+
+        Modules with the same key are equivalent, subclasses extend the key
+        with the parameters identifying the module (e.g. the LVAP). The key
+        may change if the parameters are updated, the worker indexes the
+        module with the key it had when it was added (see indexed_key).
+        """
+
+        return (self.module_type, self.tenant_id)
+
     def __hash__(self):
         return hash(str(self.tenant_id) + str(self.module_id))
 
     def __eq__(self, other):
 
         if isinstance(other, Module):
-            return self.module_type == other.module_type and \
-                self.tenant_id == other.tenant_id
+            return self.key == other.key
 
         return False
 
@@ -246,6 +553,7 @@ class ModulePeriodic(Module):
     def __init__(self):
         super().__init__()
         self.__every = 5000
+        self.__periodic = None
 
     @property
     def every(self):
@@ -266,9 +574,7 @@ class ModulePeriodic(Module):
             self.run_once()
             return
 
-        self.__periodic = \
-            tornado.ioloop.PeriodicCallback(self.run_once, self.every)
-        self.__periodic.start()
+        self.__periodic = SCHEDULER.add(self.run_once, self.every)
 
     def stop(self):
         """Stop worker."""
@@ -276,7 +582,7 @@ class ModulePeriodic(Module):
         if self.every == -1:
             return
 
-        self.__periodic.stop()
+        SCHEDULER.cancel(self.__periodic)
 
     def to_dict(self):
         """Return JSON-serializable representation of the object."""
@@ -285,18 +591,17 @@ class ModulePeriodic(Module):
                'module_type': self.module_type,
                'tenant_id': self.tenant_id,
                'every': self.every,
-               'callback': self.callback}
+               'callback': self.callback,
+               'callbacks': self.callbacks,
+               'subscribers': self.subscribers}
 
         return out
 
-    def __eq__(self, other):
-
-        if isinstance(other, Module):
-            return self.module_type == other.module_type and \
-                self.tenant_id == other.tenant_id and \
-                self.every == other.every
+    @property
+    def key(self):
+        """Return the identity key."""
 
-        return False
+        return super().key + (self.every, )
 
 
 class ModuleWorker:
@@ -306,12 +611,15 @@ class ModuleWorker:
 
     Attributes:
         modules: dictionary of modules currently active in this tenant
+        keys: the same modules indexed by the identity key they were added
+          with
     """
 
     def __init__(self, server, module, pt_type, pt_packet):
 
         self.__module_id = 0
         self.modules = {}
+        self.keys = {}
         self.module = module
 
         self.pt_type = pt_type
@@ -342,6 +650,9 @@ class ModuleWorker:
         kwargs['worker'] = self
         kwargs['module_type'] = self.module.MODULE_NAME
 
+        # the callback is not a module parameter, it is the subscriber
+        callback = kwargs.pop('callback', None)
+
         # check if all require parameters have been specified
         for param in self.module.REQUIRED:
             if param not in kwargs:
@@ -365,11 +676,20 @@ class ModuleWorker:
                 raise ValueError("Invalid param %s" % arg)
             setattr(module, arg, kwargs[arg])
 
-        # check if an equivalent module has already been defined in the tenant
-        for val in self.modules.values():
-            # if so return a reference to that trigger
-            if val == module:
-                return val
+        # check if an equivalent module has already been defined in the
+        # tenant, if so subscribe to that module and return a reference
+        key = module.key
+
+        # the parameters of the indexed module may have been changed since
+        # it was added, in that case it is indexed again with its new key
+        if key in self.keys and self.keys[key].key != key:
+            self.__reindex(self.keys[key])
+
+        if key in self.keys:
+            self.keys[key].subscribe(callback)
+            return self.keys[key]
+
+        module.subscribe(callback)
 
         # otherwise generate a new module id
         module.module_id = self.module_id
@@ -379,6 +699,8 @@ class ModuleWorker:
 
         # add to dict
         self.modules[module.module_id] = module
+        self.keys[key] = module
+        module.indexed_key = key
 
         # start module
         self.modules[module.module_id].start()
@@ -386,7 +708,7 @@ class ModuleWorker:
         return module
 
     def remove_module(self, module_id):
-        """Remove a module.
+        """Remove a module regardless of its subscribers.
 
         Args:
             module_id, the tenant id
@@ -411,6 +733,21 @@ class ModuleWorker:
 
         del self.modules[module_id]
 
+        if self.keys.get(module.indexed_key) is module:
+            del self.keys[module.indexed_key]
+
+    def __reindex(self, module):
+        """Index a module with its current identity key.
+
+        The module is left out of the index if an equivalent module is
+        already indexed with that key.
+        """
+
+        del self.keys[module.indexed_key]
+
+        module.indexed_key = module.key
+        self.keys.setdefault(module.indexed_key, module)
+
     def handle_packet(self, pnfdev, message):
         """Handle response message."""
 
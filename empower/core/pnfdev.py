@@ -72,13 +72,18 @@ class BasePNFDev:
     def state(self, state):
         """Set the PNFDev state."""
 
+        from empower.main import RUNTIME
+
         self.log.info("PNFDev %s mode %s->%s", self.addr, self.state, state)
 
         method = "_%s_%s" % (self.state, state)
 
         if hasattr(self, method):
             callback = getattr(self, method)
+            changed = self.state != state
             callback()
+            if changed:
+                RUNTIME.journal.record(self.ALIAS, self.addr, state)
             return
 
         raise IOError("Invalid transistion %s -> %s" % (self.state, state))
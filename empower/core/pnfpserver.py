@@ -18,6 +18,7 @@
 """PNF Protocol Server."""
 
 import json
+import types
 
 from uuid import UUID
 
@@ -133,11 +134,31 @@ class BaseTenantPNFDevHandler(EmpowerAPIHandlerUsers):
 
 
 class PNFPServer:
-    """Exposes the PNF Protocol API."""
+    """Exposes the PNF Protocol API.
+
+    Incoming messages are dispatched using the dispatch table. The table
+    maps every message type with a parser to a tuple:
+
+        (parser, handler, handlers, check_connected, check_online)
+
+    where handler is the default handler, i.e. the CONNECTION method named
+    _handle_<parser name> (or None), handlers is the list of handlers
+    registered with register_message, and check_connected/check_online
+    tell whether the message must be dropped if the device is not
+    connected/online. The table is built when the server is created and
+    updated by register_message.
+    """
 
     PNFDEV = None
     TBL_PNFDEV = None
 
+    # The connection class implementing the default handlers
+    CONNECTION = None
+
+    # Message types accepted from devices that are not connected/online
+    PT_BEFORE_CONNECTED = []
+    PT_BEFORE_ONLINE = []
+
     def __init__(self, port, pt_types, pt_types_handlers):
 
         self.port = port
@@ -146,6 +167,10 @@ class PNFPServer:
         self.log = empower.logger.get_logger()
         self.pt_types = pt_types
         self.pt_types_handlers = pt_types_handlers
+        self.dispatch = {}
+
+        for pt_type in self.pt_types:
+            self.__update_dispatch(pt_type)
 
     def __load_slices(self):
         """Load Slices."""
@@ -216,6 +241,7 @@ class PNFPServer:
 
             self.pnfdevs[pnfdev.addr] = \
                 self.PNFDEV(pnfdev.addr, pnfdev.label)
+            RUNTIME.invalidate_unique_tenants(pnfdev.addr)
 
     def to_dict(self):
         """ Return a dict representation of the object. """
@@ -231,6 +257,7 @@ class PNFPServer:
             raise ValueError("Device address %s already present" % addr)
 
         self.pnfdevs[addr] = self.PNFDEV(addr, label)
+        RUNTIME.invalidate_unique_tenants(addr)
 
         session = Session()
         session.add(self.TBL_PNFDEV(addr=addr, label=label))
@@ -247,6 +274,7 @@ class PNFPServer:
         pnfdev = self.pnfdevs[addr]
 
         del self.pnfdevs[addr]
+        RUNTIME.invalidate_unique_tenants(addr)
 
         pnfdev = Session().query(self.TBL_PNFDEV) \
             .filter(self.TBL_PNFDEV.addr == addr) \
@@ -267,3 +295,35 @@ class PNFPServer:
 
         if handler:
             self.pt_types_handlers[pt_type].append(handler)
+
+        self.__update_dispatch(pt_type)
+
+    def __update_dispatch(self, pt_type):
+        """Update the dispatch table entry for the message type."""
+
+        parser = self.pt_types[pt_type]
+
+        if not parser:
+            self.dispatch.pop(pt_type, None)
+            return
+
+        if pt_type not in self.pt_types_handlers:
+            self.pt_types_handlers[pt_type] = []
+
+        handler = None
+
+        if self.CONNECTION:
+            handler = getattr(self.CONNECTION, "_handle_%s" % parser.name,
+                              None)
+
+        # handlers are called as handler(connection, ...), so keep the
+        # plain function of methods already bound to the class
+        if isinstance(handler, types.MethodType):
+            handler = handler.__func__
+
+        self.dispatch[pt_type] = \
+            (parser,
+             handler,
+             self.pt_types_handlers[pt_type],
+             pt_type not in self.PT_BEFORE_CONNECTED,
+             pt_type not in self.PT_BEFORE_ONLINE)
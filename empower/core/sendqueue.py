@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Southbound send queue."""
+
+from collections import deque
+from itertools import count
+
+import tornado.ioloop
+
+from tornado.iostream import StreamClosedError
+
+import empower.logger
+
+# priority classes, assoc frames are sent before config frames and config
+# frames before stats frames
+PRIO_ASSOC = 0
+PRIO_CONFIG = 1
+PRIO_STATS = 2
+
+PRIORITIES = {PRIO_ASSOC: 'assoc',
+              PRIO_CONFIG: 'config',
+              PRIO_STATS: 'stats'}
+
+# flush as soon as this many bytes are pending
+DEFAULT_MAX_BYTES = 65536
+
+# maximum time (in ms) a frame can wait before being flushed, 0 means that
+# the frames are flushed at the end of the current IOLoop iteration
+DEFAULT_MAX_DELAY = 0
+
+# maximum number of bytes queued or being written before stats frames are
+# dropped
+DEFAULT_BUDGET = 1048576
+
+# frames-per-flush histogram buckets (upper bounds)
+FLUSH_BUCKETS = [1, 2, 4, 8, 16, 32, 64]
+
+
+class SendQueue:
+    """Outgoing buffer of a southbound connection.
+
+    All the frames queued during the same IOLoop iteration (or within
+    max_delay ms) are written to the stream with a single write. The queue
+    is flushed immediately if more than max_bytes are pending.
+
+    Frames are queued in one of three priority classes: association control
+    (PRIO_ASSOC), LVAP/slice configuration (PRIO_CONFIG) and stats polling
+    (PRIO_STATS). Within the same flush association frames are written
+    first, then configuration frames and finally stats frames, each class
+    in queue order. A frame can be queued with a target (e.g. the station
+    address), a configuration frame is never written after a later
+    association frame with the same target, so that e.g. a transmission
+    policy for a station is not written after a later DEL_LVAP for the
+    same station.
+
+    Only one write can be outstanding on the stream, frames queued while
+    the stream is busy are written when the previous write completes. This
+    way a slow device makes frames accumulate here, where they can be
+    reordered, merged and dropped, instead of in the stream write buffer.
+
+    A frame can be queued with a key, in that case if a frame with the same
+    key is still pending it is replaced by the new one (i.e. stale poll
+    requests are merged). If more than budget bytes are queued or being
+    written the oldest stats frames are dropped. Association and
+    configuration frames are never dropped.
+
+    Attributes:
+        stream: the stream to which frames are written
+        max_bytes: the maximum number of bytes pending before a flush
+        max_delay: the maximum time (in ms) a frame can wait before a flush
+        budget: the maximum number of bytes queued or being written
+        flushes: the number of writes done on the stream
+        frames: the number of frames written on the stream
+        bytes: the number of bytes written on the stream
+        merged: the number of frames replaced by a newer frame
+        dropped: the number of frames dropped because over budget
+        histogram: the number of flushes by number of frames
+    """
+
+    def __init__(self, stream, max_bytes=DEFAULT_MAX_BYTES,
+                 max_delay=DEFAULT_MAX_DELAY, budget=DEFAULT_BUDGET):
+
+        self.stream = stream
+        self.max_bytes = int(max_bytes)
+        self.max_delay = int(max_delay)
+        self.budget = int(budget)
+
+        self.__queues = {prio: deque() for prio in PRIORITIES}
+        self.__seq = count()
+        self.__keys = {}
+        self.__pending = 0
+        self.__inflight = 0
+        self.__writing = None
+        self.__scheduled = False
+        self.__timeout = None
+
+        self.flushes = 0
+        self.frames = 0
+        self.bytes = 0
+        self.merged = 0
+        self.dropped = 0
+        self.histogram = {str(x): 0 for x in FLUSH_BUCKETS}
+        self.histogram['inf'] = 0
+
+        self.log = empower.logger.get_logger()
+
+    def to_dict(self):
+        """Return a JSON-serializable dictionary representing the queue."""
+
+        avg = self.frames / self.flushes if self.flushes else 0
+
+        queues = {PRIORITIES[prio]: len(queue)
+                  for prio, queue in self.__queues.items()}
+
+        return {'max_bytes': self.max_bytes,
+                'max_delay': self.max_delay,
+                'budget': self.budget,
+                'pending_frames': queues,
+                'pending_bytes': self.__pending,
+                'inflight_bytes': self.__inflight,
+                'flushes': self.flushes,
+                'frames': self.frames,
+                'bytes': self.bytes,
+                'merged': self.merged,
+                'dropped': self.dropped,
+                'frames_per_flush': avg,
+                'histogram': self.histogram}
+
+    def write(self, data, priority=PRIO_CONFIG, key=None, target=None):
+        """Queue a frame.
+
+        Args:
+            data: the frame
+            priority: the priority class (PRIO_ASSOC, PRIO_CONFIG,
+              PRIO_STATS)
+            key: if not None a pending frame with the same key is replaced
+            target: if not None the frame is kept in queue order with
+              respect to the association frames with the same target
+        """
+
+        if self.stream.closed():
+            return
+
+        if key is not None and key in self.__keys:
+            entry = self.__keys[key]
+            self.__pending += len(data) - len(entry[1])
+            entry[1] = data
+            self.merged += 1
+        else:
+            entry = [key, data, next(self.__seq), target]
+            self.__queues[priority].append(entry)
+            self.__pending += len(data)
+            if key is not None:
+                self.__keys[key] = entry
+
+        if self.__pending + self.__inflight > self.budget:
+            self.__enforce_budget()
+
+        if self.__pending >= self.max_bytes:
+            self.flush()
+            return
+
+        if self.__scheduled:
+            return
+
+        self.__scheduled = True
+
+        ioloop = tornado.ioloop.IOLoop.instance()
+
+        if self.max_delay > 0:
+            self.__timeout = \
+                ioloop.call_later(self.max_delay / 1000, self.flush)
+        else:
+            ioloop.add_callback(self.flush)
+
+    def __enforce_budget(self):
+        """Drop the oldest stats frames until the queue is within budget."""
+
+        queue = self.__queues[PRIO_STATS]
+
+        while queue and self.__pending + self.__inflight > self.budget:
+
+            key, data, _, _ = queue.popleft()
+
+            if key is not None:
+                del self.__keys[key]
+
+            self.__pending -= len(data)
+            self.dropped += 1
+
+    def flush(self):
+        """Write all the pending frames with a single write.
+
+        If a write is already outstanding the frames are written when that
+        write completes.
+        """
+
+        if self.__timeout:
+            tornado.ioloop.IOLoop.instance().remove_timeout(self.__timeout)
+            self.__timeout = None
+
+        self.__scheduled = False
+
+        if self.__writing or not self.__pending:
+            return
+
+        queues = self.__queues
+
+        frames = self.__control_frames(queues[PRIO_ASSOC],
+                                       queues[PRIO_CONFIG])
+        frames.extend(entry[1] for entry in queues[PRIO_STATS])
+
+        for queue in queues.values():
+            queue.clear()
+
+        self.__keys.clear()
+
+        pending = self.__pending
+        self.__pending = 0
+
+        if self.stream.closed():
+            return
+
+        try:
+            future = self.stream.write(b''.join(frames))
+        except StreamClosedError as ex:
+            self.log.error(ex)
+            return
+
+        self.__inflight = pending
+        self.__writing = future
+        future.add_done_callback(self.__on_write)
+
+        self.flushes += 1
+        self.frames += len(frames)
+        self.bytes += pending
+
+        for bucket in FLUSH_BUCKETS:
+            if len(frames) <= bucket:
+                self.histogram[str(bucket)] += 1
+                break
+        else:
+            self.histogram['inf'] += 1
+
+    @classmethod
+    def __control_frames(cls, assoc, config):
+        """Return the assoc frames followed by the config frames.
+
+        Config frames queued before an assoc frame with the same target are
+        written right before that assoc frame.
+        """
+
+        # the sequence number of the last assoc frame of every target
+        last = {entry[3]: entry[2] for entry in assoc
+                if entry[3] is not None}
+
+        early = {}
+
+        for entry in config:
+            if entry[3] in last and entry[2] < last[entry[3]]:
+                early.setdefault(entry[3], deque()).append(entry)
+
+        frames = []
+        written = set()
+
+        for entry in assoc:
+
+            before = early.get(entry[3])
+
+            while before and before[0][2] < entry[2]:
+                frames.append(before[0][1])
+                written.add(before.popleft()[2])
+
+            frames.append(entry[1])
+
+        frames.extend(entry[1] for entry in config
+                      if entry[2] not in written)
+
+        return frames
+
+    def __on_write(self, future):
+        """Called when the outstanding write completes."""
+
+        self.__writing = None
+        self.__inflight = 0
+
+        try:
+            future.result()
+        except StreamClosedError:
+            return
+
+        if self.__pending:
+            self.flush()
@@ -19,6 +19,8 @@
 
 import json
 
+from collections import OrderedDict
+
 from sqlalchemy.exc import IntegrityError
 
 from empower.persistence.persistence import TblSlice
@@ -29,6 +31,10 @@ from empower.persistence import Session
 from empower.core.utils import get_module
 from empower.datatypes.etheraddress import EtherAddress
 from empower.core.trafficrule import TrafficRule
+from empower.core.journal import J_SLICE
+from empower.core.journal import J_ADDED
+from empower.core.journal import J_UPDATED
+from empower.core.journal import J_REMOVED
 from empower.vbsp import EP_OPERATION_SET
 from empower.vbsp import EP_OPERATION_ADD
 
@@ -36,6 +42,9 @@ T_TYPE_SHARED = "shared"
 T_TYPE_UNIQUE = "unique"
 T_TYPES = [T_TYPE_SHARED, T_TYPE_UNIQUE]
 
+# maximum number of generated BSSIDs remembered by a tenant
+BSSID_CACHE_SIZE = 4096
+
 
 class Tenant:
     """Tenant object representing a network slice.
@@ -85,6 +94,16 @@ class Tenant:
         self.slices = {}
         self.components = {}
 
+        # the tenant prefix and the first three bytes of the generated
+        # bssids (the prefix with the multicast bit cleared)
+        self.__prefix = EtherAddress(bytes.fromhex(tenant_id.hex[0:12]))
+        self.__bssid_prefix = \
+            bytes([self.__prefix.to_raw()[0] & 0xFE]) + \
+            self.__prefix.to_raw()[1:3]
+
+        # the generated bssids in least recently used order
+        self.__bssids = OrderedDict()
+
     @property
     def wtps(self):
         """Return WTPs. """
@@ -126,20 +145,65 @@ class Tenant:
     def get_prefix(self):
         """Return tenant prefix."""
 
-        tokens = [self.tenant_id.hex[0:12][i:i + 2] for i in range(0, 12, 2)]
-        return EtherAddress(':'.join(tokens))
+        return self.__prefix
+
+    @property
+    def bssid_prefix(self):
+        """Return the first three bytes of the generated BSSIDs."""
+
+        return self.__bssid_prefix
+
+    def add_vap(self, vap):
+        """Add a VAP to this tenant, to its WTP and to the BSSID index."""
+
+        from empower.main import RUNTIME
+
+        self.vaps[vap.bssid] = vap
+        vap.block.radio.vaps[vap.bssid] = vap
+        RUNTIME.tenants_by_bssid[vap.bssid] = self
+
+    def remove_vap(self, bssid):
+        """Remove a VAP from this tenant, its WTP and the BSSID index."""
+
+        from empower.main import RUNTIME
+
+        vap = self.vaps.pop(bssid)
+        vap.block.radio.vaps.pop(bssid, None)
+
+        if RUNTIME.tenants_by_bssid.get(bssid) is self:
+            del RUNTIME.tenants_by_bssid[bssid]
 
     def generate_bssid(self, mac):
-        """ Generate a new BSSID address. """
+        """ Generate a new BSSID address.
+
+        BSSIDs are a function of the tenant id and of the station address,
+        so the last BSSID_CACHE_SIZE of them are remembered and looked up on
+        the following calls.
+        """
+
+        try:
+            bssid = self.__bssids[mac]
+            self.__bssids.move_to_end(mac)
+            return bssid
+        except KeyError:
+            pass
+
+        if len(self.__bssids) >= BSSID_CACHE_SIZE:
+            self.__bssids.popitem(last=False)
 
-        base_mac = self.get_prefix()
+        bssid = self.__generate_bssid(mac)
+        self.__bssids[mac] = bssid
 
-        base = str(base_mac).split(":")[0:3]
-        unicast_addr_mask = int(base[0], 16) & 0xFE
-        base[0] = str(format(unicast_addr_mask, 'X'))
-        suffix = str(mac).split(":")[3:6]
+        return bssid
 
-        return EtherAddress(":".join(base + suffix))
+    def __generate_bssid(self, mac):
+        """ Compute the BSSID address.
+
+        The first three bytes are the tenant prefix (with the multicast bit
+        cleared), the last three bytes are the ones of the station address.
+        """
+
+        return EtherAddress(self.__bssid_prefix + mac.to_raw()[3:6])
 
     def add_endpoint(self, endpoint_id, endpoint_name, datapath, ports):
         """Add Endpoint."""
@@ -277,6 +341,8 @@ class Tenant:
             ValueError, if the dscp is not valid
         """
 
+        from empower.main import RUNTIME
+
         # create new instance
         slc = Slice(dscp, self, request)
 
@@ -324,6 +390,7 @@ class Tenant:
 
         # store slice
         self.slices[dscp] = slc
+        RUNTIME.journal.record(J_SLICE, (self.tenant_id, dscp), J_ADDED)
 
         # create slice on WTPs
         for wtp_addr in self.wtps:
@@ -364,6 +431,8 @@ class Tenant:
             ValueError, if the dscp is not valid
         """
 
+        from empower.main import RUNTIME
+
         # create new instance
         slc = Slice(dscp, self, request)
         tenant_id = self.tenant_id
@@ -439,6 +508,7 @@ class Tenant:
 
         # store slice
         self.slices[dscp] = slc
+        RUNTIME.journal.record(J_SLICE, (self.tenant_id, dscp), J_UPDATED)
 
         # create slice on WTPs
         for wtp_addr in self.wtps:
@@ -488,6 +558,8 @@ class Tenant:
             ValueError, if the dscp is not valid
         """
 
+        from empower.main import RUNTIME
+
         # fetch slice
         slc = self.slices[dscp]
         tenant_id = self.tenant_id
@@ -560,6 +632,7 @@ class Tenant:
 
         # remove slice
         del self.slices[dscp]
+        RUNTIME.journal.record(J_SLICE, (self.tenant_id, dscp), J_REMOVED)
 
     def __str__(self):
         return str(self.tenant_id)
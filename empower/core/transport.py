@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Remote module callbacks delivery.
+
+Remote callbacks are [url, method] lists. Every url is an endpoint with its
+own delivery thread, connection and bounded queue, so that a slow collector
+only delays its own events. The transport used for an endpoint depends on
+the url scheme, XML-RPC is used for http and https urls.
+"""
+
+import threading
+import time
+import xmlrpc.client
+
+from collections import deque
+from urllib.parse import urlparse
+
+import empower.logger
+
+# maximum number of events waiting at each endpoint
+QUEUE_SIZE = 1000
+
+# maximum number of events delivered with a single request
+BATCH_SIZE = 50
+
+# delivery threads exit (closing the connection) after this many seconds
+# without events
+IDLE_TIMEOUT = 60
+
+# queue policies, i.e. the event dropped when the queue is full
+P_DROP_OLDEST = "drop_oldest"
+P_DROP_NEWEST = "drop_newest"
+
+POLICIES = [P_DROP_OLDEST, P_DROP_NEWEST]
+
+
+class Event:
+    """An event waiting to be delivered.
+
+    Attributes:
+        key: the event source, events with the same key can be coalesced
+        method: the remote method
+        payload: the remote method argument
+        queued: the time at which the event was queued
+    """
+
+    __slots__ = ('key', 'method', 'payload', 'queued')
+
+    def __init__(self, key, method, payload):
+        self.key = key
+        self.method = method
+        self.payload = payload
+        self.queued = time.time()
+
+
+class Endpoint:
+    """A remote callbacks endpoint.
+
+    Events are queued by the caller and delivered in batches by a thread.
+    When the queue is full the oldest event (drop_oldest) or the new event
+    (drop_newest) is dropped. Events sent with coalesce set (e.g. by modules
+    whose events are snapshots of the module state) replace the queued
+    event with the same key and method, if any, instead of being queued.
+    Subclasses implement deliver().
+
+    Attributes:
+        url: the endpoint url
+        queue_size: the maximum number of queued events
+        batch_size: the maximum number of events delivered at once
+        policy: the queue policy
+        queue: the queued events
+        queued: the number of events queued
+        delivered: the number of events delivered
+        dropped: the number of events dropped because the queue was full
+        coalesced: the number of events replaced by a newer one
+        failed: the number of events whose delivery failed
+        batches: the number of requests sent
+        latency: the average delivery latency (in ms)
+        max_latency: the maximum delivery latency (in ms)
+    """
+
+    def __init__(self, url, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE,
+                 policy=P_DROP_OLDEST):
+
+        if policy not in POLICIES:
+            raise ValueError("Invalid policy %s" % policy)
+
+        self.url = url
+        self.queue_size = int(queue_size)
+        self.batch_size = int(batch_size)
+        self.policy = policy
+        self.queue = deque()
+        self.queued = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.batches = 0
+        self.latency = 0.0
+        self.max_latency = 0.0
+
+        self.__pending = {}
+        self.__lock = threading.Condition()
+        self.__thread = None
+
+        self.log = empower.logger.get_logger()
+
+    def send(self, key, method, payload, coalesce=False):
+        """Queue an event, the event is delivered in background."""
+
+        with self.__lock:
+
+            self.queued += 1
+
+            if coalesce:
+
+                event = self.__pending.get((key, method))
+
+                if event:
+                    event.payload = payload
+                    self.coalesced += 1
+                    return
+
+            if len(self.queue) >= self.queue_size:
+
+                self.dropped += 1
+
+                if self.policy == P_DROP_NEWEST:
+                    return
+
+                self.__pop()
+
+            event = Event(key, method, payload)
+            self.queue.append(event)
+
+            if coalesce:
+                self.__pending[(key, method)] = event
+
+            if not self.__thread:
+                self.__thread = threading.Thread(target=self.__run,
+                                                 name=self.url,
+                                                 daemon=True)
+                self.__thread.start()
+
+            self.__lock.notify()
+
+    def __pop(self):
+
+        event = self.queue.popleft()
+
+        if self.__pending.get((event.key, event.method)) is event:
+            del self.__pending[(event.key, event.method)]
+
+        return event
+
+    def __next_batch(self):
+
+        with self.__lock:
+
+            if not self.queue:
+                self.__lock.wait(IDLE_TIMEOUT)
+
+            if not self.queue:
+                self.close()
+                self.__thread = None
+                return None
+
+            count = min(len(self.queue), self.batch_size)
+
+            return [self.__pop() for _ in range(count)]
+
+    def __run(self):
+
+        while True:
+
+            batch = self.__next_batch()
+
+            if not batch:
+                return
+
+            self.batches += 1
+
+            try:
+                failed = self.deliver(batch)
+            except Exception as ex:
+                self.log.warning("Unable to deliver %u events to %s: %s",
+                                 len(batch), self.url, ex)
+                failed = len(batch)
+                self.close()
+
+            now = time.time()
+            count = self.delivered + self.failed
+
+            for event in batch:
+                count += 1
+                latency = (now - event.queued) * 1000
+                self.max_latency = max(self.max_latency, latency)
+                self.latency += (latency - self.latency) / count
+
+            self.failed += failed
+            self.delivered += len(batch) - failed
+
+    def deliver(self, batch):
+        """Deliver a batch of events, return the number of failures."""
+
+        raise NotImplementedError()
+
+    def close(self):
+        """Close the connection to the endpoint."""
+
+        pass
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        return {'url': self.url,
+                'policy': self.policy,
+                'queue_size': self.queue_size,
+                'batch_size': self.batch_size,
+                'queue_depth': len(self.queue),
+                'queued': self.queued,
+                'delivered': self.delivered,
+                'dropped': self.dropped,
+                'coalesced': self.coalesced,
+                'failed': self.failed,
+                'batches': self.batches,
+                'latency': round(self.latency, 3),
+                'max_latency': round(self.max_latency, 3)}
+
+
+class XMLRPCEndpoint(Endpoint):
+    """An XML-RPC endpoint.
+
+    The connection is kept open between requests. Batches are delivered
+    with system.multicall, if the server does not support it the events
+    are delivered one by one.
+
+    Attributes:
+        multicall: False if the server does not support system.multicall
+    """
+
+    def __init__(self, url, **kwargs):
+
+        super().__init__(url, **kwargs)
+
+        self.multicall = True
+        self.__proxy = None
+
+    def deliver(self, batch):
+        """Deliver a batch of events, return the number of failures."""
+
+        if not self.__proxy:
+            self.__proxy = xmlrpc.client.ServerProxy(self.url)
+
+        if len(batch) > 1 and self.multicall:
+
+            multicall = xmlrpc.client.MultiCall(self.__proxy)
+
+            for event in batch:
+                getattr(multicall, event.method)(event.payload)
+
+            try:
+                results = multicall().results
+            except xmlrpc.client.Fault:
+                self.log.info("%s does not support multicall", self.url)
+                self.multicall = False
+                return self.deliver(batch)
+
+            # faults are reported as dictionaries
+            return sum(1 for result in results if isinstance(result, dict))
+
+        failed = 0
+
+        for event in batch:
+            try:
+                getattr(self.__proxy, event.method)(event.payload)
+            except xmlrpc.client.Fault:
+                failed += 1
+
+        return failed
+
+    def close(self):
+        """Close the connection to the endpoint."""
+
+        if self.__proxy:
+            self.__proxy("close")()
+            self.__proxy = None
+
+
+class Transport:
+    """Delivers the remote module callbacks.
+
+    Attributes:
+        transports: the endpoint class of every url scheme
+        endpoints: the endpoints by url
+        queue_size: the queue size of new endpoints
+        batch_size: the batch size of new endpoints
+        policy: the queue policy of new endpoints
+    """
+
+    def __init__(self, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE,
+                 policy=P_DROP_OLDEST):
+
+        self.transports = {'http': XMLRPCEndpoint, 'https': XMLRPCEndpoint}
+        self.endpoints = {}
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.policy = policy
+
+    def register(self, scheme, endpoint_class):
+        """Use endpoint_class for the urls with the given scheme."""
+
+        self.transports[scheme] = endpoint_class
+
+    def send(self, callback, key, payload, coalesce=False):
+        """Deliver payload to a [url, method] callback in background.
+
+        If coalesce is set the payload replaces the one of a queued event
+        with the same key, if any.
+        """
+
+        url, method = callback
+
+        if url not in self.endpoints:
+
+            scheme = urlparse(url).scheme
+
+            if scheme not in self.transports:
+                raise ValueError("Invalid callback url %s" % url)
+
+            self.endpoints[url] = \
+                self.transports[scheme](url, queue_size=self.queue_size,
+                                        batch_size=self.batch_size,
+                                        policy=self.policy)
+
+        self.endpoints[url].send(key, method, payload, coalesce)
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        return {'queue_size': self.queue_size,
+                'batch_size': self.batch_size,
+                'policy': self.policy,
+                'endpoints': list(self.endpoints.values())}
+
+
+TRANSPORT = Transport()
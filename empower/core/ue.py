@@ -44,11 +44,16 @@ class UE:
         self.imsi = imsi
         self.tmsi = tmsi
 
-        # set on different situations, e.g. after an handover
-        self.rnti = rnti
+        # the rnti (set on different situations, e.g. after an handover) and
+        # the current cell, the ue is in the ues index of the cell vbs and in
+        # the runtime (rnti, pci, vbs) index
+        self._rnti = None
+        self._cell = None
 
-        # the current cell
-        self._cell = cell
+        # logger :)
+        self.log = empower.logger.get_logger()
+
+        self.__update(rnti, cell)
 
         # current slice to which the UE is subscribed
         self._slice = DSCP("0x00")
@@ -65,9 +70,6 @@ class UE:
         # the ue measurements, this is set by a ue_measurement module
         self.ue_measurements = {}
 
-        # logger :)
-        self.log = empower.logger.get_logger()
-
     def handle_ue_handover_response(self, origin_vbs, target_vbs, origin_rnti,
                                     target_rnti, origin_pci, target_pci,
                                     opcode):
@@ -86,8 +88,7 @@ class UE:
         if opcode == 1:
 
             # set new cell and rnti
-            self._cell = target_vbs.cells[target_pci]
-            self.rnti = target_rnti
+            self._set_cell(target_vbs.cells[target_pci], target_rnti)
 
             # set state to running
             self._state = PROCESS_RUNNING
@@ -98,8 +99,7 @@ class UE:
         if origin_vbs == target_vbs:
 
             # reset new cell and rnti
-            self._cell = origin_vbs.cells[target_pci]
-            self.rnti = origin_rnti
+            self._set_cell(origin_vbs.cells[target_pci], origin_rnti)
 
             # set state to running
             self._state = PROCESS_RUNNING
@@ -186,6 +186,55 @@ class UE:
         else:
             IOError("Setting blocks on invalid state: %s" % self.state)
 
+    @property
+    def rnti(self):
+        """Get the RNTI."""
+
+        return self._rnti
+
+    @rnti.setter
+    def rnti(self, rnti):
+        """Set the RNTI."""
+
+        self.__update(rnti, self._cell)
+
+    def _set_cell(self, cell, rnti=None):
+        """Set the current cell and, optionally, the RNTI in that cell."""
+
+        self.__update(self._rnti if rnti is None else rnti, cell)
+
+    def __update(self, rnti, cell):
+        """Set rnti and cell and update the VBS and the runtime indexes.
+
+        Entries of the runtime index are only replaced or removed if they
+        belong to this UE, another UE may be using the same RNTI.
+        """
+
+        from empower.main import RUNTIME
+
+        if self._cell:
+
+            self._cell.vbs.ues.pop(self.ue_id, None)
+
+            key = (self._rnti, self._cell.pci, self._cell.vbs)
+
+            if RUNTIME.ues_by_rnti.get(key) is self:
+                del RUNTIME.ues_by_rnti[key]
+
+        self._rnti = rnti
+        self._cell = cell
+
+        if self._cell:
+
+            self._cell.vbs.ues[self.ue_id] = self
+
+            key = (rnti, cell.pci, cell.vbs)
+            other = RUNTIME.ues_by_rnti.setdefault(key, self)
+
+            if other is not self:
+                self.log.warning("RNTI %u at %s (%u) already used by UE %s",
+                                 rnti, cell.vbs.addr, cell.pci, other.ue_id)
+
     @property
     def slice(self):
         """Get the slice."""
@@ -34,6 +34,7 @@ class VBS(BasePNFDev):
         datapath: the associated OF switch
         state: this device status
         log: logging facility
+        ues: the UEs attached to a cell of this VBS
     """
 
     ALIAS = "vbses"
@@ -41,6 +42,7 @@ class VBS(BasePNFDev):
     def __init__(self, addr, label):
         super().__init__(addr, label)
         self.cells = {}
+        self.ues = {}
 
     def cells(self):
         """Return all cells supported by this VBS."""
@@ -58,4 +60,6 @@ class VBS(BasePNFDev):
 
         out = super().to_dict()
         out['cells'] = self.cells
+        out['send_queue'] = \
+            self.connection.send_queue if self.connection else None
         return out
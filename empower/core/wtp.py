@@ -37,6 +37,8 @@ class WTP(BasePNFDev):
         datapath: the associated OF switch
         state: this device status
         log: logging facility
+        lvaps: the LVAPs with at least one block on this WTP
+        vaps: the VAPs hosted by this WTP
     """
 
     ALIAS = "wtps"
@@ -44,12 +46,16 @@ class WTP(BasePNFDev):
     def __init__(self, addr, label):
         super().__init__(addr, label)
         self.supports = set()
+        self.lvaps = {}
+        self.vaps = {}
 
     def to_dict(self):
         """Return a JSON-serializable dictionary representing the CPP."""
 
         out = super().to_dict()
         out['supports'] = self.supports
+        out['send_queue'] = \
+            self.connection.send_queue if self.connection else None
         return out
 
     def blocks(self):
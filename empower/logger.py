@@ -15,11 +15,52 @@
 # specific language governing permissions and limitations
 # under the License.
 
-"""EmPOWER logging package."""
+"""EmPOWER logging package.
 
+Besides the logger factory this module provides the tools used to keep
+logging off the critical path:
+
+    - sample(log, key) tells whether a hot path message (i.e. a message
+      logged for every protocol message sent or received) must be logged.
+      The check is guarded by isEnabledFor, so nothing is formatted if the
+      level is disabled, and supports per-key rate sampling (log one
+      message every N).
+    - setup_async() moves the root handlers to a background thread. Log
+      records are pushed to a bounded queue by a QueueHandler and written
+      by a QueueListener, so disk writes never block the IOLoop. When the
+      queue is full records below WARNING are dropped, the others wait
+      for room in the queue.
+
+Both are configured from the [empower] and [empower_sampling] sections of
+the logging configuration file, e.g.:
+
+    [empower]
+    async=true
+    queue_size=10000
+    sample_rate=1
+
+    [empower_sampling]
+    hello=100
+    status_lvap=10
+"""
+
+import copy
 import inspect
 import os
+import queue
+import atexit
 import logging
+import configparser
+
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
+
+# log every hot path message by default
+DEFAULT_SAMPLE_RATE = 1
+
+# maximum number of records waiting to be written, records below WARNING are
+# dropped when the queue is full
+DEFAULT_QUEUE_SIZE = 10000
 
 PATH = inspect.stack()[0][1]
 EXT_PATH = PATH[0:PATH.rindex(os.sep)]
@@ -58,3 +99,153 @@ def get_logger(name=None, more_frames=0):
             name = name.rsplit(".__init__", 1)[0]
 
     return logging.getLogger(name)
+
+
+class MessageSampler:
+    """Per-key log sampling.
+
+    Attributes:
+        default: log one message every default for keys without a rate
+        rates: the sampling rate of specific keys (e.g. message names)
+        counters: the number of messages seen for each key
+    """
+
+    def __init__(self, default=DEFAULT_SAMPLE_RATE, rates=None):
+
+        self.default = default
+        self.rates = rates if rates else {}
+        self.counters = {}
+
+    def __call__(self, key):
+        """Return True if the message must be logged."""
+
+        rate = self.rates.get(key, self.default)
+
+        if rate == 1:
+            return True
+
+        if rate < 1:
+            return False
+
+        count = self.counters.get(key, 0)
+        self.counters[key] = count + 1
+
+        return count % rate == 0
+
+
+SAMPLER = MessageSampler()
+
+
+def sample(log, key, level=logging.INFO):
+    """Return True if a hot path message must be logged.
+
+    Args:
+        log: the logger
+        key: the sampling key (e.g. the message name)
+        level: the level the message will be logged at
+    """
+
+    return log.isEnabledFor(level) and SAMPLER(key)
+
+
+# used to render the exceptions of the queued records
+FORMATTER = logging.Formatter()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """A QueueHandler that drops records when the queue is full.
+
+    Records at WARNING or above are never dropped, if the queue is full
+    they wait until the listener makes room.
+
+    Attributes:
+        dropped: the number of dropped records
+    """
+
+    def __init__(self, records):
+
+        super().__init__(records)
+        self.dropped = 0
+
+    def emit(self, record):
+
+        # do not format the records that would be dropped anyway
+        if record.levelno < logging.WARNING and self.queue.full():
+            self.dropped += 1
+            return
+
+        try:
+            self.enqueue(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def prepare(self, record):
+        # the arguments (e.g. LVAPs and WTPs) are rendered now, since they
+        # are changed by the IOLoop while the record waits in the queue, the
+        # listener handlers apply their own format to the message
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
+
+    def enqueue(self, record):
+
+        if record.levelno >= logging.WARNING:
+            self.queue.put(record)
+            return
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_async(queue_size=DEFAULT_QUEUE_SIZE):
+    """Move the root handlers to a background thread.
+
+    Returns the QueueListener writing the records.
+    """
+
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+
+    records = queue.Queue(queue_size)
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+
+    for handler in handlers:
+        root.removeHandler(handler)
+
+    root.addHandler(DroppingQueueHandler(records))
+
+    listener.start()
+
+    # flush the pending records on exit
+    atexit.register(listener.stop)
+
+    return listener
+
+
+def configure(config_file):
+    """Set up sampling and async logging from the configuration file."""
+
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(config_file)
+
+    if config.has_section("empower"):
+
+        SAMPLER.default = config.getint("empower", "sample_rate",
+                                        fallback=DEFAULT_SAMPLE_RATE)
+
+        if config.getboolean("empower", "async", fallback=False):
+            setup_async(config.getint("empower", "queue_size",
+                                      fallback=DEFAULT_QUEUE_SIZE))
+
+    if config.has_section("empower_sampling"):
+        SAMPLER.rates = {key: int(value) for key, value
+                         in config.items("empower_sampling")}
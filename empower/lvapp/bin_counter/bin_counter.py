@@ -28,11 +28,18 @@ from construct import UBInt16
 from construct import UBInt32
 from construct import Array
 
+import empower.logger
+
 from empower.datatypes.etheraddress import EtherAddress
 from empower.lvapp.lvappserver import ModuleLVAPPWorker
 from empower.core.module import ModulePeriodic
+from empower.core.module import freeze
 from empower.core.app import EmpowerApp
 from empower.lvapp import PT_VERSION
+from empower.core.sendqueue import PRIO_STATS
+from empower.lvapp.codec import Codec
+from empower.lvapp.codec import CodecArray
+from empower.lvapp.codec import register_codec
 
 from empower.main import RUNTIME
 
@@ -61,6 +68,16 @@ STATS_RESPONSE = \
            UBInt16("nb_rx"),
            Array(lambda ctx: ctx.nb_tx + ctx.nb_rx, STATS))
 
+STATS_RESPONSE_CODEC = \
+    Codec("stats_response", "BBIII6s6sHH",
+          ("version", "type", "length", "seq", "module_id", "wtp", "sta",
+           "nb_tx", "nb_rx"),
+          CodecArray("stats", "HI", ("bytes", "count"),
+                     count=lambda msg: msg.nb_tx + msg.nb_rx,
+                     sequence=True))
+
+register_codec(PT_STATS_RESPONSE, STATS_RESPONSE_CODEC)
+
 
 class BinCounter(ModulePeriodic):
     """BinCounter object.
@@ -84,6 +101,7 @@ class BinCounter(ModulePeriodic):
 
     MODULE_NAME = "bin_counter"
     REQUIRED = ['module_type', 'worker', 'tenant_id', 'lvap']
+    COALESCE = True
 
     def __init__(self):
 
@@ -105,11 +123,11 @@ class BinCounter(ModulePeriodic):
 
         self.last = None
 
-    def __eq__(self, other):
+    @property
+    def key(self):
+        """Return the identity key."""
 
-        return super().__eq__(other) and \
-            self.lvap == other.lvap and \
-            self.bins == other.bins
+        return super().key + (self.lvap, freeze(self.bins))
 
     @property
     def lvap(self):
@@ -196,12 +214,15 @@ class BinCounter(ModulePeriodic):
                               module_id=self.module_id,
                               sta=lvap.addr.to_raw())
 
-        self.log.info("Sending %s request to %s @ %s (id=%u)",
-                      self.MODULE_NAME, lvap.addr, lvap.wtp.addr,
-                      self.module_id)
+        if empower.logger.sample(self.log, self.MODULE_NAME):
+            self.log.info("Sending %s request to %s @ %s (id=%u)",
+                          self.MODULE_NAME, lvap.addr, lvap.wtp.addr,
+                          self.module_id)
 
         msg = STATS_REQUEST.build(stats_req)
-        lvap.wtp.connection.stream.write(msg)
+        lvap.wtp.connection.send_queue.write(msg, PRIO_STATS,
+                                             (self.MODULE_NAME,
+                                              self.module_id))
 
     def fill_bytes_samples(self, data):
         """ Compute samples.
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""LVAPP precompiled message codecs.
+
+A codec is a drop-in replacement for a construct Struct (it exposes name,
+parse, build and sizeof) built on top of a precompiled struct.Struct. Parsed
+messages are returned as lightweight records using __slots__. Codecs can be
+registered for a message type with register_codec and are then used by the
+LVAPP server in place of the construct parser for that message type.
+"""
+
+import struct
+
+from empower.datatypes.ssid import WIFI_NWID_MAXSIZE
+from empower.lvapp import PT_HELLO
+from empower.lvapp import PT_PROBE_REQUEST
+from empower.lvapp import PT_AUTH_REQUEST
+from empower.lvapp import PT_ASSOC_REQUEST
+from empower.lvapp import PT_STATUS_LVAP
+from empower.lvapp import PT_ADD_LVAP_RESPONSE
+from empower.lvapp import PT_DEL_LVAP_RESPONSE
+
+CODEC_STRUCT = "struct"
+CODEC_CONSTRUCT = "construct"
+CODEC_TYPES = [CODEC_STRUCT, CODEC_CONSTRUCT]
+
+SSID_FMT = "%us" % (WIFI_NWID_MAXSIZE + 1)
+
+
+class Record:
+    """A parsed message.
+
+    Fields can be accessed both as attributes and as items, either by name
+    or by position, e.g.: msg.sta, msg['sta'], msg[5].
+    """
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+
+        for field, value in zip(self.__slots__, values):
+            setattr(self, field, value)
+
+    def __getitem__(self, key):
+
+        if isinstance(key, int):
+            return getattr(self, self.__slots__[key])
+
+        return getattr(self, key)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __eq__(self, other):
+
+        if isinstance(other, Record):
+            return self.__slots__ == other.__slots__ and \
+                list(self) == list(other)
+
+        return False
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __iter__(self):
+        return (getattr(self, field) for field in self.__slots__)
+
+    def __repr__(self):
+
+        fields = ', '.join('%s=%r' % (field, getattr(self, field))
+                           for field in self.__slots__)
+
+        return "%s(%s)" % (self.__class__.__name__, fields)
+
+
+def record(name, fields):
+    """Return a new Record class with the specified fields."""
+
+    return type(name, (Record,), {'__slots__': tuple(fields)})
+
+
+class Flags:
+    """A 16 bits wide bit field.
+
+    Attributes:
+        name: the field name
+        bits: a tuple of (name, position) pairs, position 0 being the least
+          significant bit
+    """
+
+    fmt = "H"
+
+    def __init__(self, name, *bits):
+
+        self.name = name
+        self.bits = bits
+        self.record = record(name, [bit[0] for bit in bits])
+
+    def decode(self, value):
+        """Decode the bit field."""
+
+        return self.record(*[(value >> pos) & 1 for _, pos in self.bits])
+
+    def encode(self, value):
+        """Encode the bit field."""
+
+        out = 0
+
+        for bit, pos in self.bits:
+            if getattr(value, bit):
+                out |= 1 << pos
+
+        return out
+
+
+class CodecArray:
+    """A trailing array of fixed size entries.
+
+    Attributes:
+        name: the field name
+        fmt: the struct format of a single entry (without byte order)
+        fields: the entry fields (names or Flags)
+        count: a callable returning the number of entries given the parsed
+          message, or None if the array extends to the end of the message
+        sequence: if True entries are positional (construct Sequence),
+          otherwise they are accessed by name (construct Struct)
+    """
+
+    def __init__(self, name, fmt, fields, count=None, sequence=False):
+
+        self.name = name
+        self.struct = struct.Struct("!" + fmt)
+        self.fields = [x.name if isinstance(x, Flags) else x for x in fields]
+        self.converters = [(idx, x) for idx, x in enumerate(fields)
+                           if isinstance(x, Flags)]
+        self.count = count
+        self.sequence = sequence
+        self.record = None
+
+        if not self.sequence or self.converters:
+            self.record = record(name, self.fields)
+
+    def decode(self, data, offset, msg):
+        """Decode the array starting at offset."""
+
+        size = self.struct.size
+
+        if self.count:
+            count = self.count(msg)
+            if offset + count * size > len(data):
+                raise ValueError("Not enough data for %u %s entries" %
+                                 (count, self.name))
+        else:
+            count = (len(data) - offset) // size
+
+        with memoryview(data) as view:
+
+            chunk = view[offset:offset + count * size]
+
+            try:
+                entries = self.struct.iter_unpack(chunk)
+
+                if not self.record:
+                    return list(entries)
+
+                if not self.converters:
+                    return [self.record(*entry) for entry in entries]
+
+                out = []
+
+                for entry in entries:
+                    entry = list(entry)
+                    for idx, converter in self.converters:
+                        entry[idx] = converter.decode(entry[idx])
+                    out.append(self.record(*entry))
+
+                return out
+
+            finally:
+                chunk.release()
+
+    def encode(self, entries):
+        """Encode the array."""
+
+        out = []
+
+        for entry in entries:
+
+            if self.sequence:
+                values = list(entry)
+            else:
+                values = [getattr(entry, field) for field in self.fields]
+
+            for idx, converter in self.converters:
+                values[idx] = converter.encode(values[idx])
+
+            out.append(self.struct.pack(*values))
+
+        return b''.join(out)
+
+
+class Codec:
+    """A precompiled LVAPP message codec.
+
+    Attributes:
+        name: the message name (same as the construct Struct it replaces)
+        struct: the precompiled struct of the fixed size part
+        fields: the fields of the fixed size part (names or Flags)
+        array: an optional trailing array (CodecArray)
+        record: the record class used for parsed messages
+    """
+
+    def __init__(self, name, fmt, fields, array=None):
+
+        self.name = name
+        self.struct = struct.Struct("!" + fmt)
+        self.fields = [x.name if isinstance(x, Flags) else x for x in fields]
+        self.converters = [(idx, x) for idx, x in enumerate(fields)
+                           if isinstance(x, Flags)]
+        self.array = array
+
+        slots = list(self.fields)
+
+        if self.array:
+            slots.append(self.array.name)
+
+        self.record = record(name, slots)
+
+    def sizeof(self):
+        """Return the size of the fixed part of the message."""
+
+        return self.struct.size
+
+    def parse(self, data):
+        """Parse a message from a bytes-like object."""
+
+        values = self.struct.unpack_from(data, 0)
+
+        if self.converters:
+            values = list(values)
+            for idx, converter in self.converters:
+                values[idx] = converter.decode(values[idx])
+
+        msg = self.record(*values)
+
+        if self.array:
+            entries = self.array.decode(data, self.struct.size, msg)
+            setattr(msg, self.array.name, entries)
+
+        return msg
+
+    def build(self, msg):
+        """Build a message from a record or a construct Container."""
+
+        values = [getattr(msg, field) for field in self.fields]
+
+        for idx, converter in self.converters:
+            values[idx] = converter.encode(values[idx])
+
+        out = self.struct.pack(*values)
+
+        if self.array:
+            out += self.array.encode(getattr(msg, self.array.name))
+
+        return out
+
+
+CODECS = {}
+
+
+def register_codec(pt_type, codec):
+    """Register a codec for the specified message type."""
+
+    CODECS[pt_type] = codec
+
+
+HEADER_FIELDS = ("version", "type", "length", "seq")
+
+LVAP_FLAGS = Flags("flags",
+                   ("set_mask", 2),
+                   ("associated", 1),
+                   ("authenticated", 0))
+
+NETWORKS = CodecArray("networks", "6s" + SSID_FMT, ("bssid", "ssid"))
+
+HELLO = Codec("hello", "BBII6sI",
+              HEADER_FIELDS + ("wtp", "period"))
+
+PROBE_REQUEST = Codec("probe_request", "BBII6s6s6sBBB" + SSID_FMT,
+                      HEADER_FIELDS + ("wtp", "sta", "hwaddr", "channel",
+                                       "band", "supported_band", "ssid"))
+
+AUTH_REQUEST = Codec("auth_request", "BBII6s6s6s",
+                     HEADER_FIELDS + ("wtp", "sta", "bssid"))
+
+ASSOC_REQUEST = Codec("assoc_request", "BBII6s6s6s6sBBB" + SSID_FMT,
+                      HEADER_FIELDS + ("wtp", "sta", "bssid", "hwaddr",
+                                       "channel", "band", "supported_band",
+                                       "ssid"))
+
+STATUS_LVAP = Codec("status_lvap", "BBIIHH6s6s6s6sBBB6s" + SSID_FMT,
+                    HEADER_FIELDS + (LVAP_FLAGS, "assoc_id", "wtp", "sta",
+                                     "encap", "hwaddr", "channel", "band",
+                                     "supported_band", "bssid", "ssid"),
+                    NETWORKS)
+
+ADD_LVAP_RESPONSE = Codec("add_lvap_response", "BBII6s6sII",
+                          HEADER_FIELDS + ("wtp", "sta", "module_id",
+                                           "status"))
+
+DEL_LVAP_RESPONSE = Codec("del_lvap_response", "BBII6s6sII",
+                          HEADER_FIELDS + ("wtp", "sta", "module_id",
+                                           "status"))
+
+register_codec(PT_HELLO, HELLO)
+register_codec(PT_PROBE_REQUEST, PROBE_REQUEST)
+register_codec(PT_AUTH_REQUEST, AUTH_REQUEST)
+register_codec(PT_ASSOC_REQUEST, ASSOC_REQUEST)
+register_codec(PT_STATUS_LVAP, STATUS_LVAP)
+register_codec(PT_ADD_LVAP_RESPONSE, ADD_LVAP_RESPONSE)
+register_codec(PT_DEL_LVAP_RESPONSE, DEL_LVAP_RESPONSE)
@@ -27,10 +27,15 @@ from construct import Container
 from construct import Struct
 from construct import Array
 
+import empower.logger
+
 from empower.datatypes.etheraddress import EtherAddress
 from empower.core.module import ModulePeriodic
 from empower.core.resourcepool import ResourceBlock
 from empower.lvapp import PT_VERSION
+from empower.core.sendqueue import PRIO_STATS
+from empower.lvapp.codec import Codec
+from empower.lvapp.codec import CodecArray
 
 from empower.main import RUNTIME
 
@@ -63,12 +68,23 @@ POLLER_RESPONSE = Struct("poller_response",
                          UBInt16("nb_entries"),
                          Array(lambda ctx: ctx.nb_entries, POLLER_ENTRY_TYPE))
 
+POLLER_RESPONSE_CODEC = \
+    Codec("poller_response", "BBIII6sH",
+          ("version", "type", "length", "seq", "module_id", "wtp",
+           "nb_entries"),
+          CodecArray("img_entries", "6sBbIIb",
+                     ("addr", "last_rssi_std", "last_rssi_avg",
+                      "last_packets", "hist_packets", "mov_rssi"),
+                     count=lambda msg: msg.nb_entries,
+                     sequence=True))
+
 
 class Maps(ModulePeriodic):
     """ A maps poller. """
 
     MODULE_NAME = None
     REQUIRED = ['module_type', 'worker', 'tenant_id', 'block']
+    COALESCE = True
     PT_REQUEST = None
 
     def __init__(self):
@@ -81,8 +97,11 @@ class Maps(ModulePeriodic):
         # data structures
         self.maps = {}
 
-    def __eq__(self, other):
-        return super().__eq__(other) and self.block == other.block
+    @property
+    def key(self):
+        """Return the identity key."""
+
+        return super().key + (self.block, )
 
     @property
     def block(self):
@@ -169,11 +188,13 @@ class Maps(ModulePeriodic):
                         channel=self.block.channel,
                         band=self.block.band)
 
-        self.log.info("Sending %s request to %s (id=%u)",
-                      self.MODULE_NAME, self.block, self.module_id)
+        if empower.logger.sample(self.log, self.MODULE_NAME):
+            self.log.info("Sending %s request to %s (id=%u)",
+                          self.MODULE_NAME, self.block, self.module_id)
 
         msg = POLLER_REQUEST.build(req)
-        wtp.connection.stream.write(msg)
+        wtp.connection.send_queue.write(msg, PRIO_STATS,
+                                        (self.MODULE_NAME, self.module_id))
 
     def handle_response(self, response):
         """Handle an incoming poller response message.
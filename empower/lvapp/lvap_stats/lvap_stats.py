@@ -29,12 +29,19 @@ from construct import BitStruct
 from construct import Padding
 from construct import Bit
 
+import empower.logger
+
 from empower.core.resourcepool import BT_L20
 from empower.core.app import EmpowerApp
 from empower.datatypes.etheraddress import EtherAddress
 from empower.lvapp.lvappserver import ModuleLVAPPWorker
 from empower.core.module import ModulePeriodic
 from empower.lvapp import PT_VERSION
+from empower.core.sendqueue import PRIO_STATS
+from empower.lvapp.codec import Codec
+from empower.lvapp.codec import CodecArray
+from empower.lvapp.codec import Flags
+from empower.lvapp.codec import register_codec
 
 from empower.main import RUNTIME
 
@@ -67,12 +74,25 @@ RATES_RESPONSE = Struct("rates_response", UBInt8("version"),
                         UBInt16("nb_entries"),
                         Array(lambda ctx: ctx.nb_entries, RATES_ENTRY))
 
+RATES_RESPONSE_CODEC = \
+    Codec("rates_response", "BBIII6sH",
+          ("version", "type", "length", "seq", "module_id", "wtp",
+           "nb_entries"),
+          CodecArray("rates", "BHII",
+                     ("rate", Flags("flags", ("mcs", 9)), "prob",
+                      "cur_prob"),
+                     count=lambda msg: msg.nb_entries,
+                     sequence=True))
+
+register_codec(PT_RATES_RESPONSE, RATES_RESPONSE_CODEC)
+
 
 class LVAPStats(ModulePeriodic):
     """ LVAPStats object. """
 
     MODULE_NAME = "lvap_stats"
     REQUIRED = ['module_type', 'worker', 'tenant_id', 'lvap']
+    COALESCE = True
 
     def __init__(self):
 
@@ -85,9 +105,11 @@ class LVAPStats(ModulePeriodic):
         self.rates = {}
         self.best_prob = None
 
-    def __eq__(self, other):
+    @property
+    def key(self):
+        """Return the identity key."""
 
-        return super().__eq__(other) and self.lvap == other.lvap
+        return super().key + (self.lvap, )
 
     @property
     def lvap(self):
@@ -141,11 +163,14 @@ class LVAPStats(ModulePeriodic):
                               module_id=self.module_id,
                               sta=lvap.addr.to_raw())
 
-        self.log.info("Sending rates request to %s @ %s (id=%u)",
-                      lvap.addr, lvap.wtp.addr, self.module_id)
+        if empower.logger.sample(self.log, self.MODULE_NAME):
+            self.log.info("Sending rates request to %s @ %s (id=%u)",
+                          lvap.addr, lvap.wtp.addr, self.module_id)
 
         msg = RATES_REQUEST.build(rates_req)
-        lvap.wtp.connection.stream.write(msg)
+        lvap.wtp.connection.send_queue.write(msg, PRIO_STATS,
+                                             (self.MODULE_NAME,
+                                              self.module_id))
 
     def handle_response(self, response):
         """Handle an incoming RATES_RESPONSE message.
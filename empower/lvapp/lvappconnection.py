@@ -18,7 +18,10 @@
 """LVAP Connection."""
 
 import time
+import struct
+
 import tornado.ioloop
+
 from tornado.iostream import StreamClosedError
 
 from construct import Container
@@ -34,7 +37,9 @@ from empower.core.resourcepool import ResourceBlock
 from empower.core.datapath import Datapath
 from empower.core.networkport import NetworkPort
 from empower.core.utils import get_xid
-from empower.lvapp import HEADER
+from empower.core.sendqueue import SendQueue
+from empower.core.sendqueue import PRIO_ASSOC
+from empower.core.sendqueue import PRIO_CONFIG
 from empower.lvapp import PT_VERSION
 from empower.lvapp import PT_BYE
 from empower.lvapp import PT_REGISTER
@@ -51,10 +56,8 @@ from empower.lvapp import PT_VAP_STATUS_REQUEST
 from empower.lvapp import PT_SET_SLICE
 from empower.lvapp import PT_DEL_SLICE
 from empower.lvapp import PT_TRANSMISSION_POLICY_STATUS_REQUEST
-from empower.lvapp import PT_HELLO
 from empower.lvapp import PT_TYPES
 from empower.lvapp import PT_DEL_VAP
-from empower.lvapp import PT_CAPS_RESPONSE
 from empower.lvapp import PT_SLICE_STATUS_REQUEST
 from empower.lvapp import PT_ADD_VAP
 from empower.core.lvap import LVAP
@@ -73,11 +76,29 @@ from empower.lvapp import PROBE_RESPONSE
 from empower.lvapp import AUTH_RESPONSE
 from empower.lvapp import ASSOC_RESPONSE
 from empower.lvapp import DEL_SLICE
-from empower.core.tenant import T_TYPE_SHARED
 from empower.core.tenant import T_TYPE_UNIQUE
+from empower.core.journal import J_LVAP
+from empower.core.journal import J_SPAWNED
 
 from empower.main import RUNTIME
 
+# header fields (version, type, length) as laid out in HEADER
+HEADER_STRUCT = struct.Struct("!BBI")
+
+# maximum number of bytes requested to the stream with a single read
+READ_CHUNK_SIZE = 65536
+
+# send queue priority class of the outgoing messages (default PRIO_CONFIG),
+# LVAP add/del are in the association class since they must not be
+# reordered with respect to the probe/auth/assoc responses. Messages are
+# queued with their station (if any) as target, so that the messages for
+# the same station are never reordered.
+PT_PRIORITIES = {PT_PROBE_RESPONSE: PRIO_ASSOC,
+                 PT_AUTH_RESPONSE: PRIO_ASSOC,
+                 PT_ASSOC_RESPONSE: PRIO_ASSOC,
+                 PT_ADD_LVAP: PRIO_ASSOC,
+                 PT_DEL_LVAP: PRIO_ASSOC}
+
 
 class LVAPPConnection:
     """LVAPP Connection.
@@ -120,6 +141,7 @@ class LVAPPConnection:
         addr: The connection source address, i.e. the WTP IP address.
         server: Pointer to the server object.
         wtp: Pointer to a WTP object.
+        send_queue: The outgoing buffer used to talk with the WTP.
     """
 
     def __init__(self, stream, addr, server):
@@ -129,113 +151,123 @@ class LVAPPConnection:
         self.server = server
         self.wtp = None
         self.stream.set_close_callback(self._on_disconnect)
-        self.__buffer = b''
-        self._hb_interval_ms = 500
-        self._hb_worker = tornado.ioloop.PeriodicCallback(self._heartbeat_cb,
-                                                          self._hb_interval_ms)
-        self._hb_worker.start()
-        self._wait()
+        self.send_queue = SendQueue(self.stream, server.send_max_bytes,
+                                    server.send_max_delay, server.send_budget)
+        self.__buffer = bytearray()
+        self.__wtp_raw = None
+        self.__wtp_addr = None
         self.log = empower.logger.get_logger()
+        tornado.ioloop.IOLoop.instance().spawn_callback(self._read_loop)
 
     def to_dict(self):
         """Return dict representation of object."""
 
         return self.addr
 
-    def _heartbeat_cb(self):
-        """ Check if wtp connection is still active. Disconnect if no hellos
-        have been received from the wtp for twice the hello period. """
-        if self.wtp and not self.stream.closed():
-            timeout = (self.wtp.period / 1000) * 3
-            if (self.wtp.last_seen_ts + timeout) < time.time():
-                self.log.info('Client inactive %s at %r',
-                              self.wtp.addr,
-                              self.addr)
+    async def _read_loop(self):
+        """ Read from the socket until the stream is closed. Bytes are
+        appended to a buffer, every complete frame in the buffer is then
+        passed to the suitable method or dropped if the packet type in
+        unknown. Trailing partial frames are kept in the buffer until the
+        next read. """
+
+        while not self.stream.closed():
+
+            try:
+                self.__buffer += \
+                    await self.stream.read_bytes(READ_CHUNK_SIZE, partial=True)
+            except StreamClosedError as stream_ex:
+                self.log.error(stream_ex)
+                return
+
+            try:
+                self._consume_frames()
+            except Exception as ex:
+                self.log.exception(ex)
                 self.stream.close()
 
-    def _on_read(self, future):
-        """ Appends bytes read from socket to a buffer. Once the full packet
-        has been read the parser is invoked and the buffers is cleared. The
-        parsed packet is then passed to the suitable method or dropped if the
-        packet type in unknown. """
+    def _consume_frames(self):
+        """ Dispatch all the complete frames currently in the buffer.
 
-        try:
-            line = future.result()
-            self.__buffer = self.__buffer + line
-        except StreamClosedError as stream_ex:
-            self.log.error(stream_ex)
-            return
+        Frames are handed to the parsers as memoryview slices of the receive
+        buffer, so no copy is made. The consumed bytes are then removed from
+        the buffer in a single operation. """
 
-        hdr = HEADER.parse(self.__buffer)
+        buffer = self.__buffer
+        offset = 0
 
-        if len(self.__buffer) < hdr.length:
-            remaining = hdr.length - len(self.__buffer)
-            future = self.stream.read_bytes(remaining)
-            future.add_done_callback(self._on_read)
-            return
+        with memoryview(buffer) as view:
 
-        try:
-            self._trigger_message(hdr.type)
-        except Exception as ex:
-            self.log.exception(ex)
-            self.stream.close()
+            while len(buffer) - offset >= HEADER_STRUCT.size:
+
+                _, msg_type, length = \
+                    HEADER_STRUCT.unpack_from(buffer, offset)
+
+                if length < HEADER_STRUCT.size:
+                    raise ValueError("Invalid frame length %u" % length)
 
-        if not self.stream.closed():
-            self._wait()
+                if len(buffer) - offset < length:
+                    break
 
-    def _trigger_message(self, msg_type):
+                frame = view[offset:offset + length]
 
-        if msg_type not in self.server.pt_types:
-            self.log.error("Unknown message type %u", msg_type)
+                try:
+                    self._trigger_message(msg_type, frame)
+                finally:
+                    frame.release()
+
+                offset += length
+
+                if self.stream.closed():
+                    break
+
+        del buffer[:offset]
+
+    def _trigger_message(self, msg_type, frame):
+
+        try:
+            parser, handler, handlers, check_connected, check_online = \
+                self.server.dispatch[msg_type]
+        except KeyError:
+            if msg_type not in self.server.pt_types:
+                self.log.error("Unknown message type %u", msg_type)
             return
 
-        if self.server.pt_types[msg_type]:
+        msg = parser.parse(frame)
 
-            msg_name = self.server.pt_types[msg_type].name
+        # the WTP address is the same for all the messages on a connection
+        if msg.wtp != self.__wtp_raw:
+            self.__wtp_raw = msg.wtp
+            self.__wtp_addr = EtherAddress(msg.wtp)
 
-            msg = self.server.pt_types[msg_type].parse(self.__buffer)
-            addr = EtherAddress(msg.wtp)
+        addr = self.__wtp_addr
 
-            try:
-                wtp = RUNTIME.wtps[addr]
-            except KeyError:
-                self.log.error("Unknown WTP (%s), closing connection", addr)
-                self.stream.close()
-                return
+        try:
+            wtp = RUNTIME.wtps[addr]
+        except KeyError:
+            self.log.error("Unknown WTP (%s), closing connection", addr)
+            self.stream.close()
+            return
 
-            valid = [PT_HELLO]
-            if not wtp.connection and msg_type not in valid:
+        if check_connected and not wtp.connection:
+            if empower.logger.sample(self.log, parser.name):
                 self.log.info("Got %s message from disconnected %s seq %u",
-                              msg_name,
-                              EtherAddress(addr),
-                              msg.seq)
-                return
+                              parser.name, addr, msg.seq)
+            return
 
+        if empower.logger.sample(self.log, parser.name):
             self.log.info("Got %s message from %s seq %u",
-                          msg_name,
-                          EtherAddress(addr),
-                          msg.seq)
-
-            valid = [PT_HELLO, PT_CAPS_RESPONSE]
-            if not wtp.is_online() and msg_type not in valid:
-                self.log.info("WTP %s not ready", wtp.addr)
-                return
-
-            handler_name = "_handle_%s" % self.server.pt_types[msg_type].name
+                          parser.name, addr, msg.seq)
 
-            if hasattr(self, handler_name):
-                handler = getattr(self, handler_name)
-                handler(wtp, msg)
+        if check_online and not wtp.is_online():
+            self.log.info("WTP %s not ready", wtp.addr)
+            return
 
-            if msg_type in self.server.pt_types_handlers:
-                for handler in self.server.pt_types_handlers[msg_type]:
-                    handler(wtp, msg)
+        if handler:
+            handler(self, wtp, msg)
 
-    def _wait(self):
-        """ Wait for incoming packets on signalling channel """
-        self.__buffer = b''
-        future = self.stream.read_bytes(6)
-        future.add_done_callback(self._on_read)
+        for handler in handlers:
+            handler(wtp, msg)
 
     def _on_disconnect(self):
         """ Handle WTP disconnection """
@@ -246,18 +278,16 @@ class LVAPPConnection:
         self.log.info("WTP disconnected: %s", self.wtp.addr)
 
         # remove hosted lvaps
-        for lvap in list(RUNTIME.lvaps.values()):
-            wtps = [x.radio for x in lvap.blocks]
-            if self.wtp in wtps:
-                RUNTIME.remove_lvap(lvap.addr)
+        for lvap in list(self.wtp.lvaps.values()):
+            RUNTIME.remove_lvap(lvap.addr)
 
         # remove hosted vaps
-        for tenant_id in list(RUNTIME.tenants.keys()):
-            for vap_id in list(RUNTIME.tenants[tenant_id].vaps.keys()):
-                vap = RUNTIME.tenants[tenant_id].vaps[vap_id]
-                if vap.block.radio == self.wtp:
-                    self.log.info("Deleting VAP: %s", vap.bssid)
-                    del RUNTIME.tenants[tenant_id].vaps[vap.bssid]
+        for vap in list(self.wtp.vaps.values()):
+            self.log.info("Deleting VAP: %s", vap.bssid)
+            vap.tenant.remove_vap(vap.bssid)
+
+        # stop supervising this connection
+        self.server.heartbeat.unwatch(self)
 
         # reset state
         self.wtp.set_disconnected()
@@ -281,12 +311,15 @@ class LVAPPConnection:
         msg.seq = self.wtp.seq
         msg.type = msg_type
 
-        self.log.info("Sending %s message to %s seq %u",
-                      parser.name,
-                      self.wtp,
-                      msg.seq)
+        if empower.logger.sample(self.log, parser.name):
+            self.log.info("Sending %s message to %s seq %u",
+                          parser.name,
+                          self.wtp,
+                          msg.seq)
 
-        self.stream.write(parser.build(msg))
+        self.send_queue.write(parser.build(msg),
+                              PT_PRIORITIES.get(msg_type, PRIO_CONFIG),
+                              target=getattr(msg, 'sta', None))
 
         if hasattr(msg, 'module_id'):
             return msg.module_id
@@ -310,8 +343,7 @@ class LVAPPConnection:
 
         lvap.handle_add_lvap_response(status.module_id, status.status)
 
-    @classmethod
-    def _handle_del_lvap_response(cls, _, status):
+    def _handle_del_lvap_response(self, _, status):
         """Handle an incoming DEL_LVAP_RESPONSE message.
         Args:
             status, a DEL_LVAP_RESPONSE message
@@ -356,6 +388,10 @@ class LVAPPConnection:
         wtp.last_seen = hello.seq
         wtp.last_seen_ts = time.time()
 
+        # start supervising the connection
+        if wtp.connection == self and self not in self.server.heartbeat:
+            self.server.heartbeat.watch(self, wtp)
+
     def _handle_caps(self, wtp, caps):
         """Handle an incoming CAPS message.
         Args:
@@ -436,7 +472,7 @@ class LVAPPConnection:
                 vap = VAP(bssid, block, tenant)
 
                 self.send_add_vap(vap)
-                tenant.vaps[bssid] = vap
+                tenant.add_vap(vap)
 
     def update_slices(self):
         """Update active Slices."""
@@ -486,16 +522,8 @@ class LVAPPConnection:
             self.log.info("Probe request from %s ssid %s", sta, incoming_ssid)
 
         # generate list of available networks
-        networks = list()
-
-        for tenant in RUNTIME.tenants.values():
-            if tenant.bssid_type == T_TYPE_SHARED:
-                continue
-            for wtp_in_tenant in tenant.wtps.values():
-                if wtp.addr == wtp_in_tenant.addr:
-                    bssid = tenant.generate_bssid(sta)
-                    ssid = tenant.tenant_name
-                    networks.append((bssid, ssid))
+        networks = [(tenant.generate_bssid(sta), tenant.tenant_name)
+                    for tenant in RUNTIME.unique_tenants(wtp.addr)]
 
         if not networks:
             self.log.info("No Networks available at this WTP")
@@ -505,11 +533,15 @@ class LVAPPConnection:
         # of networks
         if sta not in RUNTIME.lvaps:
 
+            assoc_id = RUNTIME.assoc_id()
+
+            if assoc_id is None:
+                self.log.warning("Not spawning LVAP %s on %s", sta, wtp.addr)
+                return
+
             # spawn new LVAP
             self.log.info("Spawning new LVAP %s on %s", sta, wtp.addr)
 
-            assoc_id = RUNTIME.assoc_id()
-
             lvap = LVAP(sta, assoc_id=assoc_id)
             lvap.networks = networks
             lvap.supported_band = request.supported_band
@@ -519,6 +551,8 @@ class LVAPPConnection:
 
             # save LVAP in the runtime
             RUNTIME.lvaps[sta] = lvap
+            RUNTIME.journal.record(J_LVAP, sta, J_SPAWNED)
+            self.server.unauth_lvaps.touch(sta)
 
             # Send probe response
             self.send_probe_response(lvap, incoming_ssid)
@@ -530,6 +564,9 @@ class LVAPPConnection:
         lvap.networks = networks
         lvap.commit()
 
+        if not lvap.authentication_state:
+            self.server.unauth_lvaps.touch(sta)
+
         # Send probe response
         if lvap.wtp == wtp:
             self.send_probe_response(lvap, incoming_ssid)
@@ -559,40 +596,21 @@ class LVAPPConnection:
             lvap.association_state = False
             lvap.ssid = None
             lvap.commit()
+            self.server.unauth_lvaps.promote(sta)
             self.send_auth_response(lvap)
             return
 
         # Otherwise check if the requested BSSID belongs to a unique tenant
-        for tenant in RUNTIME.tenants.values():
-
-            if tenant.bssid_type == T_TYPE_SHARED:
-                continue
-
-            bssid = tenant.generate_bssid(lvap.addr)
-
-            if bssid == incoming_bssid:
-                lvap.bssid = incoming_bssid
-                lvap.authentication_state = True
-                lvap.association_state = False
-                lvap.ssid = None
-                lvap.commit()
-                self.send_auth_response(lvap)
-                return
-
-        # Finally check if this is a shared bssid
-        for tenant in RUNTIME.tenants.values():
-
-            if tenant.bssid_type == T_TYPE_UNIQUE:
-                continue
-
-            if incoming_bssid in tenant.vaps:
-                lvap.bssid = incoming_bssid
-                lvap.authentication_state = True
-                lvap.association_state = False
-                lvap.ssid = None
-                lvap.commit()
-                self.send_auth_response(lvap)
-                return
+        # or is a shared bssid
+        if RUNTIME.load_tenant_by_bssid(incoming_bssid, lvap.addr):
+            lvap.bssid = incoming_bssid
+            lvap.authentication_state = True
+            lvap.association_state = False
+            lvap.ssid = None
+            lvap.commit()
+            self.server.unauth_lvaps.promote(sta)
+            self.send_auth_response(lvap)
+            return
 
         self.log.info("Auth request from unknown BSSID %s", incoming_bssid)
 
@@ -620,51 +638,23 @@ class LVAPPConnection:
 
         incoming_ssid = SSID(request.ssid)
 
-        # Check if the requested SSID is from a unique tenant
-        for tenant in RUNTIME.tenants.values():
-
-            if tenant.bssid_type == T_TYPE_SHARED:
-                continue
-
-            bssid = tenant.generate_bssid(lvap.addr)
-
-            if bssid != incoming_bssid:
-                self.log.info("Invalid BSSID %s", incoming_bssid)
-                continue
-
-            if tenant.tenant_name == incoming_ssid:
-                lvap.bssid = incoming_bssid
-                lvap.authentication_state = True
-                lvap.association_state = True
-                lvap.ssid = incoming_ssid
-                lvap.supported_band = request.supported_band
-                lvap.commit()
-                self.send_assoc_response(lvap)
-                return
-
-        # Check if the requested SSID is from a unique tenant
-        for tenant in RUNTIME.tenants.values():
-
-            if tenant.bssid_type == T_TYPE_UNIQUE:
-                continue
-
-            if incoming_bssid not in tenant.vaps:
-                self.log.info("Invalid BSSID %s", incoming_bssid)
-                continue
-
-            ssid = tenant.vaps[incoming_bssid].ssid
+        # Check if the requested BSSID and SSID are from a unique or a shared
+        # tenant
+        tenant = RUNTIME.load_tenant_by_bssid(incoming_bssid, lvap.addr,
+                                              incoming_ssid)
 
-            if ssid == incoming_ssid:
-                lvap.bssid = incoming_bssid
-                lvap.authentication_state = True
-                lvap.association_state = True
-                lvap.ssid = incoming_ssid
-                lvap.supported_band = request.supported_band
-                lvap.commit()
-                self.send_assoc_response(lvap)
-                return
+        if not tenant:
+            self.log.info("Unable to find SSID %s on BSSID %s",
+                          incoming_ssid, incoming_bssid)
+            return
 
-        self.log.info("Unable to find SSID %s", incoming_ssid)
+        lvap.bssid = incoming_bssid
+        lvap.authentication_state = True
+        lvap.association_state = True
+        lvap.ssid = incoming_ssid
+        lvap.supported_band = request.supported_band
+        lvap.commit()
+        self.send_assoc_response(lvap)
 
     def _handle_status_lvap(self, wtp, status):
         """Handle an incoming STATUS_LVAP message.
@@ -685,10 +675,14 @@ class LVAPPConnection:
             return
 
         # If the LVAP does not exists, then create a new one
-        if sta not in RUNTIME.lvaps:
+        status_new = sta not in RUNTIME.lvaps
+
+        if status_new:
+            RUNTIME.assoc_ids.reserve(status.assoc_id)
             RUNTIME.lvaps[sta] = LVAP(sta,
                                       assoc_id=status.assoc_id,
                                       state=PROCESS_RUNNING)
+            RUNTIME.journal.record(J_LVAP, sta, J_SPAWNED)
 
         lvap = RUNTIME.lvaps[sta]
 
@@ -698,6 +692,11 @@ class LVAPPConnection:
         lvap.authentication_state = bool(status.flags.authenticated)
         lvap.association_state = bool(status.flags.associated)
 
+        if lvap.authentication_state:
+            self.server.unauth_lvaps.promote(sta)
+        elif status_new:
+            self.server.unauth_lvaps.touch(sta)
+
         ssid = SSID(status.ssid)
         if ssid == SSID():
             ssid = None
@@ -716,9 +715,9 @@ class LVAPPConnection:
             lvap.blocks[0].radio.connection.send_del_lvap(sta)
 
         if set_mask:
-            lvap._downlink = valid[0]
+            lvap._set_blocks(valid[0], lvap._uplink)
         else:
-            lvap._uplink.append(valid[0])
+            lvap._set_blocks(lvap._downlink, lvap._uplink + [valid[0]])
 
         # if this is not a DL+UL block then stop here
         if not set_mask:
@@ -857,8 +856,8 @@ class LVAPPConnection:
 
         # If the VAP does not exists, then create a new one
         if bssid not in tenant.vaps:
-            vap = VAP(bssid, valid, tenant)
-            tenant.vaps[bssid] = vap
+            vap = VAP(bssid, valid[0], tenant)
+            tenant.add_vap(vap)
 
         vap = tenant.vaps[bssid]
 
@@ -1028,9 +1027,7 @@ class LVAPPConnection:
     def send_bye_message_to_self(self):
         """Send a unsollicited BYE message to senf."""
 
-        for tenant in RUNTIME.tenants.values():
-            for app in tenant.components.values():
-                app.wtp_down(self.wtp)
+        RUNTIME.events.dispatch("wtp_down", self.wtp)
 
         for handler in self.server.pt_types_handlers[PT_BYE]:
             handler(self.wtp)
@@ -1038,9 +1035,7 @@ class LVAPPConnection:
     def send_register_message_to_self(self):
         """Send a unsollicited REGISTER message to senf."""
 
-        for tenant in RUNTIME.tenants.values():
-            for app in tenant.components.values():
-                app.wtp_up(self.wtp)
+        RUNTIME.events.dispatch("wtp_up", self.wtp)
 
         for handler in self.server.pt_types_handlers[PT_REGISTER]:
             handler(self.wtp)
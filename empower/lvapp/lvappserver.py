@@ -19,12 +19,20 @@
 
 from tornado.tcpserver import TCPServer
 
+import empower.logger
+
 from empower.core.pnfpserver import BaseTenantPNFDevHandler
 from empower.core.pnfpserver import BasePNFDevHandler
 from empower.restserver.restserver import RESTServer
 from empower.core.pnfpserver import PNFPServer
 from empower.core.module import ModuleWorker
+from empower.core.heartbeat import HeartbeatSupervisor
+from empower.core.sendqueue import DEFAULT_MAX_BYTES
+from empower.core.sendqueue import DEFAULT_MAX_DELAY
+from empower.core.sendqueue import DEFAULT_BUDGET
 from empower.lvapp.lvappconnection import LVAPPConnection
+from empower.lvapp.unauthlvaps import UnauthLVAPs
+from empower.lvapp.unauthlvaps import DEFAULT_TTL
 from empower.persistence.persistence import TblWTP
 from empower.core.wtp import WTP
 
@@ -33,6 +41,11 @@ from empower.lvapp import PT_LVAP_JOIN
 from empower.lvapp import PT_LVAP_HANDOVER
 from empower.lvapp import PT_TYPES
 from empower.lvapp import PT_TYPES_HANDLERS
+from empower.lvapp import PT_HELLO
+from empower.lvapp import PT_CAPS_RESPONSE
+from empower.lvapp.codec import CODECS
+from empower.lvapp.codec import CODEC_STRUCT
+from empower.lvapp.codec import CODEC_TYPES
 from empower.lvapp.lvaphandler import LVAPHandler
 from empower.lvapp.tenantlvaphandler import TenantLVAPHandler
 
@@ -70,27 +83,82 @@ class ModuleLVAPPWorker(ModuleWorker):
 
         module = self.modules[message.module_id]
 
-        self.log.info("Received %s response (id=%u) from %s",
-                      self.module.MODULE_NAME, message.module_id, pnfdev.addr)
+        if empower.logger.sample(self.log, self.module.MODULE_NAME):
+            self.log.info("Received %s response (id=%u) from %s",
+                          self.module.MODULE_NAME, message.module_id,
+                          pnfdev.addr)
 
         module.handle_response(message)
 
 
 class LVAPPServer(PNFPServer, TCPServer):
-    """Exposes the LVAP API."""
+    """Exposes the LVAP API.
+
+    Incoming messages are decoded using the precompiled codecs in
+    empower.lvapp.codec when available (codec=struct), the construct parsers
+    are used for all the other message types or if codec=construct.
+
+    Outgoing messages go through a per-connection send queue with priority
+    classes and a byte budget, see empower.core.sendqueue.
+
+    LVAPs spawned by probe requests are removed if the station does not
+    authenticate within lvap_ttl seconds from its last probe request, see
+    empower.lvapp.unauthlvaps.
+    """
 
     PNFDEV = WTP
     TBL_PNFDEV = TblWTP
+    CONNECTION = LVAPPConnection
+    PT_BEFORE_CONNECTED = [PT_HELLO]
+    PT_BEFORE_ONLINE = [PT_HELLO, PT_CAPS_RESPONSE]
+
+    def __init__(self, port, pt_types, pt_types_handlers,
+                 codec=CODEC_STRUCT, send_max_bytes=DEFAULT_MAX_BYTES,
+                 send_max_delay=DEFAULT_MAX_DELAY, send_budget=DEFAULT_BUDGET,
+                 lvap_ttl=DEFAULT_TTL):
+
+        if codec not in CODEC_TYPES:
+            raise ValueError("Invalid codec %s, valid codecs are: %s" %
+                             (codec, ', '.join(CODEC_TYPES)))
+
+        self.codec = codec
+        self.send_max_bytes = int(send_max_bytes)
+        self.send_max_delay = int(send_max_delay)
+        self.send_budget = int(send_budget)
 
-    def __init__(self, port, pt_types, pt_types_handlers):
+        pt_types = {pt_type: self.get_parser(pt_type, parser)
+                    for pt_type, parser in pt_types.items()}
 
         PNFPServer.__init__(self, port, pt_types, pt_types_handlers)
         TCPServer.__init__(self)
 
         self.connection = None
+        self.heartbeat = HeartbeatSupervisor()
+        self.unauth_lvaps = UnauthLVAPs(lvap_ttl)
 
         self.listen(self.port)
 
+    def to_dict(self):
+        """ Return a dict representation of the object. """
+
+        out = super().to_dict()
+        out['unauth_lvaps'] = self.unauth_lvaps
+        return out
+
+    def get_parser(self, pt_type, parser):
+        """Return the parser to be used for the specified message type."""
+
+        if self.codec == CODEC_STRUCT and parser and pt_type in CODECS:
+            return CODECS[pt_type]
+
+        return parser
+
+    def register_message(self, pt_type, parser, handler):
+        """Register new handler using the fast codec if available."""
+
+        parser = self.get_parser(pt_type, parser)
+        super().register_message(pt_type, parser, handler)
+
     def handle_stream(self, stream, address):
         self.log.info('Incoming connection from %r', address)
         self.connection = LVAPPConnection(stream, address, server=self)
@@ -98,9 +166,7 @@ class LVAPPServer(PNFPServer, TCPServer):
     def send_lvap_leave_message_to_self(self, lvap):
         """Send an LVAP_LEAVE message to self."""
 
-        for tenant in RUNTIME.tenants.values():
-            for app in tenant.components.values():
-                app.lvap_leave(lvap)
+        RUNTIME.events.dispatch_to_tenant(lvap.tenant, "lvap_leave", lvap)
 
         for handler in self.pt_types_handlers[PT_LVAP_LEAVE]:
             handler(lvap)
@@ -108,9 +174,7 @@ class LVAPPServer(PNFPServer, TCPServer):
     def send_lvap_join_message_to_self(self, lvap):
         """Send an LVAP_JOIN message to self."""
 
-        for tenant in RUNTIME.tenants.values():
-            for app in tenant.components.values():
-                app.lvap_join(lvap)
+        RUNTIME.events.dispatch_to_tenant(lvap.tenant, "lvap_join", lvap)
 
         for handler in self.pt_types_handlers[PT_LVAP_JOIN]:
             handler(lvap)
@@ -118,18 +182,21 @@ class LVAPPServer(PNFPServer, TCPServer):
     def send_lvap_handover_message_to_self(self, lvap, source_blocks):
         """Send an LVAP_HANDOVER message to self."""
 
-        for tenant in RUNTIME.tenants.values():
-            for app in tenant.components.values():
-                app.lvap_handover(lvap, source_blocks)
+        RUNTIME.events.dispatch_to_tenant(lvap.tenant, "lvap_handover", lvap,
+                                          source_blocks)
 
         for handler in self.pt_types_handlers[PT_LVAP_HANDOVER]:
             handler(lvap, source_blocks)
 
 
-def launch(port=DEFAULT_PORT):
+def launch(port=DEFAULT_PORT, codec=CODEC_STRUCT,
+           send_max_bytes=DEFAULT_MAX_BYTES, send_max_delay=DEFAULT_MAX_DELAY,
+           send_budget=DEFAULT_BUDGET, lvap_ttl=DEFAULT_TTL):
     """Start LVAPP Server Module."""
 
-    server = LVAPPServer(int(port), PT_TYPES, PT_TYPES_HANDLERS)
+    server = LVAPPServer(int(port), PT_TYPES, PT_TYPES_HANDLERS, codec,
+                         send_max_bytes, send_max_delay, send_budget,
+                         int(lvap_ttl))
 
     rest_server = RUNTIME.components[RESTServer.__module__]
     rest_server.add_handler_class(TenantWTPHandler, server)
@@ -137,5 +204,6 @@ def launch(port=DEFAULT_PORT):
     rest_server.add_handler_class(LVAPHandler, server)
     rest_server.add_handler_class(TenantLVAPHandler, server)
 
-    server.log.info("LVAP Server available at %u", server.port)
+    server.log.info("LVAP Server available at %u (codec=%s)",
+                    server.port, server.codec)
     return server
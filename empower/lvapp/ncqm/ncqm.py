@@ -20,6 +20,8 @@
 from empower.lvapp.lvappserver import ModuleLVAPPWorker
 from empower.core.app import EmpowerApp
 from empower.lvapp.common.maps import POLLER_RESPONSE
+from empower.lvapp.common.maps import POLLER_RESPONSE_CODEC
+from empower.lvapp.codec import register_codec
 from empower.lvapp.common.maps import Maps
 
 from empower.main import RUNTIME
@@ -27,6 +29,8 @@ from empower.main import RUNTIME
 PT_POLLER_REQUEST = 0x28
 PT_POLLER_RESPONSE = 0x29
 
+register_codec(PT_POLLER_RESPONSE, POLLER_RESPONSE_CODEC)
+
 
 class NCQM(Maps):
     """User Channel Quality Maps."""
@@ -30,6 +30,7 @@ from construct import Bytes
 from empower.core.resourcepool import ResourceBlock
 from empower.lvapp.lvappserver import ModuleLVAPPWorker
 from empower.lvapp import PT_VERSION
+from empower.core.sendqueue import PRIO_CONFIG
 from empower.core.app import EmpowerApp
 from empower.datatypes.etheraddress import EtherAddress
 from empower.core.module import ModuleTrigger
@@ -99,13 +100,12 @@ class RSSI(ModuleTrigger):
         self.wtps = []
         self.event = None
 
-    def __eq__(self, other):
+    @property
+    def key(self):
+        """Return the identity key."""
 
-        return super().__eq__(other) and \
-            self.lvap == other.lvap and \
-            self.relation == other.relation and \
-            self.value == other.value and \
-            self.period == other.period
+        return super().key + (self.lvap, self.relation, self.value,
+                              self.period)
 
     @property
     def lvap(self):
@@ -211,7 +211,7 @@ class RSSI(ModuleTrigger):
         self.wtps.append(wtp)
 
         msg = ADD_RSSI_TRIGGER.build(req)
-        wtp.connection.stream.write(msg)
+        wtp.connection.send_queue.write(msg, PRIO_CONFIG)
 
     def remove_rssi_from_wtp(self, wtp):
         """Remove RSSI to WTP."""
@@ -234,7 +234,7 @@ class RSSI(ModuleTrigger):
         self.wtps.remove(wtp)
 
         msg = DEL_RSSI_TRIGGER.build(req)
-        wtp.connection.stream.write(msg)
+        wtp.connection.send_queue.write(msg, PRIO_CONFIG)
 
     def handle_response(self, response):
         """ Handle an incoming RSSI_TRIGGER message.
@@ -23,6 +23,8 @@ from construct import Bytes
 from construct import Container
 from construct import Struct
 
+import empower.logger
+
 from empower.core.app import EmpowerApp
 from empower.datatypes.etheraddress import EtherAddress
 from empower.datatypes.dscp import DSCP
@@ -31,6 +33,9 @@ from empower.lvapp.lvappserver import ModuleLVAPPWorker
 from empower.core.module import ModulePeriodic
 from empower.core.resourcepool import ResourceBlock
 from empower.lvapp import PT_VERSION
+from empower.core.sendqueue import PRIO_STATS
+from empower.lvapp.codec import Codec
+from empower.lvapp.codec import register_codec
 
 from empower.main import RUNTIME
 
@@ -62,6 +67,13 @@ SLICE_STATS_RESPONSE = \
            UBInt32("tx_packets"),
            UBInt32("tx_bytes"))
 
+SLICE_STATS_RESPONSE_CODEC = \
+    Codec("slice_stats_response", "BBIII6sIIII",
+          ("version", "type", "length", "seq", "module_id", "wtp",
+           "deficit_used", "max_queue_length", "tx_packets", "tx_bytes"))
+
+register_codec(PT_SLICE_STATS_RESPONSE, SLICE_STATS_RESPONSE_CODEC)
+
 
 class SliceStats(ModulePeriodic):
     """SliceStats object.
@@ -80,6 +92,7 @@ class SliceStats(ModulePeriodic):
 
     MODULE_NAME = "slice_stats"
     REQUIRED = ['module_type', 'worker', 'tenant_id', 'block']
+    COALESCE = True
 
     def __init__(self):
 
@@ -92,10 +105,11 @@ class SliceStats(ModulePeriodic):
         # data structures
         self.slice_stats = {}
 
-    def __eq__(self, other):
+    @property
+    def key(self):
+        """Return the identity key."""
 
-        return super().__eq__(other) and self.block == other.block and \
-          self.dscp == other.dscp
+        return super().key + (self.block, self.dscp)
 
     @property
     def dscp(self):
@@ -183,8 +197,9 @@ class SliceStats(ModulePeriodic):
             self.unload()
             return
 
-        self.log.info("Sending %s request to %s (id=%u)",
-                      self.MODULE_NAME, wtp.addr, self.module_id)
+        if empower.logger.sample(self.log, self.MODULE_NAME):
+            self.log.info("Sending %s request to %s (id=%u)",
+                          self.MODULE_NAME, wtp.addr, self.module_id)
 
         stats_req = Container(version=PT_VERSION,
                               type=PT_SLICE_STATS_REQUEST,
@@ -198,7 +213,8 @@ class SliceStats(ModulePeriodic):
                               ssid=tenant.tenant_name.to_raw())
 
         msg = SLICE_STATS_REQUEST.build(stats_req)
-        wtp.connection.stream.write(msg)
+        wtp.connection.send_queue.write(msg, PRIO_STATS,
+                                        (self.MODULE_NAME, self.module_id))
 
     def handle_response(self, response):
         """Handle an incoming STATS_RESPONSE message.
@@ -35,6 +35,7 @@ from construct import Bit
 from empower.core.app import EmpowerApp
 from empower.datatypes.etheraddress import EtherAddress
 from empower.lvapp import PT_VERSION
+from empower.core.sendqueue import PRIO_CONFIG
 from empower.lvapp.lvappserver import ModuleLVAPPWorker
 from empower.core.resourcepool import ResourceBlock
 from empower.core.module import ModuleScheduled
@@ -107,12 +108,11 @@ class Summary(ModuleScheduled):
         # data structures
         self.frames = []
 
-    def __eq__(self, other):
+    @property
+    def key(self):
+        """Return the identity key."""
 
-        return super().__eq__(other) and \
-            self.addr == other.addr and \
-            self.block == other.block and \
-            self.limit == other.limit
+        return super().key + (self.addr, self.block, self.limit)
 
     @property
     def addr(self):
@@ -247,7 +247,7 @@ class Summary(ModuleScheduled):
                       self.MODULE_NAME, self.block, self.module_id)
 
         msg = ADD_SUMMARY.build(req)
-        wtp.connection.stream.write(msg)
+        wtp.connection.send_queue.write(msg, PRIO_CONFIG)
 
     def handle_response(self, response):
         """Handle an incoming response message.
@@ -26,12 +26,19 @@ from construct import UBInt16
 from construct import UBInt32
 from construct import Array
 
+import empower.logger
+
 from empower.datatypes.etheraddress import EtherAddress
 from empower.lvapp.lvappserver import ModuleLVAPPWorker
 from empower.core.module import ModulePeriodic
+from empower.core.module import freeze
 from empower.core.app import EmpowerApp
 from empower.core.resourcepool import ResourceBlock
 from empower.lvapp import PT_VERSION
+from empower.core.sendqueue import PRIO_STATS
+from empower.lvapp.codec import Codec
+from empower.lvapp.codec import CodecArray
+from empower.lvapp.codec import register_codec
 
 from empower.main import RUNTIME
 
@@ -64,12 +71,22 @@ TXP_BIN_COUNTER_RESPONSE = \
            UBInt16("nb_tx"),
            Array(lambda ctx: ctx.nb_tx, STATS))
 
+TXP_BIN_COUNTER_RESPONSE_CODEC = \
+    Codec("txp_bin_counter_response", "BBIII6sH",
+          ("version", "type", "length", "seq", "module_id", "wtp", "nb_tx"),
+          CodecArray("stats", "HI", ("bytes", "count"),
+                     count=lambda msg: msg.nb_tx,
+                     sequence=True))
+
+register_codec(PT_TXP_BIN_COUNTER_RESPONSE, TXP_BIN_COUNTER_RESPONSE_CODEC)
+
 
 class TXPBinCounter(ModulePeriodic):
     """ PacketsCounter object. """
 
     MODULE_NAME = "txp_bin_counter"
     REQUIRED = ['module_type', 'worker', 'tenant_id', 'block']
+    COALESCE = True
 
     def __init__(self):
 
@@ -84,12 +101,11 @@ class TXPBinCounter(ModulePeriodic):
         self.tx_packets = []
         self.tx_bytes = []
 
-    def __eq__(self, other):
+    @property
+    def key(self):
+        """Return the identity key."""
 
-        return super().__eq__(other) and \
-            self.mcast == other.mcast and \
-            self.block == other.block and \
-            self.bins == other.bins
+        return super().key + (self.mcast, self.block, freeze(self.bins))
 
     @property
     def mcast(self):
@@ -220,12 +236,14 @@ class TXPBinCounter(ModulePeriodic):
                               band=self.block.band,
                               mcast=self.mcast.to_raw())
 
-        self.log.info("Sending %s request to %s @ %s (id=%u)",
-                      self.MODULE_NAME, self.mcast, wtp.addr,
-                      self.module_id)
+        if empower.logger.sample(self.log, self.MODULE_NAME):
+            self.log.info("Sending %s request to %s @ %s (id=%u)",
+                          self.MODULE_NAME, self.mcast, wtp.addr,
+                          self.module_id)
 
         msg = TXP_BIN_COUNTER_REQUEST.build(stats_req)
-        wtp.connection.stream.write(msg)
+        wtp.connection.send_queue.write(msg, PRIO_STATS,
+                                        (self.MODULE_NAME, self.module_id))
 
     def fill_bytes_samples(self, data):
         """ Compute samples.
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Expiring tier of the LVAPs that never authenticated."""
+
+import sys
+import time
+
+import tornado.ioloop
+
+import empower.logger
+
+from empower.main import RUNTIME
+
+# LVAPs that did not authenticate are removed after this many seconds
+# without probe requests, 0 means never
+DEFAULT_TTL = 120
+
+# the tier is checked for expired LVAPs every this many ms
+SWEEP_PERIOD = 5000
+
+
+class UnauthLVAP:
+    """An LVAP that has not authenticated yet.
+
+    Attributes:
+        addr: the station address
+        last_seen: time of the last probe request (monotonic clock)
+    """
+
+    __slots__ = ('addr', 'last_seen')
+
+    def __init__(self, addr, last_seen):
+        self.addr = addr
+        self.last_seen = last_seen
+
+
+class UnauthLVAPs:
+    """The LVAPs spawned by probe requests that did not authenticate.
+
+    Records are kept in least recently seen order, so the sweep only looks
+    at the expired ones. An expired LVAP is removed from the runtime, which
+    sends a DEL_LVAP to the WTPs hosting it. A record is dropped (i.e. the
+    LVAP is promoted) as soon as the LVAP authenticates or if the LVAP has
+    been removed in the meantime.
+
+    Attributes:
+        ttl: the idle time (in s) after which an LVAP is removed
+        records: the records in least recently seen order
+        hits: probe requests from stations with a record
+        misses: probe requests from stations without a record
+        promoted: LVAPs that authenticated
+        evicted: LVAPs removed because idle
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL):
+
+        self.ttl = int(ttl)
+        self.records = {}
+        self.hits = 0
+        self.misses = 0
+        self.promoted = 0
+        self.evicted = 0
+        self.log = empower.logger.get_logger()
+
+        self.__worker = None
+
+        if self.ttl:
+            self.__worker = \
+                tornado.ioloop.PeriodicCallback(self.sweep, SWEEP_PERIOD)
+            self.__worker.start()
+
+    def __len__(self):
+        return len(self.records)
+
+    def touch(self, addr):
+        """Refresh (or create) the record of an unauthenticated LVAP."""
+
+        record = self.records.pop(addr, None)
+
+        if record:
+            self.hits += 1
+            record.last_seen = time.monotonic()
+        else:
+            self.misses += 1
+            record = UnauthLVAP(addr, time.monotonic())
+
+        # dicts keep insertion order, re-inserting moves the record last
+        self.records[addr] = record
+
+    def promote(self, addr):
+        """Drop the record of an LVAP that authenticated."""
+
+        if self.records.pop(addr, None):
+            self.promoted += 1
+
+    def sweep(self):
+        """Remove the LVAPs idle for more than ttl seconds."""
+
+        deadline = time.monotonic() - self.ttl
+
+        while self.records:
+
+            addr, record = next(iter(self.records.items()))
+
+            if record.last_seen > deadline:
+                return
+
+            del self.records[addr]
+
+            lvap = RUNTIME.lvaps.get(addr)
+
+            if not lvap:
+                continue
+
+            if lvap.authentication_state:
+                self.promoted += 1
+                continue
+
+            # handover in progress, check again later
+            if lvap.pending:
+                record.last_seen = time.monotonic()
+                self.records[addr] = record
+                continue
+
+            self.log.info("Removing idle unauthenticated LVAP %s", addr)
+            self.evicted += 1
+
+            RUNTIME.remove_lvap(addr)
+
+    def to_dict(self):
+        """Return a JSON-serializable dictionary representing the tier."""
+
+        memory = sys.getsizeof(self.records)
+
+        if self.records:
+            memory += len(self.records) * \
+                sys.getsizeof(next(iter(self.records.values())))
+
+        return {'ttl': self.ttl,
+                'lvaps': len(self.records),
+                'memory': memory,
+                'hits': self.hits,
+                'misses': self.misses,
+                'promoted': self.promoted,
+                'evicted': self.evicted}
@@ -26,12 +26,18 @@ from construct import Container
 from construct import Struct
 from construct import Array
 
+import empower.logger
+
 from empower.lvapp.lvappserver import ModuleLVAPPWorker
 from empower.core.app import EmpowerApp
 from empower.datatypes.etheraddress import EtherAddress
 from empower.core.module import ModulePeriodic
 from empower.core.resourcepool import ResourceBlock
 from empower.lvapp import PT_VERSION
+from empower.core.sendqueue import PRIO_STATS
+from empower.lvapp.codec import Codec
+from empower.lvapp.codec import CodecArray
+from empower.lvapp.codec import register_codec
 
 from empower.main import RUNTIME
 
@@ -61,6 +67,16 @@ WIFI_STATS_RESPONSE = Struct("wifi_stats_response", UBInt8("version"),
                              UBInt16("nb_entries"),
                              Array(lambda ctx: ctx.nb_entries, ENTRY_TYPE))
 
+WIFI_STATS_RESPONSE_CODEC = \
+    Codec("wifi_stats_response", "BBIII6sH",
+          ("version", "type", "length", "seq", "module_id", "wtp",
+           "nb_entries"),
+          CodecArray("entries", "BII", ("type", "timestamp", "sample"),
+                     count=lambda msg: msg.nb_entries,
+                     sequence=True))
+
+register_codec(PT_WIFI_STATS_RESPONSE, WIFI_STATS_RESPONSE_CODEC)
+
 
 class WiFiStats(ModulePeriodic):
     """Wi-Fi Stats."""
@@ -82,8 +98,11 @@ class WiFiStats(ModulePeriodic):
         self.ed_per_second = 0
         self.last = {}
 
-    def __eq__(self, other):
-        return super().__eq__(other) and self.block == other.block
+    @property
+    def key(self):
+        """Return the identity key."""
+
+        return super().key + (self.block, )
 
     @property
     def block(self):
@@ -173,11 +192,13 @@ class WiFiStats(ModulePeriodic):
                         channel=self.block.channel,
                         band=self.block.band)
 
-        self.log.info("Sending %s request to %s (id=%u)",
-                      self.MODULE_NAME, self.block, self.module_id)
+        if empower.logger.sample(self.log, self.MODULE_NAME):
+            self.log.info("Sending %s request to %s (id=%u)",
+                          self.MODULE_NAME, self.block, self.module_id)
 
         msg = WIFI_STATS_REQUEST.build(req)
-        wtp.connection.stream.write(msg)
+        wtp.connection.send_queue.write(msg, PRIO_STATS,
+                                        (self.MODULE_NAME, self.module_id))
 
     def handle_response(self, response):
         """Handle an incoming poller response message.
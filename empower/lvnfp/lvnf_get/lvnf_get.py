@@ -46,11 +46,11 @@ class LVNFGet(ModulePeriodic):
         self.retcode = None
         self.samples = None
 
-    def __eq__(self, other):
+    @property
+    def key(self):
+        """Return the identity key."""
 
-        return super().__eq__(other) and \
-            self.lvnf == other.lvnf and \
-            self.handler == other.handler
+        return super().key + (self.lvnf, self.handler)
 
     @property
     def handler(self):
@@ -21,6 +21,7 @@ from uuid import UUID
 
 from empower.core.lvnf import LVNF
 from empower.core.module import ModulePeriodic
+from empower.core.module import freeze
 from empower.lvnfp.lvnf_set import PT_LVNF_SET_REQUEST
 from empower.lvnfp.lvnf_set import PT_LVNF_SET_RESPONSE
 from empower.lvnfp.lvnfpserver import ModuleLVNFPWorker
@@ -48,12 +49,11 @@ class LVNFSet(ModulePeriodic):
         self.samples = None
         self.retcode = None
 
-    def __eq__(self, other):
+    @property
+    def key(self):
+        """Return the identity key."""
 
-        return super().__eq__(other) and \
-            self.lvnf == other.lvnf and \
-            self.handler == other.handler and \
-            self.value == other.value
+        return super().key + (self.lvnf, self.handler, freeze(self.value))
 
     @property
     def handler(self):
@@ -33,6 +33,7 @@ class LVNFStats(ModulePeriodic):
 
     MODULE_NAME = "lvnf_stats"
     REQUIRED = ['module_type', 'worker', 'tenant_id', 'lvnf']
+    COALESCE = True
 
     def __init__(self):
 
@@ -52,9 +53,11 @@ class LVNFStats(ModulePeriodic):
     def lvnf(self, value):
         self._lvnf = UUID(str(value))
 
-    def __eq__(self, other):
+    @property
+    def key(self):
+        """Return the identity key."""
 
-        return super().__eq__(other) and self.lvnf == other.lvnf
+        return super().key + (self.lvnf, )
 
     def to_dict(self):
         """Return a JSON-serializable representation of this object."""
@@ -142,9 +142,7 @@ class LVNFPMainHandler(tornado.websocket.WebSocketHandler):
     def _handle_bye(self, _):
         """Handle bye message."""
 
-        for tenant in RUNTIME.tenants.values():
-            for app in tenant.components.values():
-                app.cpp_down(self.cpp)
+        RUNTIME.events.dispatch("cpp_down", self.cpp)
 
     def send_register_message_to_self(self):
         """Send register message to self."""
@@ -160,9 +158,7 @@ class LVNFPMainHandler(tornado.websocket.WebSocketHandler):
     def _handle_register(self, _):
         """Handle register message."""
 
-        for tenant in RUNTIME.tenants.values():
-            for app in tenant.components.values():
-                app.cpp_up(self.cpp)
+        RUNTIME.events.dispatch("cpp_up", self.cpp)
 
     def on_close(self):
         """ Handle PNFDev disconnection """
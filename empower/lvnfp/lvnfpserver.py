@@ -115,9 +115,7 @@ class LVNFPServer(PNFPServer, tornado.web.Application):
     def send_lvnf_leave_message_to_self(self, lvnf):
         """Send an LVNF_LEAVE message to self."""
 
-        for tenant in RUNTIME.tenants.values():
-            for app in tenant.components.values():
-                app.lvnf_leave(lvnf)
+        RUNTIME.events.dispatch_to_tenant(lvnf.tenant, "lvnf_leave", lvnf)
 
         for handler in self.pt_types_handlers[PT_LVNF_LEAVE]:
             handler(lvnf)
@@ -125,9 +123,7 @@ class LVNFPServer(PNFPServer, tornado.web.Application):
     def send_lvnf_join_message_to_self(self, lvnf):
         """Send an LVNF_JOIN message to self."""
 
-        for tenant in RUNTIME.tenants.values():
-            for app in tenant.components.values():
-                app.lvnf_join(lvnf)
+        RUNTIME.events.dispatch_to_tenant(lvnf.tenant, "lvnf_join", lvnf)
 
         for handler in self.pt_types_handlers[PT_LVNF_JOIN]:
             handler(lvnf)
@@ -26,12 +26,21 @@ import os
 import sys
 import inspect
 import types
+import asyncio
+import tornado
 import tornado.ioloop
 
+import empower.logger
+
 from empower.core.core import EmpowerRuntime
 
 RUNTIME = None
 
+EVENT_LOOP_TORNADO = "tornado"
+EVENT_LOOP_ASYNCIO = "asyncio"
+EVENT_LOOP_UVLOOP = "uvloop"
+EVENT_LOOPS = [EVENT_LOOP_TORNADO, EVENT_LOOP_ASYNCIO, EVENT_LOOP_UVLOOP]
+
 
 class Options:
     """Options parser."""
@@ -76,6 +85,7 @@ class EmpowerOptions(Options):
         self.ctrl_ip = ip_address("192.168.100.158")
         self.ctrl_port = 5533
         self.ctrl_adv_iface = "wlp2s0"
+        self.event_loop = EVENT_LOOP_TORNADO
 
     def _set_ctrl_port(self, given_name, name, value):
         self.ctrl_port = int(value)
@@ -86,6 +96,13 @@ class EmpowerOptions(Options):
     def _set_ctrl_adv(self, given_name, name, value):
         self.ctrl_adv = value
 
+    def _set_event_loop(self, given_name, name, value):
+        if value not in EVENT_LOOPS:
+            print("Invalid event loop %s, valid event loops are: %s" %
+                  (value, ', '.join(EVENT_LOOPS)))
+            sys.exit(2)
+        self.event_loop = value
+
     def _set_log_config(self, given_name, name, value):
         if value is True:
             log_p = os.path.dirname(os.path.realpath(__file__))
@@ -118,6 +135,10 @@ Notable options include:
   --ctrl-adv            Advertise controller (bool, default is false)
   --ctrl-ip=<ip>        Controller address (ip, default is 192.168.100.158)
   --ctrl-port=<port>    Controller port (int, default is 5533)
+  --event-loop=<loop>   Event loop: tornado, asyncio or uvloop (default is
+                        tornado, uvloop falls back to asyncio if missing).
+                        With tornado 5 or later tornado runs on asyncio, so
+                        tornado and asyncio are the same event loop
 
 C1, C2, etc. are component names (e.g., Python modules). The supported options
 are up to the module.
@@ -268,6 +289,39 @@ def _setup_logging():
         logging.config.fileConfig(_OPTIONS.log_config,
                                   disable_existing_loggers=False)
 
+        # sampling and background writing of the log records
+        empower.logger.configure(_OPTIONS.log_config)
+
+
+def _setup_event_loop():
+    """ Setup the event loop.
+
+    With asyncio or uvloop the tornado IOLoop runs on top of the asyncio
+    event loop. This must be done before the IOLoop is first used.
+    """
+
+    event_loop = _OPTIONS.event_loop
+
+    # starting from tornado 5 the IOLoop always wraps the asyncio loop
+    if event_loop == EVENT_LOOP_TORNADO and tornado.version_info >= (5, 0):
+        event_loop = EVENT_LOOP_ASYNCIO
+
+    if event_loop == EVENT_LOOP_UVLOOP:
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            logging.warning("uvloop not available, using asyncio")
+            event_loop = EVENT_LOOP_ASYNCIO
+
+    if event_loop != EVENT_LOOP_TORNADO and tornado.version_info < (5, 0):
+        from tornado.platform.asyncio import AsyncIOMainLoop
+        AsyncIOMainLoop().install()
+
+    _OPTIONS.event_loop = event_loop
+
+    logging.info("Using %s event loop", event_loop)
+
 
 def _pre_startup():
     """Perform pre-startup operation.
@@ -277,6 +331,7 @@ def _pre_startup():
     """
 
     _setup_logging()
+    _setup_event_loop()
 
 
 def _post_startup():
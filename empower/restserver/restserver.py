@@ -30,6 +30,8 @@ from empower.core.account import ROLE_ADMIN, ROLE_USER
 from empower.restserver.apihandlers import EmpowerAPIHandler
 from empower.restserver.apihandlers import EmpowerAPIHandlerUsers
 from empower.core.module import ModuleWorker
+from empower.core.module import SCHEDULER
+from empower.core.transport import TRANSPORT
 from empower.main import RUNTIME
 from empower.core.tenant import T_TYPE_UNIQUE
 from empower.datatypes.ssid import SSID
@@ -1496,12 +1498,20 @@ class ModuleHandler(EmpowerAPIHandlerUsers):
             self.send_error(400, message=ex)
 
     def delete(self, *args, **kwargs):
-        """Delete a module.
+        """Unsubscribe from a module.
+
+        The module is removed when its last subscriber unsubscribes. If no
+        callback is specified a subscriber without callback is removed, or
+        the only callback if all its subscribers have a callback. A request
+        without callback is rejected if there are several callbacks.
 
         Args:
             tenant_id: network name of a tenant
             module_name: the name of the module
 
+        Request:
+            callback: the callback to be removed (optional)
+
         Example URLs:
 
             DELETE /api/v1/tenants/52313ecb-9d00-4b7d-b873-b55d3d9ada26/
@@ -1527,7 +1537,13 @@ class ModuleHandler(EmpowerAPIHandlerUsers):
             if module.tenant_id != tenant_id:
                 raise KeyError("Module %u not found" % module_id)
 
-            module.unload()
+            callback = None
+
+            if self.request.body:
+                request = tornado.escape.json_decode(self.request.body)
+                callback = request.get('callback')
+
+            module.unsubscribe(callback)
 
         except KeyError as ex:
             self.send_error(404, message=ex)
@@ -1537,6 +1553,98 @@ class ModuleHandler(EmpowerAPIHandlerUsers):
         self.set_status(204, None)
 
 
+class EventsHandler(EmpowerAPIHandler):
+    """Events handler. Used to view the apps events counters."""
+
+    HANDLERS = [r"/api/v1/events/?"]
+
+    @validate()
+    def get(self, *args, **kwargs):
+        """Lists the dispatch counters of the apps events.
+
+        Args:
+            None
+
+        Example URLs:
+            GET /api/v1/events
+        """
+
+        return RUNTIME.events
+
+
+class JournalHandler(EmpowerAPIHandler):
+    """Journal handler. Used to view the runtime state changes."""
+
+    HANDLERS = [r"/api/v1/journal/?",
+                r"/api/v1/journal/([0-9]*)/?"]
+
+    @validate(max_args=1)
+    def get(self, *args, **kwargs):
+        """Lists the state changes after the specified version.
+
+        If some of the changes are no longer in the journal, changes is
+        null and the full state must be read again.
+
+        Args:
+            [0]: the version (optional, default 0)
+
+        Example URLs:
+            GET /api/v1/journal
+            GET /api/v1/journal/1234
+        """
+
+        version = int(args[0]) if args else 0
+        changes = RUNTIME.journal.changes_since(version)
+
+        if changes is not None:
+            changes = [{'version': change[0],
+                        'timestamp': change[1],
+                        'entity': change[2],
+                        'key': change[3],
+                        'change': change[4]} for change in changes]
+
+        return {'version': RUNTIME.journal.version,
+                'changes': changes}
+
+
+class SchedulerHandler(EmpowerAPIHandler):
+    """Scheduler handler. Used to view the periodic tasks scheduler."""
+
+    HANDLERS = [r"/api/v1/scheduler/?"]
+
+    @validate()
+    def get(self, *args, **kwargs):
+        """Shows the scheduler queue depth and lateness.
+
+        Args:
+            None
+
+        Example URLs:
+            GET /api/v1/scheduler
+        """
+
+        return SCHEDULER
+
+
+class TransportHandler(EmpowerAPIHandler):
+    """Transport handler. Used to view the remote callbacks delivery."""
+
+    HANDLERS = [r"/api/v1/transport/?"]
+
+    @validate()
+    def get(self, *args, **kwargs):
+        """Shows the remote callbacks endpoints queues and latency.
+
+        Args:
+            None
+
+        Example URLs:
+            GET /api/v1/transport
+        """
+
+        return TRANSPORT
+
+
 class DocHandler(EmpowerAPIHandlerUsers):
     """Generates MD documentation."""
 
@@ -1614,7 +1722,9 @@ class RESTServer(tornado.web.Application):
                            TenantSliceHandler, TenantEndpointHandler,
                            TenantEndpointNextHandler, IndexHandler,
                            TenantEndpointPortHandler, TenantTrafficRuleHandler,
-                           TrafficRuleHandler, SliceHandler, DocHandler]
+                           TrafficRuleHandler, SliceHandler, EventsHandler,
+                           JournalHandler, SchedulerHandler, TransportHandler,
+                           DocHandler]
 
         for handler_class in handler_classes:
             self.add_handler_class(handler_class, http_server)
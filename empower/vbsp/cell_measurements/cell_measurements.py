@@ -110,10 +110,11 @@ class CellMeasurements(ModuleScheduled):
         # set this for auto-cleanup
         self.vbs = None
 
-    def __eq__(self, other):
+    @property
+    def key(self):
+        """Return the identity key."""
 
-        return super().__eq__(other) and self.cell == other.cell and \
-            self.cell == other.cell and self.interval == other.interval
+        return super().key + (self.cell, self.interval)
 
     @property
     def cell(self):
@@ -36,6 +36,7 @@ from empower.core.app import EmpowerApp
 from empower.core.ue import UE
 from empower.vbsp.vbspserver import ModuleVBSPWorker
 from empower.core.module import ModulePeriodic
+from empower.core.module import freeze
 from empower.vbsp import E_TYPE_TRIG
 from empower.vbsp import EP_OPERATION_ADD
 from empower.vbsp import EP_OPERATION_REM
@@ -118,10 +119,11 @@ class UEMeasurements(ModulePeriodic):
         # set this for auto-cleanup
         self.vbs = None
 
-    def __eq__(self, other):
+    @property
+    def key(self):
+        """Return the identity key."""
 
-        return super().__eq__(other) and self.ue == other.ue and \
-            self.rrc_measurements_param == other.rrc_measurements_param
+        return super().key + (self.ue, freeze(self.rrc_measurements_param))
 
     @property
     def rrc_measurements_param(self):
@@ -19,7 +19,9 @@
 
 import uuid
 import time
+
 import tornado.ioloop
+
 from tornado.iostream import StreamClosedError
 
 from construct import Container
@@ -31,7 +33,6 @@ from empower.vbsp import HEADER
 from empower.vbsp import PT_VERSION
 from empower.vbsp import PT_BYE
 from empower.vbsp import PT_REGISTER
-from empower.vbsp import EP_ACT_HELLO
 from empower.vbsp import EP_ACT_CAPS
 from empower.vbsp import E_TYPE_SINGLE
 from empower.vbsp import E_TYPE_SCHED
@@ -67,6 +68,9 @@ from empower.vbsp import SET_RAN_MAC_SLICE_REQUEST
 from empower.core.cellpool import Cell
 from empower.core.ue import UE
 from empower.core.utils import get_xid
+from empower.core.sendqueue import SendQueue
+from empower.core.journal import J_UE
+from empower.core.journal import J_JOINED
 
 from empower.main import RUNTIME
 
@@ -86,6 +90,7 @@ class VBSPConnection:
         address: The connection source address, i.e. the ENB IP address.
         server: Pointer to the server object.
         vbs: Pointer to a VBS object.
+        send_queue: The outgoing buffer used to talk with the ENB.
     """
 
     def __init__(self, stream, addr, server):
@@ -95,58 +100,44 @@ class VBSPConnection:
         self.server = server
         self.vbs = None
         self.stream.set_close_callback(self._on_disconnect)
+        self.send_queue = SendQueue(self.stream, server.send_max_bytes,
+                                    server.send_max_delay, server.send_budget)
         self.__buffer = b''
-        self._hb_interval_ms = 500
-        self._hb_worker = tornado.ioloop.PeriodicCallback(self._heartbeat_cb,
-                                                          self._hb_interval_ms)
-        self._hb_worker.start()
-        self._wait()
+        self.__vbs_raw = None
+        self.__vbs_addr = None
         self.log = empower.logger.get_logger()
+        tornado.ioloop.IOLoop.instance().spawn_callback(self._read_loop)
 
     def to_dict(self):
         """Return dict representation of object."""
 
         return self.addr
 
-    def _heartbeat_cb(self):
-        """ Check if vbs connection is still active. Disconnect if no hellos
-        have been received from the vbs for twice the hello period. """
-        if self.vbs and not self.stream.closed():
-            timeout = (self.vbs.period / 1000) * 3
-            if (self.vbs.last_seen_ts + timeout) < time.time():
-                self.log.info('Client inactive %s at %r', self.vbs.addr,
-                              self.addr)
-                self.stream.close()
+    async def _read_loop(self):
+        """ Read packets from the socket until the stream is closed. Every
+        packet is read in two steps, first the header and then the rest of
+        the packet. Once the full packet has been read the parser is invoked.
+        The parsed packet is then passed to the suitable method or dropped if
+        the packet type in unknown. """
 
-    def _on_read(self, future):
-        """ Appends bytes read from socket to a buffer. Once the full packet
-        has been read the parser is invoked and the buffers is cleared. The
-        parsed packet is then passed to the suitable method or dropped if the
-        packet type in unknown. """
-
-        try:
-            line = future.result()
-            self.__buffer = self.__buffer + line
-        except StreamClosedError as stream_ex:
-            self.log.error(stream_ex)
-            return
-
-        hdr = HEADER.parse(self.__buffer)
-
-        if len(self.__buffer) < hdr.length:
-            remaining = hdr.length - len(self.__buffer)
-            future = self.stream.read_bytes(remaining)
-            future.add_done_callback(self._on_read)
-            return
+        while not self.stream.closed():
 
-        try:
-            self._trigger_message(hdr)
-        except Exception as ex:
-            self.log.exception(ex)
-            self.stream.close()
+            try:
+                self.__buffer = \
+                    await self.stream.read_bytes(HEADER.sizeof())
+                hdr = HEADER.parse(self.__buffer)
+                if len(self.__buffer) < hdr.length:
+                    remaining = hdr.length - len(self.__buffer)
+                    self.__buffer += await self.stream.read_bytes(remaining)
+            except StreamClosedError as stream_ex:
+                self.log.error(stream_ex)
+                return
 
-        if not self.stream.closed():
-            self._wait()
+            try:
+                self._trigger_message(hdr)
+            except Exception as ex:
+                self.log.exception(ex)
+                self.stream.close()
 
     def _trigger_message(self, hdr):
 
@@ -165,58 +156,54 @@ class VBSPConnection:
 
         msg_type = event.action
 
-        if msg_type not in self.server.pt_types:
-            self.log.error("Unknown message type %u", msg_type)
+        try:
+            parser, handler, handlers, check_connected, check_online = \
+                self.server.dispatch[msg_type]
+        except KeyError:
+            if msg_type not in self.server.pt_types:
+                self.log.error("Unknown message type %u", msg_type)
             return
 
-        if self.server.pt_types[msg_type]:
+        msg = parser.parse(self.__buffer[offset:])
 
-            msg = self.server.pt_types[msg_type].parse(self.__buffer[offset:])
-            msg_name = self.server.pt_types[msg_type].name
+        # the VBS address is the same for all the messages on a connection
+        if hdr.enbid != self.__vbs_raw:
+            self.__vbs_raw = hdr.enbid
+            self.__vbs_addr = EtherAddress(hdr.enbid[2:8])
 
-            addr = EtherAddress(hdr.enbid[2:8])
+        addr = self.__vbs_addr
 
-            try:
-                vbs = RUNTIME.vbses[addr]
-            except KeyError:
-                self.log.error("Unknown VBS %s, closing connection", addr)
-                self.stream.close()
-                return
+        try:
+            vbs = RUNTIME.vbses[addr]
+        except KeyError:
+            self.log.error("Unknown VBS %s, closing connection", addr)
+            self.stream.close()
+            return
 
-            if not self.vbs:
-                self.vbs = vbs
+        if not self.vbs:
+            self.vbs = vbs
 
-            valid = [EP_ACT_HELLO]
-            if not self.vbs.is_connected() and msg_type not in valid:
-                self.log.info("Got %s message from disconnected VBS %s seq %u",
-                              msg_name, addr, hdr.seq)
-                return
+        if check_connected and not self.vbs.is_connected():
+            if empower.logger.sample(self.log, parser.name):
+                self.log.info("Got %s message from disconnected VBS %s "
+                              "seq %u", parser.name, addr, hdr.seq)
+            return
 
-            valid = [EP_ACT_HELLO, EP_ACT_CAPS]
-            if not self.vbs.is_online() and msg_type not in valid:
+        if check_online and not self.vbs.is_online():
+            if empower.logger.sample(self.log, parser.name):
                 self.log.info("Got %s message from offline VBS %s seq %u",
-                              msg_name, addr, hdr.seq)
-                return
+                              parser.name, addr, hdr.seq)
+            return
 
+        if empower.logger.sample(self.log, parser.name):
             self.log.info("Got %s message from %s seq %u xid %u",
-                          msg_name, self.vbs.addr, hdr.seq, hdr.xid)
+                          parser.name, self.vbs.addr, hdr.seq, hdr.xid)
 
-            handler_name = "_handle_%s" % msg_name
+        if handler:
+            handler(self, vbs, hdr, event, msg)
 
-            if hasattr(self, handler_name):
-                handler = getattr(self, handler_name)
-                handler(vbs, hdr, event, msg)
-
-            if msg_type in self.server.pt_types_handlers:
-                for handler in self.server.pt_types_handlers[msg_type]:
-                    handler(vbs, hdr, event, msg)
-
-    def _wait(self):
-        """ Wait for incoming packets on signalling channel """
-
-        self.__buffer = b''
-        future = self.stream.read_bytes(HEADER.sizeof())
-        future.add_done_callback(self._on_read)
+        for handler in handlers:
+            handler(vbs, hdr, event, msg)
 
     def _on_disconnect(self):
         """ Handle VBS disconnection """
@@ -227,9 +214,11 @@ class VBSPConnection:
         self.log.info("VBS disconnected: %s", self.vbs.addr)
 
         # remove hosted UEs
-        for ue in list(RUNTIME.ues.values()):
-            if self.vbs == ue.vbs:
-                RUNTIME.remove_ue(ue.ue_id)
+        for ue in list(self.vbs.ues.values()):
+            RUNTIME.remove_ue(ue.ue_id)
+
+        # stop supervising this connection
+        self.server.heartbeat.unwatch(self)
 
         # reset state
         self.vbs.set_disconnected()
@@ -242,9 +231,7 @@ class VBSPConnection:
     def send_bye_message_to_self(self):
         """Send a unsollicited BYE message to senf."""
 
-        for tenant in RUNTIME.tenants.values():
-            for app in tenant.components.values():
-                app.vbs_down(self.vbs)
+        RUNTIME.events.dispatch("vbs_down", self.vbs)
 
         for handler in self.server.pt_types_handlers[PT_BYE]:
             handler(self.vbs)
@@ -252,9 +239,7 @@ class VBSPConnection:
     def send_register_message_to_self(self):
         """Send a unsollicited REGISTER message to senf."""
 
-        for tenant in RUNTIME.tenants.values():
-            for app in tenant.components.values():
-                app.vbs_up(self.vbs)
+        RUNTIME.events.dispatch("vbs_up", self.vbs)
 
         for handler in self.server.pt_types_handlers[PT_REGISTER]:
             handler(self.vbs)
@@ -274,8 +259,9 @@ class VBSPConnection:
         msg.action = action
         msg.opcode = opcode
 
-        self.log.info("Sending %s to %s", parser.name, self.vbs)
-        self.stream.write(parser.build(msg))
+        if empower.logger.sample(self.log, parser.name):
+            self.log.info("Sending %s to %s", parser.name, self.vbs)
+        self.send_queue.write(parser.build(msg))
 
         return msg.xid
 
@@ -304,6 +290,10 @@ class VBSPConnection:
         vbs.last_seen = hdr.seq
         vbs.last_seen_ts = time.time()
 
+        # start supervising the connection
+        if vbs.connection == self and self not in self.server.heartbeat:
+            self.server.heartbeat.watch(self, vbs)
+
     def _handle_caps_response(self, vbs, hdr, event, caps):
         """Handle an incoming ENB CAPS RESPONSE message.
         Args:
@@ -510,6 +500,7 @@ class VBSPConnection:
 
                     RUNTIME.ues[ue.ue_id] = ue
                     tenant.ues[ue.ue_id] = ue
+                    RUNTIME.journal.record(J_UE, ue.ue_id, J_JOINED)
 
                     # UE is connected
                     if option.state == 0:
@@ -19,11 +19,17 @@
 
 from tornado.tcpserver import TCPServer
 
+import empower.logger
+
 from empower.core.pnfpserver import BaseTenantPNFDevHandler
 from empower.core.pnfpserver import BasePNFDevHandler
 from empower.restserver.restserver import RESTServer
 from empower.core.pnfpserver import PNFPServer
 from empower.core.module import ModuleWorker
+from empower.core.heartbeat import HeartbeatSupervisor
+from empower.core.sendqueue import DEFAULT_MAX_BYTES
+from empower.core.sendqueue import DEFAULT_MAX_DELAY
+from empower.core.sendqueue import DEFAULT_BUDGET
 from empower.vbsp.vbspconnection import VBSPConnection
 from empower.persistence.persistence import TblVBS
 from empower.core.vbs import VBS
@@ -33,6 +39,8 @@ from empower.vbsp import PT_UE_LEAVE
 from empower.vbsp import PT_UE_JOIN
 from empower.vbsp import PT_TYPES
 from empower.vbsp import PT_TYPES_HANDLERS
+from empower.vbsp import EP_ACT_HELLO
+from empower.vbsp import EP_ACT_CAPS
 from empower.vbsp.uehandler import UEHandler
 from empower.vbsp.tenantuehandler import TenantUEHandler
 
@@ -77,8 +85,10 @@ class ModuleVBSPWorker(ModuleWorker):
 
         module = self.modules[hdr.xid]
 
-        self.log.info("Received %s from %s response xid=%u seq=%u)",
-                      self.module.MODULE_NAME, vbs.addr, hdr.xid, hdr.seq)
+        if empower.logger.sample(self.log, self.module.MODULE_NAME):
+            self.log.info("Received %s from %s response xid=%u seq=%u)",
+                          self.module.MODULE_NAME, vbs.addr, hdr.xid,
+                          hdr.seq)
 
         if event.opcode == 1:
             module.handle_response(msg)
@@ -89,13 +99,24 @@ class VBSPServer(PNFPServer, TCPServer):
 
     PNFDEV = VBS
     TBL_PNFDEV = TblVBS
+    CONNECTION = VBSPConnection
+    PT_BEFORE_CONNECTED = [EP_ACT_HELLO]
+    PT_BEFORE_ONLINE = [EP_ACT_HELLO, EP_ACT_CAPS]
 
-    def __init__(self, port, prt_types, prt_types_handlers):
+    def __init__(self, port, prt_types, prt_types_handlers,
+                 send_max_bytes=DEFAULT_MAX_BYTES,
+                 send_max_delay=DEFAULT_MAX_DELAY,
+                 send_budget=DEFAULT_BUDGET):
 
         PNFPServer.__init__(self, port, prt_types, prt_types_handlers)
         TCPServer.__init__(self)
 
+        self.send_max_bytes = int(send_max_bytes)
+        self.send_max_delay = int(send_max_delay)
+        self.send_budget = int(send_budget)
+
         self.connection = None
+        self.heartbeat = HeartbeatSupervisor()
 
         self.listen(self.port)
 
@@ -106,9 +127,7 @@ class VBSPServer(PNFPServer, TCPServer):
     def send_ue_leave_message_to_self(self, ue):
         """Send an UE_LEAVE message to self."""
 
-        for tenant in RUNTIME.tenants.values():
-            for app in tenant.components.values():
-                app.ue_leave(ue)
+        RUNTIME.events.dispatch_to_tenant(ue.tenant, "ue_leave", ue)
 
         for handler in self.pt_types_handlers[PT_UE_LEAVE]:
             handler(ue)
@@ -116,18 +135,18 @@ class VBSPServer(PNFPServer, TCPServer):
     def send_ue_join_message_to_self(self, ue):
         """Send an UE_JOIN message to self."""
 
-        for tenant in RUNTIME.tenants.values():
-            for app in tenant.components.values():
-                app.ue_join(ue)
+        RUNTIME.events.dispatch_to_tenant(ue.tenant, "ue_join", ue)
 
         for handler in self.pt_types_handlers[PT_UE_JOIN]:
             handler(ue)
 
 
-def launch(port=DEFAULT_PORT):
+def launch(port=DEFAULT_PORT, send_max_bytes=DEFAULT_MAX_BYTES,
+           send_max_delay=DEFAULT_MAX_DELAY, send_budget=DEFAULT_BUDGET):
     """Start VBSP Server Module."""
 
-    server = VBSPServer(port, PT_TYPES, PT_TYPES_HANDLERS)
+    server = VBSPServer(port, PT_TYPES, PT_TYPES_HANDLERS, send_max_bytes,
+                        send_max_delay, send_budget)
 
     rest_server = RUNTIME.components[RESTServer.__module__]
     rest_server.add_handler_class(TenantVBSHandler, server)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Association id pool tests."""
+
+import unittest
+
+from empower.core.associd import AssocIdPool
+
+
+class TestAssocIdPool(unittest.TestCase):
+    """Allocation, reservation and release of association ids."""
+
+    def setUp(self):
+        self.pool = AssocIdPool(1, 3)
+
+    def test_allocate_fifo(self):
+        """Released ids are reused after the never used ones."""
+
+        self.assertEqual(self.pool.allocate(), 1)
+        self.pool.release(1)
+
+        self.assertEqual([self.pool.allocate() for _ in range(3)], [2, 3, 1])
+
+    def test_exhausted(self):
+        """An exhausted pool raises ValueError."""
+
+        for _ in range(3):
+            self.pool.allocate()
+
+        self.assertRaises(ValueError, self.pool.allocate)
+
+    def test_reserved_skipped(self):
+        """Reserved ids are not allocated."""
+
+        self.pool.reserve(1)
+
+        self.assertEqual(self.pool.allocate(), 2)
+
+    def test_out_of_range(self):
+        """Ids outside of the pool range are never handed out."""
+
+        self.pool.reserve(0)
+        self.pool.release(0)
+        self.pool.reserve(4)
+        self.pool.release(4)
+
+        self.assertEqual(self.pool.used, {})
+        self.assertEqual([self.pool.allocate() for _ in range(3)], [1, 2, 3])
+        self.assertRaises(ValueError, self.pool.allocate)
+
+    def test_shared_reservation(self):
+        """An id reported twice is freed after its last user."""
+
+        self.pool.reserve(2)
+        self.pool.reserve(2)
+        self.pool.release(2)
+
+        self.assertIn(2, self.pool.used)
+        self.assertEqual([self.pool.allocate() for _ in range(2)], [1, 3])
+        self.assertRaises(ValueError, self.pool.allocate)
+
+        self.pool.release(2)
+
+        self.assertEqual(self.pool.allocate(), 2)
+
+    def test_release_unknown(self):
+        """Releasing an id not in use has no effect."""
+
+        self.pool.release(1)
+        self.pool.release(1)
+
+        self.assertEqual([self.pool.allocate() for _ in range(3)], [1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Conformance tests for the LVAPP struct codecs against construct."""
+
+import random
+import unittest
+
+from empower.lvapp import HELLO
+from empower.lvapp import PROBE_REQUEST
+from empower.lvapp import AUTH_REQUEST
+from empower.lvapp import ASSOC_REQUEST
+from empower.lvapp import STATUS_LVAP
+from empower.lvapp import ADD_LVAP_RESPONSE
+from empower.lvapp import DEL_LVAP_RESPONSE
+from empower.lvapp import PT_HELLO
+from empower.lvapp import PT_PROBE_REQUEST
+from empower.lvapp import PT_AUTH_REQUEST
+from empower.lvapp import PT_ASSOC_REQUEST
+from empower.lvapp import PT_STATUS_LVAP
+from empower.lvapp import PT_ADD_LVAP_RESPONSE
+from empower.lvapp import PT_DEL_LVAP_RESPONSE
+from empower.lvapp.codec import CODECS
+from empower.lvapp.bin_counter.bin_counter import STATS_RESPONSE
+from empower.lvapp.bin_counter.bin_counter import PT_STATS_RESPONSE
+from empower.lvapp.common.maps import POLLER_RESPONSE
+from empower.lvapp.lvap_stats.lvap_stats import RATES_RESPONSE
+from empower.lvapp.lvap_stats.lvap_stats import PT_RATES_RESPONSE
+from empower.lvapp.ncqm.ncqm import PT_POLLER_RESPONSE
+from empower.lvapp.slice_stats.slice_stats import SLICE_STATS_RESPONSE
+from empower.lvapp.slice_stats.slice_stats import PT_SLICE_STATS_RESPONSE
+from empower.lvapp.txp_bin_counter.txp_bin_counter import \
+    TXP_BIN_COUNTER_RESPONSE
+from empower.lvapp.txp_bin_counter.txp_bin_counter import \
+    PT_TXP_BIN_COUNTER_RESPONSE
+from empower.lvapp.wifi_stats.wifi_stats import WIFI_STATS_RESPONSE
+from empower.lvapp.wifi_stats.wifi_stats import PT_WIFI_STATS_RESPONSE
+
+# the construct Struct each codec replaces
+STRUCTS = {
+    PT_HELLO: HELLO,
+    PT_PROBE_REQUEST: PROBE_REQUEST,
+    PT_AUTH_REQUEST: AUTH_REQUEST,
+    PT_ASSOC_REQUEST: ASSOC_REQUEST,
+    PT_STATUS_LVAP: STATUS_LVAP,
+    PT_ADD_LVAP_RESPONSE: ADD_LVAP_RESPONSE,
+    PT_DEL_LVAP_RESPONSE: DEL_LVAP_RESPONSE,
+    PT_STATS_RESPONSE: STATS_RESPONSE,
+    PT_POLLER_RESPONSE: POLLER_RESPONSE,
+    PT_RATES_RESPONSE: RATES_RESPONSE,
+    PT_SLICE_STATS_RESPONSE: SLICE_STATS_RESPONSE,
+    PT_TXP_BIN_COUNTER_RESPONSE: TXP_BIN_COUNTER_RESPONSE,
+    PT_WIFI_STATS_RESPONSE: WIFI_STATS_RESPONSE,
+}
+
+# number of entries used for the trailing arrays
+ENTRIES = (0, 1, 2, 7)
+
+# number of random payloads per message type and number of entries
+ROUNDS = 20
+
+
+def random_frame(rng, codec, entries, flags=None):
+    """Return a random frame with the specified number of array entries.
+
+    The counters (nb_* fields) are set so that the frame carries exactly
+    entries array entries. Bit fields are random, so undefined bits are
+    usually set, unless flags is not None in which case all of them are set
+    to flags.
+    """
+
+    values = list(codec.struct.unpack(rng.getrandbits(8 * codec.sizeof())
+                                      .to_bytes(codec.sizeof(), 'big')))
+
+    counters = [idx for idx, field in enumerate(codec.fields)
+                if field.startswith("nb_")]
+
+    # split the entries between the counters (nb_tx + nb_rx)
+    remaining = entries
+    for idx in counters:
+        values[idx] = rng.randint(0, remaining) \
+            if idx != counters[-1] else remaining
+        remaining -= values[idx]
+
+    if flags is not None:
+        for idx in [idx for idx, _ in codec.converters]:
+            values[idx] = flags
+
+    frame = codec.struct.pack(*values)
+
+    if not codec.array:
+        return frame
+
+    array = codec.array
+    size = array.struct.size
+
+    for _ in range(entries):
+
+        entry = list(array.struct.unpack(rng.getrandbits(8 * size)
+                                         .to_bytes(size, 'big')))
+
+        if flags is not None:
+            for idx, _ in array.converters:
+                entry[idx] = flags
+
+        frame += array.struct.pack(*entry)
+
+    return frame
+
+
+class TestCodecs(unittest.TestCase):
+    """Round trip every registered codec against its construct Struct."""
+
+    def assert_same(self, ours, theirs, path="msg"):
+        """Check that a parsed record matches a construct Container."""
+
+        if isinstance(theirs, dict):
+            self.assertEqual(sorted(ours.__slots__), sorted(theirs.keys()),
+                             path)
+            for key, value in theirs.items():
+                self.assert_same(getattr(ours, key), value,
+                                 "%s.%s" % (path, key))
+            return
+
+        if isinstance(theirs, list):
+            ours = list(ours)
+            self.assertEqual(len(ours), len(theirs), path)
+            for idx, (mine, value) in enumerate(zip(ours, theirs)):
+                self.assert_same(mine, value, "%s[%u]" % (path, idx))
+            return
+
+        self.assertEqual(ours, theirs, path)
+
+    def check(self, pt_type, frame):
+        """Parse and build frame with both codecs and compare."""
+
+        codec = CODECS[pt_type]
+        struct = STRUCTS[pt_type]
+
+        ours = codec.parse(frame)
+        theirs = struct.parse(frame)
+
+        self.assert_same(ours, theirs)
+
+        built = struct.build(theirs)
+
+        # each codec must build the same bytes from either representation
+        self.assertEqual(codec.build(ours), built)
+        self.assertEqual(codec.build(theirs), built)
+        self.assertEqual(struct.build(ours), built)
+
+        return built
+
+    def test_registered(self):
+        """Every registered codec has a construct counterpart."""
+
+        self.assertEqual(sorted(CODECS.keys()), sorted(STRUCTS.keys()))
+
+        for pt_type, codec in CODECS.items():
+            self.assertEqual(codec.name, STRUCTS[pt_type].name)
+
+    def test_random(self):
+        """Random payloads, including undefined bits in bit fields."""
+
+        rng = random.Random(0)
+
+        for pt_type, codec in CODECS.items():
+            for entries in ENTRIES if codec.array else (0,):
+                for _ in range(ROUNDS):
+                    with self.subTest(codec=codec.name, entries=entries):
+                        self.check(pt_type, random_frame(rng, codec, entries))
+
+    def test_round_trip(self):
+        """Frames without undefined bits are rebuilt unchanged."""
+
+        rng = random.Random(1)
+
+        for pt_type, codec in CODECS.items():
+
+            # set only the bits both codecs know about
+            converters = [x for _, x in codec.converters]
+            if codec.array:
+                converters += [x for _, x in codec.array.converters]
+
+            flags = 0
+            for converter in converters:
+                for _, pos in converter.bits:
+                    flags |= 1 << pos
+
+            for entries in ENTRIES if codec.array else (0,):
+                with self.subTest(codec=codec.name, entries=entries):
+                    frame = random_frame(rng, codec, entries, flags=flags)
+                    self.assertEqual(self.check(pt_type, frame), frame)
+
+    def test_undefined_flags(self):
+        """All bits set in every bit field, undefined ones are dropped."""
+
+        rng = random.Random(2)
+
+        for pt_type, codec in CODECS.items():
+
+            if not codec.converters and \
+                    not (codec.array and codec.array.converters):
+                continue
+
+            # at least one entry, the bit field may be in the array
+            for entries in ENTRIES[1:] if codec.array else (0,):
+                with self.subTest(codec=codec.name, entries=entries):
+                    frame = random_frame(rng, codec, entries, flags=0xFFFF)
+                    self.assertNotEqual(self.check(pt_type, frame), frame)
+
+    def test_status_lvap_networks(self):
+        """STATUS_LVAP with 0..N networks, trailing bytes are ignored."""
+
+        rng = random.Random(3)
+        codec = CODECS[PT_STATUS_LVAP]
+        size = codec.array.struct.size
+
+        for entries in range(0, 10):
+            with self.subTest(entries=entries):
+
+                frame = random_frame(rng, codec, entries)
+                self.check(PT_STATUS_LVAP, frame)
+
+                msg = codec.parse(frame + b'\x00' * (size - 1))
+                self.assertEqual(len(msg.networks), entries)
+
+    def test_short_array(self):
+        """Frames shorter than their counters are rejected."""
+
+        rng = random.Random(4)
+
+        for codec in CODECS.values():
+
+            if not codec.array or not codec.array.count:
+                continue
+
+            with self.subTest(codec=codec.name):
+                frame = random_frame(rng, codec, 3)
+                with self.assertRaises(ValueError):
+                    codec.parse(frame[:-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
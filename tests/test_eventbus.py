@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""App events delivery tests."""
+
+import unittest
+
+from empower.core.app import EmpowerApp
+from empower.core.eventbus import EventBus
+
+
+class Tenant:
+    """A tenant, only its id is used."""
+
+    def __init__(self, tenant_id):
+        self.tenant_id = tenant_id
+
+
+class JoinApp(EmpowerApp):
+    """An app overriding the lvap_join and wtp_up hooks."""
+
+    def __init__(self, tenant_id):
+        super().__init__(tenant_id)
+        self.events = []
+
+    def lvap_join(self, lvap):
+        self.events.append(('lvap_join', lvap))
+
+    def wtp_up(self, wtp):
+        self.events.append(('wtp_up', wtp))
+
+
+class TestEventBus(unittest.TestCase):
+    """Events go only to the apps overriding the hook, by tenant."""
+
+    def setUp(self):
+        self.bus = EventBus()
+
+    def test_only_overridden_hooks(self):
+        """Apps not overriding a hook are not subscribed to its event."""
+
+        app = JoinApp(1)
+        plain = EmpowerApp(1)
+
+        self.bus.add_app(app)
+        self.bus.add_app(plain)
+
+        self.assertEqual(self.bus.handlers['lvap_join'],
+                         {1: [(app, app.lvap_join)]})
+        self.assertEqual(self.bus.handlers['lvap_leave'], {})
+
+        self.bus.dispatch_to_tenant(Tenant(1), 'lvap_leave', 'sta')
+
+        self.assertEqual(app.events, [])
+        self.assertEqual(self.bus.dispatched['lvap_leave'], 1)
+        self.assertEqual(self.bus.delivered['lvap_leave'], 0)
+
+    def test_dispatch_to_tenant(self):
+        """Tenant events are delivered to the apps of that tenant only."""
+
+        app1 = JoinApp(1)
+        app2 = JoinApp(2)
+
+        self.bus.add_app(app1)
+        self.bus.add_app(app2)
+
+        self.bus.dispatch_to_tenant(Tenant(1), 'lvap_join', 'sta')
+        self.bus.dispatch_to_tenant(None, 'lvap_join', 'sta')
+
+        self.assertEqual(app1.events, [('lvap_join', 'sta')])
+        self.assertEqual(app2.events, [])
+        self.assertEqual(self.bus.dispatched['lvap_join'], 2)
+        self.assertEqual(self.bus.delivered['lvap_join'], 1)
+
+    def test_dispatch(self):
+        """Device events are delivered to the apps of every tenant."""
+
+        app1 = JoinApp(1)
+        app2 = JoinApp(2)
+
+        self.bus.add_app(app1)
+        self.bus.add_app(app2)
+
+        self.bus.dispatch('wtp_up', 'wtp')
+
+        self.assertEqual(app1.events, [('wtp_up', 'wtp')])
+        self.assertEqual(app2.events, [('wtp_up', 'wtp')])
+
+    def test_remove_app(self):
+        """Removed apps get no more events."""
+
+        app1 = JoinApp(1)
+        app2 = JoinApp(1)
+
+        self.bus.add_app(app1)
+        self.bus.add_app(app2)
+        self.bus.remove_app(app1)
+
+        self.bus.dispatch('wtp_up', 'wtp')
+
+        self.assertEqual(app1.events, [])
+        self.assertEqual(app2.events, [('wtp_up', 'wtp')])
+
+        self.bus.remove_app(app2)
+
+        self.assertEqual(self.bus.handlers['wtp_up'], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
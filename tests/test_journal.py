@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Runtime state changes journal tests."""
+
+import unittest
+
+from empower.core.journal import Journal
+from empower.core.journal import J_LVAP
+from empower.core.journal import J_SPAWNED
+from empower.core.journal import J_REMOVED
+
+
+class TestJournal(unittest.TestCase):
+    """Versions and changes_since over the ring buffer."""
+
+    def setUp(self):
+        self.journal = Journal(size=3)
+
+    def record(self, count):
+        """Record count changes, return their versions."""
+
+        return [self.journal.record(J_LVAP, i, J_SPAWNED)
+                for i in range(count)]
+
+    def test_versions(self):
+        """Every change gets the next version."""
+
+        self.assertEqual(self.journal.version, 0)
+        self.assertEqual(self.record(2), [1, 2])
+        self.assertEqual(self.journal.version, 2)
+
+    def test_changes_since(self):
+        """The changes after a version are returned in order."""
+
+        self.record(2)
+        self.journal.record(J_LVAP, 'sta', J_REMOVED)
+
+        changes = self.journal.changes_since(1)
+
+        self.assertEqual([x[0] for x in changes], [2, 3])
+        self.assertEqual(changes[-1][2:], (J_LVAP, 'sta', J_REMOVED))
+
+    def test_up_to_date(self):
+        """A consumer with the last version gets no changes."""
+
+        self.assertEqual(self.journal.changes_since(0), [])
+
+        self.record(2)
+
+        self.assertEqual(self.journal.changes_since(2), [])
+
+    def test_wrapped(self):
+        """changes_since returns None after the ring buffer wrapped."""
+
+        self.record(5)
+
+        self.assertIsNone(self.journal.changes_since(0))
+        self.assertIsNone(self.journal.changes_since(1))
+        self.assertEqual([x[0] for x in self.journal.changes_since(2)],
+                         [3, 4, 5])
+        self.assertEqual([x[0] for x in self.journal.changes_since(4)], [5])
+
+
+if __name__ == '__main__':
+    unittest.main()
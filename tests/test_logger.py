@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Asynchronous logging tests."""
+
+import queue
+import logging
+import threading
+import unittest
+
+from empower.logger import DroppingQueueHandler
+
+
+def record(level, msg):
+    """Return a log record."""
+
+    return logging.LogRecord("empower", level, __file__, 0, msg, None, None)
+
+
+class TestDroppingQueueHandler(unittest.TestCase):
+    """Only records below WARNING are dropped when the queue is full."""
+
+    def setUp(self):
+        self.records = queue.Queue(1)
+        self.handler = DroppingQueueHandler(self.records)
+
+    def test_drop_info(self):
+        """Records below WARNING are dropped when the queue is full."""
+
+        self.handler.emit(record(logging.INFO, "first"))
+        self.handler.emit(record(logging.INFO, "second"))
+
+        self.assertEqual(self.handler.dropped, 1)
+        self.assertEqual(self.records.get_nowait().msg, "first")
+
+    def test_keep_warning(self):
+        """Records at WARNING or above wait for room in the queue."""
+
+        self.handler.emit(record(logging.INFO, "info"))
+
+        written = []
+
+        def listener():
+            written.append(self.records.get(timeout=5).msg)
+
+        thread = threading.Thread(target=listener)
+        thread.start()
+
+        self.handler.emit(record(logging.ERROR, "error"))
+        thread.join()
+
+        self.assertEqual(self.handler.dropped, 0)
+        self.assertEqual(written, ["info"])
+        self.assertEqual(self.records.get_nowait().msg, "error")
+
+
+if __name__ == '__main__':
+    unittest.main()
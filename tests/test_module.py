@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Module subscribers and module worker tests."""
+
+import unittest
+
+from unittest.mock import patch
+
+import empower.core.module
+
+from empower.core.module import Module
+from empower.core.module import ModuleWorker
+
+
+class Worker:
+    """A worker recording the removed modules."""
+
+    def __init__(self):
+        self.removed = []
+
+    def remove_module(self, module_id):
+        self.removed.append(module_id)
+
+
+def module():
+    """Return a module attached to a recording worker."""
+
+    out = Module()
+    out.module_id = 1
+    out.worker = Worker()
+
+    return out
+
+
+def callback(response):
+    """An in-process callback."""
+
+
+class TestUnsubscribe(unittest.TestCase):
+    """Module.unsubscribe, as used by DELETE on a module."""
+
+    def test_no_body_single_callback(self):
+        """A DELETE without body removes a module created with a callback."""
+
+        mod = module()
+        mod.subscribe(["http://127.0.0.1:8000", "cb"])
+
+        mod.unsubscribe()
+
+        self.assertEqual(mod.worker.removed, [1])
+
+    def test_no_body_several_callbacks(self):
+        """A DELETE without body is rejected if several callbacks remain."""
+
+        mod = module()
+        mod.subscribe(["http://127.0.0.1:8000", "cb"])
+        mod.subscribe(callback)
+
+        self.assertRaises(ValueError, mod.unsubscribe)
+
+        self.assertEqual(mod.worker.removed, [])
+        self.assertEqual(mod.subscribers, 2)
+
+    def test_no_body_anonymous(self):
+        """A DELETE without body drops one subscriber without callback."""
+
+        mod = module()
+        mod.subscribe()
+        mod.subscribe(callback)
+
+        mod.unsubscribe()
+
+        self.assertEqual(mod.worker.removed, [])
+        self.assertEqual(mod.subscribers, 1)
+
+        mod.unsubscribe(callback)
+
+        self.assertEqual(mod.worker.removed, [1])
+
+    def test_callback(self):
+        """Only the named callback is removed."""
+
+        mod = module()
+        mod.subscribe(["http://127.0.0.1:8000", "cb"])
+        mod.subscribe(callback)
+
+        mod.unsubscribe(["http://127.0.0.1:8000", "cb"])
+
+        self.assertEqual(mod.worker.removed, [])
+        self.assertEqual(mod.callbacks, [callback])
+
+        with self.assertRaises(KeyError):
+            mod.unsubscribe(["http://127.0.0.1:8000", "cb"])
+
+
+class Server:
+    """A server accepting message handlers."""
+
+    def register_message(self, pt_type, parser, handler):
+        pass
+
+
+class Runtime:
+    """A runtime with a single server component."""
+
+    components = {'server': Server()}
+
+
+class Poller(Module):
+    """A module identified by its polling period."""
+
+    MODULE_NAME = "poller"
+
+    def __init__(self):
+        super().__init__()
+        self.every = 2000
+        self.running = False
+
+    @property
+    def key(self):
+        return super().key + (self.every, )
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+
+class TestModuleWorker(unittest.TestCase):
+    """ModuleWorker identity key index."""
+
+    def setUp(self):
+        with patch.object(empower.core.module, 'RUNTIME', Runtime()):
+            self.worker = ModuleWorker('server', Poller, 0, None)
+
+    def test_equivalent_modules(self):
+        """Adding an equivalent module subscribes to the existing one."""
+
+        first = self.worker.add_module(tenant_id=1, callback=callback)
+        second = self.worker.add_module(tenant_id=1)
+
+        self.assertIs(first, second)
+        self.assertEqual(first.subscribers, 2)
+
+    def test_mutated_module(self):
+        """A module is found by its current parameters after a change."""
+
+        first = self.worker.add_module(tenant_id=1, callback=callback)
+        first.every = 5000
+
+        second = self.worker.add_module(tenant_id=1)
+
+        self.assertIsNot(first, second)
+        self.assertTrue(second.running)
+        self.assertIs(self.worker.add_module(tenant_id=1, every=5000), first)
+
+    def test_remove_mutated_module(self):
+        """Removing a changed module drops it from the key index."""
+
+        first = self.worker.add_module(tenant_id=1, callback=callback)
+        first.every = 5000
+
+        first.unsubscribe(callback)
+
+        self.assertFalse(first.running)
+        self.assertEqual(self.worker.keys, {})
+
+        second = self.worker.add_module(tenant_id=1, every=5000)
+
+        self.assertIsNot(first, second)
+        self.assertTrue(second.running)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Timing wheel scheduler tests."""
+
+import unittest
+
+from unittest.mock import patch
+
+import empower.core.module
+
+from empower.core.module import Scheduler
+
+
+class Clock:
+    """A monotonic clock moved by hand."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+class PeriodicCallback:
+    """An IOLoop periodic callback run by hand."""
+
+    def __init__(self, callback, period):
+        self.callback = callback
+        self.period = period
+
+    def start(self):
+        pass
+
+
+class TestScheduler(unittest.TestCase):
+    """Timers fire on their period, can be cancelled and are capped."""
+
+    def setUp(self):
+
+        self.clock = Clock()
+        self.periodic = None
+
+        def periodic(callback, period):
+            self.periodic = PeriodicCallback(callback, period)
+            return self.periodic
+
+        patches = [patch.object(empower.core.module, 'time', self.clock),
+                   patch.object(empower.core.module.tornado.ioloop,
+                                'PeriodicCallback', periodic)]
+
+        for item in patches:
+            item.start()
+            self.addCleanup(item.stop)
+
+        self.scheduler = Scheduler(tick=10, max_per_tick=2)
+
+    def run_for(self, msecs):
+        """Run the scheduler once every tick for msecs ms."""
+
+        for _ in range(msecs // self.scheduler.tick):
+            self.clock.now += self.scheduler.tick / 1000
+            self.periodic.callback()
+
+    def test_period(self):
+        """A timer fires once every period."""
+
+        fired = []
+        self.scheduler.add(lambda: fired.append(self.scheduler.now), 100)
+
+        self.run_for(1000)
+
+        self.assertEqual(fired, list(range(1, 100, 10)))
+
+    def test_long_period(self):
+        """Timers beyond the first wheel fire on time."""
+
+        fired = []
+        self.scheduler.add(lambda: fired.append(self.scheduler.now), 10000)
+
+        self.run_for(25000)
+
+        self.assertEqual(fired, [1, 1001, 2001])
+
+    def test_cancel(self):
+        """A cancelled timer does not fire."""
+
+        fired = []
+        timer = self.scheduler.add(lambda: fired.append(1), 100)
+
+        self.run_for(200)
+        self.scheduler.cancel(timer)
+        self.run_for(1000)
+
+        self.assertEqual(fired, [1, 1])
+        self.assertEqual(self.scheduler.timers, 0)
+
+    def test_phases(self):
+        """Timers with the same period fire in different ticks."""
+
+        fired = []
+
+        for _ in range(3):
+            self.scheduler.add(lambda: fired.append(self.scheduler.now), 1000)
+
+        self.run_for(1000)
+
+        self.assertEqual(len(fired), 3)
+        self.assertEqual(len(set(fired)), 3)
+
+    def test_max_per_tick(self):
+        """Expired timers over the cap fire during the following ticks."""
+
+        fired = []
+
+        for period in [1, 1, 1]:
+            self.scheduler.add(lambda: fired.append(self.scheduler.now),
+                               period)
+
+        self.run_for(10)
+
+        self.assertEqual(fired, [1, 1])
+
+        self.run_for(10)
+
+        self.assertEqual(fired[2], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
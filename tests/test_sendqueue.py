@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Southbound send queue ordering tests."""
+
+import unittest
+
+from tornado.concurrent import Future
+
+from empower.core.sendqueue import SendQueue
+from empower.core.sendqueue import PRIO_ASSOC
+from empower.core.sendqueue import PRIO_CONFIG
+from empower.core.sendqueue import PRIO_STATS
+
+
+class Stream:
+    """A stream recording the writes, which never complete."""
+
+    def __init__(self):
+        self.writes = []
+
+    def closed(self):
+        return False
+
+    def write(self, data):
+        self.writes.append(data)
+        return Future()
+
+
+class TestSendQueue(unittest.TestCase):
+    """Frames order within a flush."""
+
+    def setUp(self):
+        self.stream = Stream()
+        self.queue = SendQueue(self.stream)
+
+    def test_priority_classes(self):
+        """Assoc frames first, then config and stats frames, in order."""
+
+        self.queue.write(b'stats1', PRIO_STATS)
+        self.queue.write(b'config1', PRIO_CONFIG)
+        self.queue.write(b'del_lvap', PRIO_ASSOC)
+        self.queue.write(b'stats2', PRIO_STATS)
+        self.queue.write(b'config2', PRIO_CONFIG)
+        self.queue.write(b'add_lvap', PRIO_ASSOC)
+        self.queue.flush()
+
+        self.assertEqual(self.stream.writes,
+                         [b'del_lvapadd_lvapconfig1config2stats1stats2'])
+
+    def test_same_target_in_order(self):
+        """Config frames are not overtaken by later assoc frames with the
+        same target."""
+
+        self.queue.write(b'config_a', PRIO_CONFIG, target='a')
+        self.queue.write(b'config_b', PRIO_CONFIG, target='b')
+        self.queue.write(b'config', PRIO_CONFIG)
+        self.queue.write(b'probe_c', PRIO_ASSOC, target='c')
+        self.queue.write(b'del_lvap_a', PRIO_ASSOC, target='a')
+        self.queue.write(b'config_a2', PRIO_CONFIG, target='a')
+        self.queue.flush()
+
+        self.assertEqual(self.stream.writes,
+                         [b'probe_cconfig_adel_lvap_aconfig_bconfig'
+                          b'config_a2'])
+
+    def test_merge_keeps_position(self):
+        """A replaced frame keeps the position of the frame it replaces."""
+
+        self.queue.write(b'a', PRIO_CONFIG, key='a')
+        self.queue.write(b'b', PRIO_CONFIG)
+        self.queue.write(b'A', PRIO_CONFIG, key='a')
+        self.queue.flush()
+
+        self.assertEqual(self.stream.writes, [b'Ab'])
+        self.assertEqual(self.queue.merged, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Remote module callbacks delivery tests, using local XML-RPC stubs."""
+
+import socketserver
+import threading
+import time
+import unittest
+
+from xmlrpc.server import SimpleXMLRPCServer
+from xmlrpc.server import SimpleXMLRPCRequestHandler
+
+from empower.core.transport import Endpoint
+from empower.core.transport import Event
+from empower.core.transport import Transport
+from empower.core.transport import XMLRPCEndpoint
+from empower.core.transport import P_DROP_NEWEST
+
+
+def wait_for(condition, timeout=5):
+    """Wait until condition() is true."""
+
+    deadline = time.time() + timeout
+
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError("Timeout")
+        time.sleep(0.01)
+
+
+def events(count):
+    """Return count events."""
+
+    return [Event(i, "cb", str(i)) for i in range(count)]
+
+
+class KeepAliveHandler(SimpleXMLRPCRequestHandler):
+    """Request handler keeping the connections open."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+
+class StubServer(socketserver.ThreadingMixIn, SimpleXMLRPCServer):
+    """XML-RPC server recording the calls."""
+
+    daemon_threads = True
+
+    def __init__(self, multicall=True):
+
+        super().__init__(("127.0.0.1", 0), requestHandler=KeepAliveHandler,
+                         logRequests=False)
+
+        self.calls = []
+        self.received = []
+        self.connections = 0
+
+        self.register_function(self.callback, "cb")
+
+        if multicall:
+            self.register_multicall_functions()
+
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        """Return the server url."""
+
+        return "http://127.0.0.1:%u" % self.server_address[1]
+
+    def callback(self, payload):
+        """The remote callback."""
+
+        self.received.append(payload)
+        return True
+
+    def _dispatch(self, method, params):
+        self.calls.append(method)
+        return super()._dispatch(method, params)
+
+
+class GatedEndpoint(Endpoint):
+    """Endpoint whose deliveries wait for a gate to be opened."""
+
+    def __init__(self, url, **kwargs):
+
+        super().__init__(url, **kwargs)
+
+        self.gate = threading.Event()
+        self.busy = threading.Event()
+        self.received = []
+
+    def deliver(self, batch):
+        self.busy.set()
+        self.gate.wait()
+        self.received += [event.payload for event in batch]
+        return 0
+
+
+class TestXMLRPCEndpoint(unittest.TestCase):
+    """XML-RPC endpoint tests."""
+
+    def setUp(self):
+        self.servers = []
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def stub(self, multicall=True):
+        """Start a stub server."""
+
+        server = StubServer(multicall)
+        self.servers.append(server)
+
+        return server
+
+    def test_multicall_batch(self):
+        """A batch is delivered with a single system.multicall."""
+
+        server = self.stub()
+        endpoint = XMLRPCEndpoint(server.url)
+
+        self.assertEqual(endpoint.deliver(events(3)), 0)
+        self.assertTrue(endpoint.multicall)
+        self.assertEqual(server.calls.count("system.multicall"), 1)
+        self.assertEqual(server.received, ["0", "1", "2"])
+
+    def test_batching_and_keep_alive(self):
+        """Queued events are batched over a single connection."""
+
+        server = self.stub()
+        endpoint = XMLRPCEndpoint(server.url, batch_size=10)
+
+        for i in range(100):
+            endpoint.send(i, "cb", str(i))
+
+        wait_for(lambda: endpoint.delivered == 100)
+
+        self.assertEqual(server.received, [str(i) for i in range(100)])
+        self.assertLess(endpoint.batches, 100)
+        self.assertIn("system.multicall", server.calls)
+        self.assertEqual(server.connections, 1)
+
+    def test_multicall_fallback(self):
+        """Events are delivered one by one without system.multicall."""
+
+        server = self.stub(multicall=False)
+        endpoint = XMLRPCEndpoint(server.url)
+
+        self.assertEqual(endpoint.deliver(events(5)), 0)
+        self.assertFalse(endpoint.multicall)
+        self.assertEqual(server.received, [str(i) for i in range(5)])
+
+    def test_unreachable(self):
+        """Events sent to an unreachable endpoint are counted as failed."""
+
+        transport = Transport()
+        transport.send(["http://127.0.0.1:1", "cb"], "key", "payload")
+
+        endpoint = transport.endpoints["http://127.0.0.1:1"]
+
+        wait_for(lambda: endpoint.failed == 1)
+
+        self.assertEqual(endpoint.delivered, 0)
+
+
+class TestEndpointQueue(unittest.TestCase):
+    """Endpoint queue policies tests."""
+
+    def test_coalesce(self):
+        """Coalesced events replace the queued event with the same key."""
+
+        endpoint = GatedEndpoint("stub")
+
+        # the first event is in flight
+        endpoint.send("key", "cb", "0", coalesce=True)
+        endpoint.busy.wait(5)
+
+        for i in range(1, 4):
+            endpoint.send("key", "cb", str(i), coalesce=True)
+
+        endpoint.gate.set()
+
+        wait_for(lambda: endpoint.delivered == 2)
+
+        self.assertEqual(endpoint.received, ["0", "3"])
+        self.assertEqual(endpoint.coalesced, 2)
+
+    def test_no_coalesce(self):
+        """Events are not coalesced by default."""
+
+        endpoint = GatedEndpoint("stub")
+
+        endpoint.send("key", "cb", "0")
+        endpoint.busy.wait(5)
+
+        for i in range(1, 4):
+            endpoint.send("key", "cb", str(i))
+
+        endpoint.gate.set()
+
+        wait_for(lambda: endpoint.delivered == 4)
+
+        self.assertEqual(endpoint.received, ["0", "1", "2", "3"])
+        self.assertEqual(endpoint.coalesced, 0)
+
+    def test_drop_oldest(self):
+        """The oldest events are dropped when the queue is full."""
+
+        endpoint = GatedEndpoint("stub", queue_size=2)
+
+        endpoint.send("key", "cb", "0")
+        endpoint.busy.wait(5)
+
+        for i in range(1, 5):
+            endpoint.send("key", "cb", str(i))
+
+        endpoint.gate.set()
+
+        wait_for(lambda: endpoint.delivered == 3)
+
+        self.assertEqual(endpoint.received, ["0", "3", "4"])
+        self.assertEqual(endpoint.dropped, 2)
+
+    def test_drop_newest(self):
+        """The new events are dropped when the queue is full."""
+
+        endpoint = GatedEndpoint("stub", queue_size=2, policy=P_DROP_NEWEST)
+
+        endpoint.send("key", "cb", "0")
+        endpoint.busy.wait(5)
+
+        for i in range(1, 5):
+            endpoint.send("key", "cb", str(i))
+
+        endpoint.gate.set()
+
+        wait_for(lambda: endpoint.delivered == 3)
+
+        self.assertEqual(endpoint.received, ["0", "1", "2"])
+        self.assertEqual(endpoint.dropped, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2017 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Unauthenticated LVAPs tier tests."""
+
+import unittest
+
+from unittest.mock import patch
+
+import empower.lvapp.unauthlvaps
+
+from empower.lvapp.unauthlvaps import UnauthLVAPs
+
+
+class Clock:
+    """A monotonic clock moved by hand."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+class PeriodicCallback:
+    """An IOLoop periodic callback never run."""
+
+    def __init__(self, callback, period):
+        self.callback = callback
+
+    def start(self):
+        pass
+
+
+class LVAP:
+    """An LVAP, only its state is used."""
+
+    def __init__(self, authentication_state=False, pending=None):
+        self.authentication_state = authentication_state
+        self.pending = pending or []
+
+
+class Runtime:
+    """A runtime recording the removed LVAPs."""
+
+    def __init__(self):
+        self.lvaps = {}
+        self.removed = []
+
+    def remove_lvap(self, addr):
+        del self.lvaps[addr]
+        self.removed.append(addr)
+
+
+class TestUnauthLVAPs(unittest.TestCase):
+    """TTL expiry and sweeping of the LVAPs that never authenticated."""
+
+    def setUp(self):
+
+        self.clock = Clock()
+        self.runtime = Runtime()
+
+        patches = [patch.object(empower.lvapp.unauthlvaps, 'time',
+                                self.clock),
+                   patch.object(empower.lvapp.unauthlvaps, 'RUNTIME',
+                                self.runtime),
+                   patch.object(empower.lvapp.unauthlvaps.tornado.ioloop,
+                                'PeriodicCallback', PeriodicCallback)]
+
+        for item in patches:
+            item.start()
+            self.addCleanup(item.stop)
+
+        self.tier = UnauthLVAPs(ttl=10)
+
+    def spawn(self, addr, **kwargs):
+        """Add an LVAP to the runtime and to the tier."""
+
+        self.runtime.lvaps[addr] = LVAP(**kwargs)
+        self.tier.touch(addr)
+
+    def test_expiry(self):
+        """Only the LVAPs idle for more than ttl seconds are removed."""
+
+        self.spawn('a')
+        self.clock.now += 6
+        self.spawn('b')
+        self.clock.now += 6
+
+        self.tier.sweep()
+
+        self.assertEqual(self.runtime.removed, ['a'])
+        self.assertEqual(list(self.tier.records), ['b'])
+        self.assertEqual(self.tier.evicted, 1)
+
+    def test_touch_refreshes(self):
+        """A probe request restarts the idle time."""
+
+        self.spawn('a')
+        self.spawn('b')
+        self.clock.now += 6
+        self.tier.touch('a')
+        self.clock.now += 6
+
+        self.tier.sweep()
+
+        self.assertEqual(self.runtime.removed, ['b'])
+        self.assertEqual(self.tier.hits, 1)
+        self.assertEqual(self.tier.misses, 2)
+
+    def test_promote(self):
+        """LVAPs that authenticated are never removed."""
+
+        self.spawn('a')
+        self.spawn('b')
+        self.tier.promote('a')
+        self.runtime.lvaps['b'].authentication_state = True
+        self.clock.now += 20
+
+        self.tier.sweep()
+
+        self.assertEqual(self.runtime.removed, [])
+        self.assertEqual(len(self.tier), 0)
+        self.assertEqual(self.tier.promoted, 2)
+
+    def test_removed_meanwhile(self):
+        """Records of LVAPs already removed are dropped."""
+
+        self.spawn('a')
+        del self.runtime.lvaps['a']
+        self.clock.now += 20
+
+        self.tier.sweep()
+
+        self.assertEqual(self.runtime.removed, [])
+        self.assertEqual(len(self.tier), 0)
+
+    def test_pending_handover(self):
+        """LVAPs with a pending handover are checked again later."""
+
+        self.spawn('a', pending=[1])
+        self.clock.now += 20
+
+        self.tier.sweep()
+
+        self.assertEqual(self.runtime.removed, [])
+        self.assertEqual(list(self.tier.records), ['a'])
+
+        self.runtime.lvaps['a'].pending = []
+        self.clock.now += 20
+
+        self.tier.sweep()
+
+        self.assertEqual(self.runtime.removed, ['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()